@@ -0,0 +1,158 @@
+"""
+This module provides the 64-bit integer bitboard primitives used by the Board class:
+square indexing helpers, piece and color identifiers, bit iteration, and the
+precomputed knight, king, pawn and sliding-ray attack tables.
+
+Squares are numbered 0..63 with a1 = 0, h1 = 7 and h8 = 63, i.e. ``square = y * 8 + x``
+where x is the file (column) and y is the rank (row), matching ``Board.board[y][x]``.
+"""
+
+WHITE, BLACK = 0, 1
+COLORS = ('white', 'black')
+COLOR_INDEX = {'white': WHITE, 'black': BLACK}
+
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)
+
+FULL = (1 << 64) - 1
+
+# Castling-rights bits
+WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE = 1, 2, 4, 8
+ALL_CASTLING = 15
+
+# Ray directions as (dx, dy). The first four run towards higher square numbers, so the
+# nearest blocker on those rays is the least significant set bit; the last four run
+# towards lower square numbers, where the nearest blocker is the most significant bit.
+NORTH, EAST, NORTH_EAST, NORTH_WEST, SOUTH, WEST, SOUTH_WEST, SOUTH_EAST = range(8)
+DIRECTIONS = ((0, 1), (1, 0), (1, 1), (-1, 1), (0, -1), (-1, 0), (-1, -1), (1, -1))
+POSITIVE_DIRECTIONS = (NORTH, EAST, NORTH_EAST, NORTH_WEST)
+ROOK_DIRECTIONS = (NORTH, EAST, SOUTH, WEST)
+BISHOP_DIRECTIONS = (NORTH_EAST, NORTH_WEST, SOUTH_WEST, SOUTH_EAST)
+
+KNIGHT_OFFSETS = ((2, 1), (2, -1), (-2, 1), (-2, -1), (1, 2), (1, -2), (-1, 2), (-1, -2))
+KING_OFFSETS = ((1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1))
+
+
+def square(x, y):
+    """Return the square index for board coordinates (x, y)."""
+    return y * 8 + x
+
+
+def square_coords(sq):
+    """Return the (x, y) board coordinates of a square index."""
+    return sq & 7, sq >> 3
+
+
+def bit(x, y):
+    """Return the single-bit mask for board coordinates (x, y)."""
+    return 1 << (y * 8 + x)
+
+
+def lsb(bb):
+    """Return the index of the least significant set bit of a non-empty bitboard."""
+    return (bb & -bb).bit_length() - 1
+
+
+def msb(bb):
+    """Return the index of the most significant set bit of a non-empty bitboard."""
+    return bb.bit_length() - 1
+
+
+def popcount(bb):
+    """Return the number of set bits in a bitboard."""
+    return bin(bb).count('1')
+
+
+def iter_squares(bb):
+    """Yield the square index of every set bit, lowest first."""
+    while bb:
+        low = bb & -bb
+        yield low.bit_length() - 1
+        bb ^= low
+
+
+def _offset_table(offsets):
+    table = []
+    for sq in range(64):
+        x, y = square_coords(sq)
+        mask = 0
+        for dx, dy in offsets:
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < 8 and 0 <= ny < 8:
+                mask |= bit(nx, ny)
+        table.append(mask)
+    return tuple(table)
+
+
+def _ray_table():
+    table = []
+    for dx, dy in DIRECTIONS:
+        rays = []
+        for sq in range(64):
+            x, y = square_coords(sq)
+            mask = 0
+            nx, ny = x + dx, y + dy
+            while 0 <= nx < 8 and 0 <= ny < 8:
+                mask |= bit(nx, ny)
+                nx, ny = nx + dx, ny + dy
+            rays.append(mask)
+        table.append(tuple(rays))
+    return tuple(table)
+
+
+KNIGHT_ATTACKS = _offset_table(KNIGHT_OFFSETS)
+KING_ATTACKS = _offset_table(KING_OFFSETS)
+# PAWN_ATTACKS[color][sq] holds the squares a pawn of that color on sq attacks.
+PAWN_ATTACKS = (_offset_table(((-1, 1), (1, 1))), _offset_table(((-1, -1), (1, -1))))
+# RAYS[direction][sq] holds every square from sq (exclusive) to the board edge.
+RAYS = _ray_table()
+# CASTLING_MASKS[sq] keeps the castling rights that survive a move from or to sq.
+CASTLING_MASKS = tuple(
+    ALL_CASTLING & ~{4: WHITE_KINGSIDE | WHITE_QUEENSIDE, 7: WHITE_KINGSIDE, 0: WHITE_QUEENSIDE,
+                     60: BLACK_KINGSIDE | BLACK_QUEENSIDE, 63: BLACK_KINGSIDE, 56: BLACK_QUEENSIDE}.get(sq, 0)
+    for sq in range(64)
+)
+
+
+def ray_attacks(sq, occupied, direction):
+    """Return the squares attacked along one ray, up to and including the first blocker."""
+    ray = RAYS[direction][sq]
+    blockers = ray & occupied
+    if blockers:
+        first = lsb(blockers) if direction in POSITIVE_DIRECTIONS else msb(blockers)
+        ray ^= RAYS[direction][first]
+    return ray
+
+
+def rook_attacks(sq, occupied):
+    """Return the rook attack set from sq given the occupied squares."""
+    return (ray_attacks(sq, occupied, NORTH) | ray_attacks(sq, occupied, EAST)
+            | ray_attacks(sq, occupied, SOUTH) | ray_attacks(sq, occupied, WEST))
+
+
+def bishop_attacks(sq, occupied):
+    """Return the bishop attack set from sq given the occupied squares."""
+    return (ray_attacks(sq, occupied, NORTH_EAST) | ray_attacks(sq, occupied, NORTH_WEST)
+            | ray_attacks(sq, occupied, SOUTH_WEST) | ray_attacks(sq, occupied, SOUTH_EAST))
+
+
+def queen_attacks(sq, occupied):
+    """Return the queen attack set from sq given the occupied squares."""
+    return rook_attacks(sq, occupied) | bishop_attacks(sq, occupied)
+
+
+def _line_tables():
+    between = [[0] * 64 for _ in range(64)]
+    line = [[0] * 64 for _ in range(64)]
+    for sq in range(64):
+        for direction in range(8):
+            opposite = (direction + 4) % 8
+            full_line = RAYS[direction][sq] | RAYS[opposite][sq] | (1 << sq)
+            for target in iter_squares(RAYS[direction][sq]):
+                between[sq][target] = RAYS[direction][sq] & ~RAYS[direction][target] & ~(1 << target)
+                line[sq][target] = full_line
+    return tuple(map(tuple, between)), tuple(map(tuple, line))
+
+
+# BETWEEN[a][b] holds the squares strictly between two aligned squares, and LINE[a][b]
+# the whole edge-to-edge line through them; both are 0 when a and b are not aligned.
+BETWEEN, LINE = _line_tables()
@@ -8,17 +8,112 @@ from board.model.knight import Knight
 from board.model.pawn import Pawn
 from board.model.queen import Queen
 from board.model.rook import Rook
+from board.fen import board_to_fen, parse_fen
+from board.packed import pack_board, unpack_fen
+from board.movegen import Move, generate_legal_moves, move_between
+from board.bitboard import (
+    ALL_CASTLING, BLACK_KINGSIDE, BLACK_QUEENSIDE, CASTLING_MASKS, COLOR_INDEX, WHITE_KINGSIDE,
+    WHITE_QUEENSIDE, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, KNIGHT_ATTACKS,
+    KING_ATTACKS, PAWN_ATTACKS, bishop_attacks, iter_squares, rook_attacks, square, square_coords
+)
+from board.zobrist import CASTLING_KEYS, EN_PASSANT_KEYS, PIECE_KEYS, SIDE_KEY, hash_board
 from collections import defaultdict
+from time import perf_counter
+from logger import TRACE, get_logger
+from metrics import METRICS
+
+log = get_logger('board')
+
+# Maps each piece class to its bitboard index.
+PIECE_KINDS = {Pawn: PAWN, Knight: KNIGHT, Bishop: BISHOP, Rook: ROOK, Queen: QUEEN, King: KING}
+PIECE_CLASSES = {kind: piece_type for piece_type, kind in PIECE_KINDS.items()}
+
+# Each castling right with the color, king square and rook square it requires.
+CASTLING_SQUARES = ((WHITE_KINGSIDE, 0, 4, 7), (WHITE_QUEENSIDE, 0, 4, 0),
+                    (BLACK_KINGSIDE, 1, 60, 63), (BLACK_QUEENSIDE, 1, 60, 56))
 
 class Board:
     """Represents the chess board, handling initialization, piece placement, and move validation."""
     
-    def __init__(self):
-        """Initialize an empty board and setup the pieces."""
+    def __init__(self, fen=None):
+        """Initialize the board with the standard setup, or from a FEN string when given."""
         self.board = [[None for _ in range(8)] for _ in range(8)]
+        # Bitboards indexed by [color][piece kind], plus per-color occupancy masks
+        self.pieces = [[0] * 6 for _ in range(2)]
+        self.occupancy = [0, 0]
+        self.material = [[0] * 6 for _ in range(2)]  # Piece count per [color][kind], kept with the bitboards
+        self.king_squares = [None, None]  # Cached king square per color
+        self.moved = 0  # Bitboard of the occupied squares whose piece has moved
+        self.turn = 'white'  # Side to move
+        self.castling_rights = ALL_CASTLING  # Bit set of the remaining castling rights
+        self.en_passant = None  # Square a pawn may capture en passant onto, if a capture is available
+        self.hash = CASTLING_KEYS[ALL_CASTLING]  # Zobrist hash, updated incrementally
         self.position_history = defaultdict(int)  # Tracks occurrences of each board position
         self.no_capture_or_pawn_move_count = 0  # Tracks moves since the last capture or pawn move
-        self.setup_pieces()
+        self.fullmove_number = 1  # Starts at 1 and increments after each black move
+        self.move_stack = []  # Moves made so far, most recent last
+        self._undo_stack = []  # One undo record per entry in move_stack
+        self.position_cache = {}  # Results computed for the current position, reset by every move
+        if fen is None:
+            self.setup_pieces()
+        else:
+            self._load_fen(fen)
+        self.update_position_history()
+
+    @classmethod
+    def from_fen(cls, fen):
+        """Create a board from a FEN string, raising ValueError if it is malformed."""
+        return cls(fen)
+
+    @classmethod
+    def from_packed(cls, data):
+        """Create a board from bytes produced by to_packed."""
+        return cls(unpack_fen(data))
+
+    def to_fen(self):
+        """Return the FEN string of the current position."""
+        return board_to_fen(self)
+
+    def to_packed(self):
+        """Return the compact binary encoding of the current position (see board.packed)."""
+        return pack_board(self)
+
+    def _load_fen(self, fen):
+        placements, turn, castling_rights, en_passant, halfmove, fullmove = parse_fen(fen)
+        for piece_type, color, x, y in placements:
+            self.place_piece(piece_type, color, x, y)
+        if None in self.king_squares or self.pieces[0][KING] & (self.pieces[0][KING] - 1) \
+                or self.pieces[1][KING] & (self.pieces[1][KING] - 1):
+            raise ValueError(f"FEN must have exactly one king per side: {fen!r}")
+        if self.is_king_in_check('black' if turn == 'white' else 'white'):
+            raise ValueError(f"FEN side not to move is in check: {fen!r}")
+
+        # Drop castling rights whose king or rook is not on its home square
+        for right, color, king_sq, rook_sq in CASTLING_SQUARES:
+            if not (self.pieces[color][KING] >> king_sq) & 1 or not (self.pieces[color][ROOK] >> rook_sq) & 1:
+                castling_rights &= ~right
+        us = COLOR_INDEX[turn]
+        if en_passant is not None and not PAWN_ATTACKS[1 - us][en_passant] & self.pieces[us][PAWN]:
+            en_passant = None
+
+        # Pieces off their home squares, or without a castling right, count as having moved
+        for piece_type, color, x, y in placements:
+            color_rights = castling_rights & (3 if color == 'white' else 12)
+            if piece_type is Pawn:
+                moved = y != (1 if color == 'white' else 6)
+            elif piece_type in (King, Rook):
+                moved = not color_rights & ~CASTLING_MASKS[square(x, y)]
+            else:
+                continue
+            if moved:
+                self.moved |= 1 << square(x, y)
+
+        self.turn = turn
+        self.castling_rights = castling_rights
+        self.en_passant = en_passant
+        self.no_capture_or_pawn_move_count = halfmove
+        self.fullmove_number = fullmove
+        self.hash = hash_board(self)
 
     def setup_pieces(self):
         """Setup pieces on the board in their initial positions."""
@@ -51,86 +146,206 @@ class Board:
     def place_piece(self, piece_type, color, x, y):
         """Place a piece of type piece_type and color at position (x, y)."""
         if self.is_within_bounds(x, y):
-            # Instantiate the piece with position parameters
-            piece = piece_type(color, x, y)
-            self.board[y][x] = piece
-
+            self._put(piece_type(color), x, y)  # Pieces are shared flyweights
+
+    def _put(self, piece, x, y):
+        """Place an existing piece object on (x, y), keeping the bitboards in sync."""
+        sq = square(x, y)
+        color = COLOR_INDEX[piece.color]
+        kind = PIECE_KINDS[type(piece)]
+        self.board[y][x] = piece
+        self.pieces[color][kind] |= 1 << sq
+        self.occupancy[color] |= 1 << sq
+        self.material[color][kind] += 1
+        self.hash ^= PIECE_KEYS[color][kind][sq]
+        if kind == KING:
+            self.king_squares[color] = sq
+
+    def _remove(self, x, y):
+        """Remove and return the piece on (x, y), keeping the bitboards in sync."""
+        piece = self.board[y][x]
+        if piece is not None:
+            sq = square(x, y)
+            color = COLOR_INDEX[piece.color]
+            kind = PIECE_KINDS[type(piece)]
+            self.board[y][x] = None
+            self.pieces[color][kind] &= ~(1 << sq)
+            self.occupancy[color] &= ~(1 << sq)
+            self.material[color][kind] -= 1
+            self.hash ^= PIECE_KEYS[color][kind][sq]
+            if kind == KING:
+                self.king_squares[color] = None
+        return piece
+
+    def _update_rules_state(self, color, start_sq, end_sq, en_passant=None):
+        """Update castling rights, the en-passant square and the side to move after color
+        moved from start_sq to end_sq, XORing each change into the hash."""
+        rights = self.castling_rights & CASTLING_MASKS[start_sq] & CASTLING_MASKS[end_sq]
+        if rights != self.castling_rights:
+            self.hash ^= CASTLING_KEYS[self.castling_rights] ^ CASTLING_KEYS[rights]
+            self.castling_rights = rights
+
+        if self.en_passant is not None:
+            self.hash ^= EN_PASSANT_KEYS[self.en_passant & 7]
+        # Only record the square when an enemy pawn can actually capture onto it
+        if en_passant is not None:
+            us = COLOR_INDEX[color]
+            if not PAWN_ATTACKS[us][en_passant] & self.pieces[1 - us][PAWN]:
+                en_passant = None
+        self.en_passant = en_passant
+        if en_passant is not None:
+            self.hash ^= EN_PASSANT_KEYS[en_passant & 7]
+
+        turn = 'black' if color == 'white' else 'white'
+        if turn != self.turn:
+            self.turn = turn
+            self.hash ^= SIDE_KEY
+
+    def has_moved(self, x, y):
+        """Check whether the piece on (x, y) has moved during the game."""
+        return bool((self.moved >> square(x, y)) & 1)
+
+    @property
+    def occupied(self):
+        """Bitboard of every occupied square."""
+        return self.occupancy[0] | self.occupancy[1]
 
     def get_piece(self, x, y):
         """Return the piece at the given board position (x, y)."""
         return self.board[y][x] if self.is_within_bounds(x, y) else None
 
     def is_empty(self, x, y):
-        empty = self.is_within_bounds(x, y) and self.get_piece(x, y) is None
-        print(f"Checking if position ({x}, {y}) is empty: {empty}")
+        empty = self.is_within_bounds(x, y) and not (self.occupied >> square(x, y)) & 1
+        if TRACE.enabled:
+            log.debug("is_empty", extra={'fields': {'x': x, 'y': y, 'empty': empty}})
         return empty
 
 
     def is_opponent_piece(self, x, y, color):
         if not self.is_within_bounds(x, y):
-            print(f"Position ({x}, {y}) is out of bounds.")
             return False
-        piece = self.get_piece(x, y)
-        opponent = piece is not None and piece.color != color
-        print(f"Checking if piece at ({x}, {y}) is an opponent piece: {opponent}")
+        opponent = bool((self.occupancy[1 - COLOR_INDEX[color]] >> square(x, y)) & 1)
+        if TRACE.enabled:
+            log.debug("is_opponent_piece", extra={'fields': {'x': x, 'y': y, 'color': color, 'opponent': opponent}})
         return opponent
 
-    def move_piece(self, start_pos, end_pos):
-        """Move a piece from start_pos to end_pos if the move is legal, including handling castling."""
+    def move_piece(self, start_pos, end_pos, color=None, promotion=None):
+        """Move a piece from start_pos to end_pos if the move is legal, including handling castling.
+
+        Only the side to move may move. When color is given, the move is also rejected unless
+        the moving piece has that color. Pawns reaching the last rank promote to `promotion`
+        (a piece kind), defaulting to a queen.
+        """
         start_x, start_y = self.pos_to_index(start_pos)
         end_x, end_y = self.pos_to_index(end_pos)
         moving_piece = self.get_piece(start_x, start_y)
         
         if not moving_piece:
             return False  # No piece at the starting position
-
-        # Check if the move is a castling move
-        if isinstance(moving_piece, King) and abs(start_y - end_y) == 2 and not moving_piece.has_moved:
-            if self.can_castle(moving_piece, start_x, start_y, end_y):
-                return self.perform_castling(moving_piece, start_x, start_y, end_y)
-
-        # Perform a regular move if not castling
-        if self.is_legal_move(start_pos, end_pos, moving_piece.color):
-            self.board[end_y][end_x] = moving_piece
-            self.board[start_y][start_x] = None
-            moving_piece.has_moved = True  # Mark the piece as having moved
-            self.update_position_history()  # Keep track of the board's state
-            return True
-        
-        return False
-
-    def can_castle(self, king, start_x, start_y, end_y):
-        """Check if castling is possible given the king's current state and position."""
-        direction = 1 if end_y > start_y else -1
-        rook_pos_y = start_y + (direction * 4) if direction == 1 else 0  # Rook's initial position
-        steps = range(start_y + direction, rook_pos_y, direction)
-        
-        if any(self.board[start_x][y] for y in steps):  # Ensure path is clear
+        if moving_piece.color != self.turn or color is not None and color != self.turn:
             return False
-        if any(self.is_square_under_attack(start_x, y, king.color) for y in steps):  # Ensure path is not under attack
+
+        move = move_between(self.legal_moves(),
+                            square(start_x, start_y), square(end_x, end_y), promotion)
+        if move is None:
             return False
 
-        rook = self.get_piece(start_x, rook_pos_y)
-        return isinstance(rook, Rook) and not rook.has_moved
+        self.make_move(move)
+        self.update_position_history()  # Keep track of the board's state
+        return True
 
-    def perform_castling(self, king, start_x, start_y, end_y):
+    def make_move(self, move):
+        """Apply a legal move and push an undo record so unmake_move can reverse it.
+
+        Handles captures, castling (the rook moves along), en passant and promotion, and
+        updates castling rights, the en-passant square, the halfmove clock, the side to
+        move and the hash. The position history is left to the caller.
+        """
+        start, end = move.start, move.end
+        start_x, start_y, end_x, end_y = start & 7, start >> 3, end & 7, end >> 3
+        piece = self.board[start_y][start_x]
+        if self.position_cache:
+            self.position_cache = {}
+        if METRICS.enabled:
+            METRICS.incr('make_move')
+        kind = PIECE_KINDS[type(piece)]
+
+        position_hash = self.hash
+        captured_sq = end
+        if kind == PAWN and end == self.en_passant:
+            captured_sq = square(end_x, start_y)  # The captured pawn sits beside the mover
+        captured = self._remove(captured_sq & 7, captured_sq >> 3)
+
+        self._undo_stack.append((piece, self.moved, captured, captured_sq, self.castling_rights,
+                                 self.en_passant, self.no_capture_or_pawn_move_count, position_hash))
+        self.move_stack.append(move)
+
+        self._remove(start_x, start_y)
+        if move.promotion is not None:
+            self._put(PIECE_CLASSES[move.promotion](piece.color), end_x, end_y)
+        else:
+            self._put(piece, end_x, end_y)
+        moved = (self.moved & ~(1 << start | 1 << captured_sq)) | 1 << end
+
+        en_passant = None
+        if kind == KING and abs(end_x - start_x) == 2:
+            rook_x, rook_to = 7 if end_x > start_x else 0, (start_x + end_x) // 2
+            self._put(self._remove(rook_x, start_y), rook_to, start_y)
+            moved = (moved & ~(1 << square(rook_x, start_y))) | 1 << square(rook_to, start_y)
+        elif kind == PAWN and abs(end_y - start_y) == 2:
+            en_passant = square(start_x, (start_y + end_y) // 2)
+        self.moved = moved
+
+        if kind == PAWN or captured is not None:
+            self.no_capture_or_pawn_move_count = 0
+        else:
+            self.no_capture_or_pawn_move_count += 1
+        if piece.color == 'black':
+            self.fullmove_number += 1
+        self._update_rules_state(piece.color, start, end, en_passant)
+
+    def last_captured(self):
+        """Return the piece captured by the most recent move, or None."""
+        return self._undo_stack[-1][2] if self._undo_stack else None
+
+    def unmake_move(self):
+        """Undo the most recent make_move, restoring the exact previous state."""
+        move = self.move_stack.pop()
+        if self.position_cache:
+            self.position_cache = {}
+        if METRICS.enabled:
+            METRICS.incr('unmake_move')
+        piece, moved, captured, captured_sq, castling_rights, en_passant, clock, position_hash = \
+            self._undo_stack.pop()
+        start_x, start_y, end_x, end_y = move.start & 7, move.start >> 3, move.end & 7, move.end >> 3
+
+        self._remove(end_x, end_y)
+        self._put(piece, start_x, start_y)
+        if captured is not None:
+            self._put(captured, captured_sq & 7, captured_sq >> 3)
+        if isinstance(piece, King) and abs(end_x - start_x) == 2:
+            rook = self._remove((start_x + end_x) // 2, start_y)
+            self._put(rook, 7 if end_x > start_x else 0, start_y)
+
+        self.moved = moved
+
+        self.turn = piece.color
+        if piece.color == 'black':
+            self.fullmove_number -= 1
+        self.castling_rights = castling_rights
+        self.en_passant = en_passant
+        self.no_capture_or_pawn_move_count = clock
+        self.hash = position_hash
+
+    def can_castle(self, king, start_x, start_y, end_x):
+        """Check if the king on (start_x, start_y) may castle towards file end_x."""
+        if abs(end_x - start_x) != 2:
+            return False
+        return self.is_legal_move((start_x, start_y), (end_x, start_y), king.color)
+
+    def perform_castling(self, king, start_x, start_y, end_x):
         """Execute the castling move, moving both the king and the rook."""
-        direction = 1 if end_y > start_y else -1
-        rook_start_y = start_y + (direction * 4) if direction == 1 else 0
-        rook_end_y = start_y + direction  # Where the rook ends up after castling
-
-        # Move the rook
-        rook = self.get_piece(start_x, rook_start_y)
-        self.board[start_x][rook_end_y] = rook
-        self.board[start_x][rook_start_y] = None
-
-        # Move the king
-        king_end_y = start_y + (2 * direction)
-        self.board[start_x][king_end_y] = king
-        self.board[start_x][start_y] = None
-        
-        king.has_moved = True
-        rook.has_moved = True
+        self.make_move(Move(square(start_x, start_y), square(end_x, start_y)))
         self.update_position_history()
         return True
 
@@ -141,25 +356,41 @@ class Board:
         end_x, end_y = self.pos_to_index(end_pos)
         moving_piece = self.get_piece(start_x, start_y)
         
-        if not moving_piece or moving_piece.color != color:
+        if not moving_piece or moving_piece.color != color or color != self.turn:
             return False
         
-        if not moving_piece.is_valid_move(start_x, start_y, end_x, end_y, self):
-            return False
-
-        # Temporarily make the move
-        captured_piece = self.board[end_y][end_x]
-        self.board[end_y][end_x] = moving_piece
-        self.board[start_y][start_x] = None
-        
-        # Check for check condition
-        in_check = self.is_king_in_check(color)  # Corrected to only pass color
-        
-        # Undo the move
-        self.board[start_y][start_x] = moving_piece
-        self.board[end_y][end_x] = captured_piece
-        
-        return not in_check
+        legal_moves = self.legal_moves()
+        return move_between(legal_moves, square(start_x, start_y), square(end_x, end_y)) is not None
+
+    def generate_legal_moves(self, color):
+        """Return every strictly legal move for the given color as a list of Move tuples."""
+        return self._generate(COLOR_INDEX[color])
+
+    def _generate(self, us):
+        """Generate the legal moves of color index `us`, counted and timed when metrics are on."""
+        if not METRICS.enabled:
+            return generate_legal_moves(self, us)
+        started = perf_counter()
+        moves = generate_legal_moves(self, us)
+        METRICS.observe('movegen', perf_counter() - started)
+        METRICS.incr('movegen_calls')
+        return moves
+
+    def legal_moves(self, color=None):
+        """Return the legal moves of `color`, the side to move by default, as a tuple.
+
+        The side to move's moves are generated once per position and cached until the next
+        move, so validating a move, reporting the game status and listing moves for the
+        client share a single generation. Search code calls generate_legal_moves instead.
+        """
+        if color is not None and color != self.turn:
+            return tuple(self._generate(COLOR_INDEX[color]))
+        moves = self.position_cache.get('legal_moves')
+        if METRICS.enabled:
+            METRICS.incr('legal_moves_cache_misses' if moves is None else 'legal_moves_cache_hits')
+        if moves is None:
+            moves = self.position_cache['legal_moves'] = tuple(self._generate(COLOR_INDEX[self.turn]))
+        return moves
 
 
 
@@ -167,44 +398,58 @@ class Board:
         self.position_history[self.current_position()] += 1
 
     def current_position(self):
-        return ''.join(str(self.board[y][x]) for y in range(8) for x in range(8))
+        """Return the key identifying the current position: its Zobrist hash."""
+        return self.hash
 
 
     def is_in_check(self, color):
         """Check if the king of the given color is in check."""
-        king_pos = self.find_king(color)
-        if king_pos:
-            return self.is_king_in_check(king_pos, color)
-        return False
+        return self.is_king_in_check(color)
 
     def is_king_in_check(self, color):
         """Check if the king of the given color is under attack."""
-        king_pos = self.find_king(color)
-        if king_pos:
-            return self._is_position_under_attack(king_pos, color)
-        return False
+        us = COLOR_INDEX[color]
+        king_sq = self.king_squares[us]
+        return king_sq is not None and self.attackers_to(king_sq, 1 - us) != 0
 
 
     def find_king(self, color):
         """Find the king of the specified color on the board."""
-        for y in range(8):
-            for x in range(8):
-                piece = self.get_piece(x, y)
-                if isinstance(piece, King) and piece.color == color:
-                    return (x, y)
+        king_sq = self.king_squares[COLOR_INDEX[color]]
+        if king_sq is not None:
+            return square_coords(king_sq)
         raise ValueError(f"No king found for color {color}")
 
     def _is_position_under_attack(self, pos, color):
         x, y = pos
-        opponent_color = 'white' if color == 'black' else 'black'
-        for j in range(8):
-            for i in range(8):
-                piece = self.get_piece(i, j)
-                if piece and piece.color == opponent_color:
-                    # Pass False to avoid checking castling moves during attack checks
-                    if (x, y) in piece.get_legal_moves(i, j, self, check_castling=False):
-                        return True
-        return False
+        return self.is_square_attacked(x, y, 'white' if color == 'black' else 'black')
+
+    def is_square_attacked(self, x, y, by_color):
+        """Check whether any piece of by_color attacks (x, y).
+
+        Looks outward from the target square instead of generating the attacker's moves:
+        the knight, pawn and king tables are intersected with the matching enemy pieces,
+        and slider rays are only walked (up to their first blocker) when enemy sliders exist.
+        """
+        return self.attackers_to(square(x, y), COLOR_INDEX[by_color]) != 0
+
+    def attackers_to(self, sq, by, occupied=None):
+        """Return a bitboard of the pieces of color index `by` that attack square sq."""
+        if METRICS.enabled:
+            METRICS.incr('attack_checks')
+        pieces = self.pieces[by]
+        attackers = ((KNIGHT_ATTACKS[sq] & pieces[KNIGHT])
+                     | (PAWN_ATTACKS[1 - by][sq] & pieces[PAWN])
+                     | (KING_ATTACKS[sq] & pieces[KING]))
+        if occupied is None:
+            occupied = self.occupancy[0] | self.occupancy[1]
+        straight = pieces[ROOK] | pieces[QUEEN]
+        if straight:
+            attackers |= rook_attacks(sq, occupied) & straight
+        diagonal = pieces[BISHOP] | pieces[QUEEN]
+        if diagonal:
+            attackers |= bishop_attacks(sq, occupied) & diagonal
+        return attackers
 
     
     def pos_to_index(self, pos):
@@ -225,7 +470,8 @@ class Board:
         return 0 <= x < 8 and 0 <= y < 8
 
     def get_all_pieces(self, color):
-        return [self.board[i][j] for i in range(8) for j in range(8) if self.board[i][j] and self.board[i][j].color == color]
+        board = self.board
+        return [board[sq >> 3][sq & 7] for sq in iter_squares(self.occupancy[COLOR_INDEX[color]])]
 
 
 
@@ -235,14 +481,8 @@ class Board:
         if not piece:
             return False
 
-        # Assume a theoretical maximum board movement range for simplicity
-        for dx in range(-8, 9):
-            for dy in range(-8, 9):
-                nx, ny = x + dx, y + dy
-                if 0 <= nx < 8 and 0 <= ny < 8:  # Check bounds
-                    if self.is_legal_move((x, y), (nx, ny), piece.color):
-                        return True
-        return False
+        start = square(x, y)
+        return any(move.start == start for move in self.legal_moves(piece.color))
     
     def get_board_state(self):
         """Retrieve the current state of the chess board."""
@@ -261,21 +501,12 @@ class Board:
         return state
     
     def is_square_under_attack(self, x, y, color):
-        # Assuming 'opposite_color' is a function or a way to get the opposite color
+        """Check if (x, y) is attacked by the opponent of the given color."""
         opposite_color = 'white' if color == 'black' else 'black'
-        opponent_pieces = self.get_all_pieces(opposite_color)  # This should retrieve all pieces of the opponent
-        
-        for piece in opponent_pieces:
-            if (x, y) in piece.get_legal_moves(piece.position_x, piece.position_y, self):
-                return True
-        
-        return False
+        return self.is_square_attacked(x, y, opposite_color)
 
-    def perform_castling_if_possible(self, king, start_x, start_y, end_y):
+    def perform_castling_if_possible(self, king, start_x, start_y, end_x):
         """Check and perform castling move if conditions are met."""
-        direction = 1 if end_y > start_y else -1
-        rook_pos_y = end_y + direction  # Adjusted rook position
-        if self.can_castle(king, start_x, start_y, rook_pos_y):
-            self.execute_castling(king, start_x, start_y, rook_pos_y)
-            return True
+        if self.can_castle(king, start_x, start_y, end_x):
+            return self.perform_castling(king, start_x, start_y, end_x)
         return False
@@ -0,0 +1,114 @@
+"""
+This module reads and writes positions in Forsyth-Edwards Notation (FEN).
+"""
+from board.bitboard import (
+    BLACK_KINGSIDE, BLACK_QUEENSIDE, WHITE_KINGSIDE, WHITE_QUEENSIDE, square
+)
+from board.model.bishop import Bishop
+from board.model.king import King
+from board.model.knight import Knight
+from board.model.pawn import Pawn
+from board.model.queen import Queen
+from board.model.rook import Rook
+from board.movegen import square_name
+
+STARTING_FEN = 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'
+
+FEN_PIECES = {'p': Pawn, 'n': Knight, 'b': Bishop, 'r': Rook, 'q': Queen, 'k': King}
+FEN_LETTERS = {piece_type: letter for letter, piece_type in FEN_PIECES.items()}
+FEN_CASTLING = {'K': WHITE_KINGSIDE, 'Q': WHITE_QUEENSIDE, 'k': BLACK_KINGSIDE, 'q': BLACK_QUEENSIDE}
+
+
+def parse_fen(fen):
+    """
+    Split a FEN string into its parts.
+
+    Args:
+        fen (str): The FEN string. The clock fields may be omitted.
+
+    Returns:
+        tuple: (placements, turn, castling_rights, en_passant, halfmove, fullmove), where
+        placements is a list of (piece_type, color, x, y) and en_passant is a square index
+        or None.
+
+    Raises:
+        ValueError: If the string is not a well-formed FEN, has a pawn on the first or last
+            rank, or has a negative or non-numeric move counter.
+    """
+    if not isinstance(fen, str):
+        raise ValueError(f"FEN must be a string, not {type(fen).__name__}")
+    fields = fen.split()
+    if len(fields) < 4:
+        raise ValueError(f"Invalid FEN: {fen!r}")
+    rows = fields[0].split('/')
+    if len(rows) != 8:
+        raise ValueError(f"Invalid FEN piece placement: {fields[0]!r}")
+
+    placements = []
+    for rank, row in enumerate(rows):
+        y = 7 - rank
+        x = 0
+        for char in row:
+            if char.isdigit():
+                x += int(char)
+            elif char.lower() in FEN_PIECES:
+                if x > 7:
+                    raise ValueError(f"Invalid FEN row: {row!r}")
+                if char in 'pP' and y in (0, 7):
+                    raise ValueError(f"Invalid FEN: pawn on rank {y + 1}: {fields[0]!r}")
+                placements.append((FEN_PIECES[char.lower()], 'white' if char.isupper() else 'black', x, y))
+                x += 1
+            else:
+                raise ValueError(f"Invalid FEN piece: {char!r}")
+        if x != 8:
+            raise ValueError(f"Invalid FEN row: {row!r}")
+
+    if fields[1] not in ('w', 'b'):
+        raise ValueError(f"Invalid FEN side to move: {fields[1]!r}")
+    turn = 'white' if fields[1] == 'w' else 'black'
+
+    castling_rights = 0
+    if fields[2] != '-':
+        for char in fields[2]:
+            if char not in FEN_CASTLING:
+                raise ValueError(f"Invalid FEN castling rights: {fields[2]!r}")
+            castling_rights |= FEN_CASTLING[char]
+
+    en_passant = None
+    if fields[3] != '-':
+        ep = fields[3]
+        if len(ep) != 2 or ep[0] not in 'abcdefgh' or ep[1] not in '36':
+            raise ValueError(f"Invalid FEN en-passant square: {ep!r}")
+        en_passant = square(ord(ep[0]) - ord('a'), int(ep[1]) - 1)
+
+    counters = fields[4:6]
+    if len(fields) > 6 or not all(counter.isdigit() and counter.isascii() for counter in counters):
+        raise ValueError(f"Invalid FEN move counters: {fen!r}")
+    halfmove = int(counters[0]) if counters else 0
+    fullmove = int(counters[1]) if len(counters) > 1 else 1
+    if fullmove < 1:
+        raise ValueError(f"Invalid FEN fullmove number: {fen!r}")
+
+    return placements, turn, castling_rights, en_passant, halfmove, fullmove
+
+
+def board_to_fen(board):
+    """Return the FEN string describing a board's position."""
+    rows = []
+    for y in range(7, -1, -1):
+        row, empty = '', 0
+        for piece in board.board[y]:
+            if piece is None:
+                empty += 1
+                continue
+            if empty:
+                row += str(empty)
+                empty = 0
+            letter = FEN_LETTERS[type(piece)]
+            row += letter.upper() if piece.color == 'white' else letter
+        rows.append(row + (str(empty) if empty else ''))
+
+    castling = ''.join(char for char, right in FEN_CASTLING.items() if board.castling_rights & right)
+    en_passant = square_name(board.en_passant) if board.en_passant is not None else '-'
+    return (f"{'/'.join(rows)} {'w' if board.turn == 'white' else 'b'} {castling or '-'} {en_passant} "
+            f"{board.no_capture_or_pawn_move_count} {board.fullmove_number}")
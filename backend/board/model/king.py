@@ -1,33 +1,33 @@
 # king.py
 from board.model.rook import Rook
 from board.piece import Piece
+from board.tables import KING_TARGETS
 
 class King(Piece):
-    def __init__(self, color, x, y):
-        super().__init__(color)
-        self.position_x = x
-        self.position_y = y
+    __slots__ = ()
 
     def get_legal_moves(self, x, y, board, check_castling=True):
-        moves = super().get_legal_moves(x, y, board) or []
-        if check_castling and not self.has_moved:
+        moves = self._reachable(KING_TARGETS[y * 8 + x], board)
+        if check_castling and not board.has_moved(x, y):
             moves.extend(self.get_castling_moves(x, y, board))
         return moves
 
     def get_castling_moves(self, x, y, board):
         castling_moves = []
+        # Castling rights: kingside bit, then queenside bit, for this color
+        rights = (board.castling_rights >> (0 if self.color == 'white' else 2)) & 3
         # Check for castling rights, ensuring the path is clear and not in check
-        if not board.is_king_in_check(self.color) and not self.has_moved:  # Use the correctly named method
-            # Kingside castling
-            if isinstance(board.get_piece(x, y + 3), Rook) and not board.get_piece(x, y + 3).has_moved:
-                if all(board.is_empty(x, y + i) for i in range(1, 3)) and not any(board.is_square_under_attack(x, y + i, self.color) for i in range(1, 3)):
-                    castling_moves.append((x, y + 2))
-            # Queenside castling
-            if isinstance(board.get_piece(x, y - 4), Rook) and not board.get_piece(x, y - 4).has_moved:
-                if all(board.is_empty(x, y - i) for i in range(1, 4)) and not any(board.is_square_under_attack(x, y - i, self.color) for i in range(1, 3)):
-                    castling_moves.append((x, y - 2))
+        if rights and not board.is_king_in_check(self.color) and not board.has_moved(x, y):  # Use the correctly named method
+            # Kingside castling: the king moves two files towards the h-rook
+            if rights & 1 and isinstance(board.get_piece(x + 3, y), Rook):
+                if all(board.is_empty(x + i, y) for i in range(1, 3)) and not any(board.is_square_under_attack(x + i, y, self.color) for i in range(1, 3)):
+                    castling_moves.append((x + 2, y))
+            # Queenside castling: the king moves two files towards the a-rook
+            if rights & 2 and isinstance(board.get_piece(x - 4, y), Rook):
+                if all(board.is_empty(x - i, y) for i in range(1, 4)) and not any(board.is_square_under_attack(x - i, y, self.color) for i in range(1, 3)):
+                    castling_moves.append((x - 2, y))
         return castling_moves
 
     def is_valid_move(self, start_x, start_y, end_x, end_y, board):
         legal_moves = self.get_legal_moves(start_x, start_y, board)
-        return (end_x, end_y) in legal_moves
\ No newline at end of file
+        return (end_x, end_y) in legal_moves
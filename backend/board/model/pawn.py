@@ -1,14 +1,9 @@
+from board.bitboard import COLOR_INDEX
 from board.piece import Piece
+from board.tables import PAWN_CAPTURES
 
 class Pawn(Piece):
-    def __init__(self, color, x, y):
-        super().__init__(color)
-        self.position_x = x
-        self.position_y = y
-
-    def move(self, x, y):
-        self.position_x = x
-        self.position_y = y
+    __slots__ = ()
 
     def get_legal_moves(self, x, y, board, **kwargs):  # Accept additional keyword arguments
         moves = []
@@ -20,9 +15,15 @@ class Pawn(Piece):
             if y == start_row and board.is_empty(x, y + 2 * direction):
                 moves.append((x, y + 2 * direction))
         # Capture moves
-        for dx in [-1, 1]:
-            if board.is_opponent_piece(x + dx, y + direction, self.color):
-                moves.append((x + dx, y + direction))
+        grid = board.board
+        for nx, ny in PAWN_CAPTURES[COLOR_INDEX[self.color]][y * 8 + x]:
+            target = grid[ny][nx]
+            if target is not None and target.color != self.color:
+                moves.append((nx, ny))
+        # En passant capture onto the square the enemy pawn skipped
+        ep = board.en_passant
+        if ep is not None and (ep >> 3) == y + direction and abs((ep & 7) - x) == 1:
+            moves.append((ep & 7, ep >> 3))
         return moves
 
     def is_valid_move(self, start_x, start_y, end_x, end_y, board):
@@ -0,0 +1,220 @@
+"""
+This module generates strictly legal moves for a Board from its bitboards.
+
+Instead of trying every pseudo-move and testing whether the king is left in check, the
+generator computes the checking pieces, the check-evasion mask and the pinned pieces
+(with the line each one is pinned along) once per call, and masks every piece's targets
+with them. Only king moves need an attack test per target square.
+"""
+from collections import namedtuple
+
+from board.bitboard import (
+    BETWEEN, FULL, KING_ATTACKS, KNIGHT_ATTACKS, LINE, PAWN_ATTACKS, BISHOP, KNIGHT, PAWN,
+    QUEEN, ROOK, bishop_attacks, iter_squares, lsb, rook_attacks, square_coords
+)
+
+PROMOTION_KINDS = (QUEEN, ROOK, BISHOP, KNIGHT)
+PROMOTION_LETTERS = {QUEEN: 'q', ROOK: 'r', BISHOP: 'b', KNIGHT: 'n'}
+LETTER_PROMOTIONS = {letter: kind for kind, letter in PROMOTION_LETTERS.items()}
+
+RANK_1 = 0xFF
+RANK_8 = RANK_1 << 56
+
+
+class Move(namedtuple('Move', 'start end promotion', defaults=(None,))):
+    """A move between two square indices, with the promotion piece kind if any."""
+    __slots__ = ()
+
+    @property
+    def start_pos(self):
+        """The starting square in algebraic notation, e.g. 'e2'."""
+        return square_name(self.start)
+
+    @property
+    def end_pos(self):
+        """The destination square in algebraic notation, e.g. 'e4'."""
+        return square_name(self.end)
+
+    def uci(self):
+        """Return the move in UCI notation, e.g. 'e2e4' or 'e7e8q'."""
+        suffix = PROMOTION_LETTERS[self.promotion] if self.promotion is not None else ''
+        return square_name(self.start) + square_name(self.end) + suffix
+
+    def __str__(self):
+        return self.uci()
+
+
+def square_name(sq):
+    """Return the algebraic name of a square index."""
+    x, y = square_coords(sq)
+    return 'abcdefgh'[x] + str(y + 1)
+
+
+def parse_square(name):
+    """Return the square index of an algebraic square name, raising ValueError if malformed."""
+    if len(name) != 2 or name[0] not in 'abcdefgh' or name[1] not in '12345678':
+        raise ValueError(f"Invalid square: {name!r}")
+    return (ord(name[1]) - ord('1')) * 8 + ord(name[0]) - ord('a')
+
+
+def parse_uci(text):
+    """
+    Return the Move written in UCI notation, e.g. 'e2e4' or 'e7e8q'. Legality is not checked.
+
+    Raises:
+        ValueError: If the text is not a UCI move.
+    """
+    if len(text) not in (4, 5) or len(text) == 5 and text[4] not in LETTER_PROMOTIONS:
+        raise ValueError(f"Invalid UCI move: {text!r}")
+    return Move(parse_square(text[:2]), parse_square(text[2:4]), LETTER_PROMOTIONS.get(text[4:]))
+
+
+
+def pack_move(move):
+    """
+    Pack a Move into 16 bits: start square (bits 0-5), end square (6-11) and promotion
+    kind (12-14, 0 for none, as a pawn is never a promotion). The move store and the
+    transposition table both use this layout, and the opening book builds Polyglot's on it.
+    """
+    return move.start | move.end << 6 | (move.promotion or 0) << 12
+
+
+def unpack_move(code):
+    """Return the Move packed by pack_move."""
+    return Move(code & 63, code >> 6 & 63, code >> 12 & 7 or None)
+
+def generate_legal_moves(board, us):
+    """Return every legal move for the side with color index `us`."""
+    them = 1 - us
+    own_pieces = board.pieces[us]
+    own = board.occupancy[us]
+    enemy = board.occupancy[them]
+    occupied = own | enemy
+    moves = []
+
+    king_sq = board.king_squares[us]
+    if king_sq is None:
+        return moves
+    king_bb = 1 << king_sq
+
+    # King moves: test each target with the king lifted off the board, so squares further
+    # along a checking slider's line are correctly seen as attacked.
+    without_king = occupied ^ king_bb
+    for target in iter_squares(KING_ATTACKS[king_sq] & ~own):
+        if not board.attackers_to(target, them, without_king):
+            moves.append(Move(king_sq, target))
+
+    checkers = board.attackers_to(king_sq, them, occupied)
+    if checkers & (checkers - 1):
+        return moves  # Double check: only the king may move
+    if checkers:
+        check_mask = checkers | BETWEEN[king_sq][lsb(checkers)]
+    else:
+        check_mask = FULL
+        _generate_castling(board, us, king_sq, occupied, moves)
+
+    pin_lines = _pin_lines(board, us, king_sq, occupied)
+    targets_mask = ~own & check_mask
+
+    for kind, attacks in ((KNIGHT, None), (BISHOP, bishop_attacks), (ROOK, rook_attacks)):
+        for sq in iter_squares(own_pieces[kind]):
+            if kind == KNIGHT:
+                if sq in pin_lines:
+                    continue  # A pinned knight can never move
+                targets = KNIGHT_ATTACKS[sq] & targets_mask
+            else:
+                targets = attacks(sq, occupied) & targets_mask
+                if sq in pin_lines:
+                    targets &= pin_lines[sq]
+            for target in iter_squares(targets):
+                moves.append(Move(sq, target))
+
+    for sq in iter_squares(own_pieces[QUEEN]):
+        targets = (rook_attacks(sq, occupied) | bishop_attacks(sq, occupied)) & targets_mask
+        if sq in pin_lines:
+            targets &= pin_lines[sq]
+        for target in iter_squares(targets):
+            moves.append(Move(sq, target))
+
+    _generate_pawn_moves(us, own_pieces[PAWN], enemy, occupied, check_mask, pin_lines, moves)
+    if board.en_passant is not None:
+        _generate_en_passant(board, us, king_sq, occupied, moves)
+    return moves
+
+
+def _pin_lines(board, us, king_sq, occupied):
+    """Map each pinned piece's square to the line it may still move along."""
+    them = 1 - us
+    enemy_pieces = board.pieces[them]
+    snipers = ((rook_attacks(king_sq, 0) & (enemy_pieces[ROOK] | enemy_pieces[QUEEN]))
+               | (bishop_attacks(king_sq, 0) & (enemy_pieces[BISHOP] | enemy_pieces[QUEEN])))
+    pins = {}
+    for sniper in iter_squares(snipers):
+        blockers = BETWEEN[king_sq][sniper] & occupied
+        if blockers and not blockers & (blockers - 1) and blockers & board.occupancy[us]:
+            pins[lsb(blockers)] = LINE[king_sq][sniper]
+    return pins
+
+
+def _generate_pawn_moves(us, pawns, enemy, occupied, check_mask, pin_lines, moves):
+    forward = 8 if us == 0 else -8
+    start_rank = 1 if us == 0 else 6
+    last_rank = RANK_8 if us == 0 else RANK_1
+    for sq in iter_squares(pawns):
+        allowed = check_mask & pin_lines.get(sq, FULL)
+        targets = PAWN_ATTACKS[us][sq] & enemy
+        one = sq + forward
+        if not (occupied >> one) & 1:
+            targets |= 1 << one
+            two = one + forward
+            if (sq >> 3) == start_rank and not (occupied >> two) & 1:
+                targets |= 1 << two
+        for target in iter_squares(targets & allowed):
+            if (1 << target) & last_rank:
+                for kind in PROMOTION_KINDS:
+                    moves.append(Move(sq, target, kind))
+            else:
+                moves.append(Move(sq, target))
+
+
+def _generate_en_passant(board, us, king_sq, occupied, moves):
+    """Append en-passant captures.
+
+    Capturing en passant removes two pieces from one rank, which the pin lines cannot
+    describe, so each candidate is verified directly against the resulting occupancy.
+    """
+    them = 1 - us
+    target = board.en_passant
+    victim = target - 8 if us == 0 else target + 8
+    for sq in iter_squares(PAWN_ATTACKS[them][target] & board.pieces[us][PAWN]):
+        after = occupied ^ (1 << sq) ^ (1 << victim) ^ (1 << target)
+        if not board.attackers_to(king_sq, them, after) & ~(1 << victim):
+            moves.append(Move(sq, target))
+
+
+def _generate_castling(board, us, king_sq, occupied, moves):
+    """Append castling moves; the caller guarantees the king is not in check."""
+    rights = (board.castling_rights >> (2 * us)) & 3  # Kingside bit, then queenside bit
+    if not rights:
+        return
+    home = 0 if us == 0 else 56
+    them = 1 - us
+    # (right, squares that must be empty, squares the king passes through)
+    for right, empty, transit in ((1, (home + 5, home + 6), (home + 5, home + 6)),
+                                  (2, (home + 1, home + 2, home + 3), (home + 3, home + 2))):
+        if not rights & right:
+            continue
+        if any((occupied >> sq) & 1 for sq in empty):
+            continue
+        if any(board.attackers_to(sq, them, occupied) for sq in transit):
+            continue
+        moves.append(Move(king_sq, transit[1]))
+
+
+def move_between(moves, start, end, promotion=None):
+    """Return the move in `moves` from start to end (square indices), or None."""
+    for move in moves:
+        if move.start == start and move.end == end and (move.promotion == promotion
+                                                        or promotion is None and move.promotion == QUEEN):
+            return move
+    return None
@@ -0,0 +1,79 @@
+"""
+This module packs a position into a compact binary form, at most 29 bytes:
+
+    8 bytes   occupancy bitboard (big-endian)
+    N bytes   one 4-bit piece code per occupied square in ascending square order,
+              two per byte, high nibble first (N = ceil(pieces / 2), at most 16)
+    2 bytes   state: bit 0 black to move, bits 1-4 castling rights,
+              bit 5 en passant available, bits 6-8 en-passant file
+    1 byte    halfmove clock (capped at 255)
+    2 bytes   fullmove number (capped at 65535)
+
+Piece codes are ``color * 6 + kind`` using the bitboard color and kind indices. Equal
+positions always pack to equal bytes, so the encoding doubles as a storage or cache key.
+"""
+import struct
+
+from board.bitboard import COLOR_INDEX, iter_squares, popcount
+from board.movegen import square_name
+
+_TAIL = struct.Struct('>HBH')
+_LETTERS = 'PNBRQKpnbrqk'  # FEN letter for each piece code
+
+
+def pack_board(board):
+    """Return the packed bytes for a board's position."""
+    occupied = board.occupancy[0] | board.occupancy[1]
+    codes = []
+    for sq in iter_squares(occupied):
+        for color in range(2):
+            for kind, bb in enumerate(board.pieces[color]):
+                if (bb >> sq) & 1:
+                    codes.append(color * 6 + kind)
+    if len(codes) % 2:
+        codes.append(0)
+    pieces = bytes((codes[i] << 4) | codes[i + 1] for i in range(0, len(codes), 2))
+
+    state = COLOR_INDEX[board.turn] | (board.castling_rights << 1)
+    if board.en_passant is not None:
+        state |= 1 << 5 | (board.en_passant & 7) << 6
+    tail = _TAIL.pack(state, min(board.no_capture_or_pawn_move_count, 255), min(board.fullmove_number, 0xFFFF))
+    return occupied.to_bytes(8, 'big') + pieces + tail
+
+
+def unpack_fen(data):
+    """Return the FEN string for packed position bytes, raising ValueError if malformed."""
+    if len(data) < 8 + _TAIL.size:
+        raise ValueError("Packed position is too short")
+    occupied = int.from_bytes(data[:8], 'big')
+    count = popcount(occupied)
+    body_end = 8 + (count + 1) // 2
+    if len(data) != body_end + _TAIL.size:
+        raise ValueError("Packed position has the wrong length")
+
+    grid = [[None] * 8 for _ in range(8)]
+    for index, sq in enumerate(iter_squares(occupied)):
+        byte = data[8 + index // 2]
+        code = byte >> 4 if index % 2 == 0 else byte & 0xF
+        if code >= 12:
+            raise ValueError(f"Invalid piece code {code}")
+        grid[sq >> 3][sq & 7] = _LETTERS[code]
+    state, halfmove, fullmove = _TAIL.unpack(data[body_end:])
+
+    rows = []
+    for y in range(7, -1, -1):
+        row, empty = '', 0
+        for letter in grid[y]:
+            if letter is None:
+                empty += 1
+            else:
+                row += (str(empty) if empty else '') + letter
+                empty = 0
+        rows.append(row + (str(empty) if empty else ''))
+    turn = 'b' if state & 1 else 'w'
+    castling = ''.join(char for bit_index, char in enumerate('KQkq') if state >> (1 + bit_index) & 1) or '-'
+    en_passant = '-'
+    if state & (1 << 5):
+        en_passant = square_name(((state >> 6) & 7) + (40 if turn == 'w' else 16))
+    return f"{'/'.join(rows)} {turn} {castling} {en_passant} {halfmove} {fullmove}"
+
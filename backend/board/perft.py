@@ -0,0 +1,181 @@
+"""
+This module is the move-generation benchmark and regression harness.
+
+perft counts the leaf nodes of the legal move tree to a fixed depth. Comparing the counts
+with published reference values for well-known positions catches move-generation bugs
+(castling, en passant, promotion, pins, checks), and nodes per second measures speed.
+Run it from the backend directory:
+
+    python -m board.perft                                  # reference suite to depth 3
+    python -m board.perft --max-depth 4                    # deeper suite run
+    python -m board.perft --fen "<FEN>" --depth 4 --divide
+    python -m board.perft --pieces                         # also cross-check Piece.get_legal_moves
+"""
+import argparse
+import sys
+import time
+
+from board.bitboard import COLOR_INDEX, PAWN, QUEEN, iter_squares, square
+from board.board import Board, PIECE_KINDS
+from board.fen import STARTING_FEN
+from board.movegen import Move
+
+# (name, FEN, node counts for depth 1, 2, 3, ...)
+REFERENCE_POSITIONS = (
+    ('start', STARTING_FEN,
+     (20, 400, 8902, 197281, 4865609)),
+    ('kiwipete', 'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1',
+     (48, 2039, 97862, 4085603)),
+    ('position3', '8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1',
+     (14, 191, 2812, 43238, 674624)),
+    ('position4', 'r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1',
+     (6, 264, 9467, 422333)),
+    ('position5', 'rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8',
+     (44, 1486, 62379, 2103487)),
+    ('position6', 'r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10',
+     (46, 2079, 89890, 3894594)),
+)
+
+
+def perft(board, depth):
+    """Count the leaf nodes `depth` plies below the board's position."""
+    if depth == 0:
+        return 1
+    moves = board.generate_legal_moves(board.turn)
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for move in moves:
+        board.make_move(move)
+        nodes += perft(board, depth - 1)
+        board.unmake_move()
+    return nodes
+
+
+def divide(board, depth):
+    """Return a dict mapping each root move (UCI) to its perft count at depth - 1."""
+    counts = {}
+    for move in board.generate_legal_moves(board.turn):
+        board.make_move(move)
+        counts[move.uci()] = perft(board, depth - 1)
+        board.unmake_move()
+    return counts
+
+
+def piece_move_mismatches(board):
+    """
+    Compare the generator's moves for the side to move with each Piece.get_legal_moves.
+
+    Piece moves are pseudo-legal, so each one is made and kept only if it does not leave
+    the king in check. Returns a list of human-readable differences (empty when they agree).
+    """
+    color = board.turn
+    expected = {(move.start, move.end) for move in board.generate_legal_moves(color)}
+    found = set()
+    last_rank = 7 if color == 'white' else 0
+    for sq in iter_squares(board.occupancy[COLOR_INDEX[color]]):
+        x, y = sq & 7, sq >> 3
+        piece = board.get_piece(x, y)
+        is_pawn = PIECE_KINDS[type(piece)] == PAWN
+        for nx, ny in piece.get_legal_moves(x, y, board):
+            target = square(nx, ny)
+            board.make_move(Move(sq, target, QUEEN if is_pawn and ny == last_rank else None))
+            if not board.is_king_in_check(color):
+                found.add((sq, target))
+            board.unmake_move()
+
+    def describe(pairs):
+        return ', '.join(sorted(Move(start, end).uci() for start, end in pairs))
+
+    mismatches = []
+    if found - expected:
+        mismatches.append(f"pieces allow illegal moves: {describe(found - expected)}")
+    if expected - found:
+        mismatches.append(f"pieces miss legal moves: {describe(expected - found)}")
+    return mismatches
+
+
+def verify_piece_moves(board, depth, limit=10):
+    """Run piece_move_mismatches on every node down to depth; return up to `limit` reports."""
+    reports = []
+
+    def walk(remaining):
+        if len(reports) >= limit:
+            return
+        for mismatch in piece_move_mismatches(board):
+            reports.append(f"{' '.join(m.uci() for m in board.move_stack) or '(root)'}: {mismatch}")
+        if remaining > 0:
+            for move in board.generate_legal_moves(board.turn):
+                board.make_move(move)
+                walk(remaining - 1)
+                board.unmake_move()
+
+    walk(depth)
+    return reports[:limit]
+
+
+def timed_perft(board, depth):
+    """Return (nodes, seconds) for a perft run."""
+    start = time.perf_counter()
+    nodes = perft(board, depth)
+    return nodes, time.perf_counter() - start
+
+
+def run_suite(max_depth=3, check_pieces=False, out=print):
+    """Run perft on every reference position up to max_depth; return the number of failures."""
+    failures = 0
+    total_nodes, total_time = 0, 0.0
+    for name, fen, counts in REFERENCE_POSITIONS:
+        board = Board.from_fen(fen)
+        for depth in range(1, min(max_depth, len(counts)) + 1):
+            nodes, elapsed = timed_perft(board, depth)
+            total_nodes += nodes
+            total_time += elapsed
+            ok = nodes == counts[depth - 1]
+            failures += not ok
+            out(f"{name:<10} depth {depth}  nodes {nodes:>9}  expected {counts[depth - 1]:>9}  "
+                f"{elapsed:7.2f}s  {nodes / max(elapsed, 1e-9):>9.0f} nps  {'ok' if ok else 'FAIL'}")
+        if check_pieces:
+            for report in verify_piece_moves(board, depth=1):
+                failures += 1
+                out(f"{name:<10} piece moves: {report}")
+    out(f"total nodes {total_nodes}  {total_time:.2f}s  {total_nodes / max(total_time, 1e-9):.0f} nps  "
+        f"{failures} failure(s)")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Count move-generation leaf nodes (perft).')
+    parser.add_argument('--fen', help='position to search; runs the reference suite when omitted')
+    parser.add_argument('--depth', type=int, default=3, help='depth for --fen (default 3)')
+    parser.add_argument('--divide', action='store_true', help='show per-root-move counts for --fen')
+    parser.add_argument('--max-depth', type=int, default=3, help='deepest suite depth (default 3)')
+    parser.add_argument('--pieces', action='store_true',
+                        help='also cross-check Piece.get_legal_moves against the generator')
+    args = parser.parse_args(argv)
+
+    if args.fen is None:
+        return 1 if run_suite(args.max_depth, args.pieces) else 0
+
+    board = Board.from_fen(args.fen)
+    if args.divide:
+        start = time.perf_counter()
+        counts = divide(board, args.depth)
+        elapsed = time.perf_counter() - start
+        for move in sorted(counts):
+            print(f"{move}: {counts[move]}")
+        nodes = sum(counts.values())
+        print(f"moves {len(counts)}")
+    else:
+        nodes, elapsed = timed_perft(board, args.depth)
+    print(f"nodes {nodes}  {elapsed:.2f}s  {nodes / max(elapsed, 1e-9):.0f} nps")
+    if args.pieces:
+        reports = verify_piece_moves(board, depth=1)
+        for report in reports:
+            print(f"piece moves: {report}")
+        return 1 if reports else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
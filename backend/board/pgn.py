@@ -0,0 +1,402 @@
+"""
+This module reads and writes games in Portable Game Notation (PGN).
+
+Archives are memory-mapped and scanned one game at a time, so reading is lazy and uses
+constant memory however large the file is:
+
+    for game in iter_games('archive.pgn'):
+        for board, move, san in replay(game):
+            ...
+
+Moves are given in Standard Algebraic Notation (SAN), resolved against the Board's legal
+moves. map_games splits an archive at game boundaries and processes the parts in worker
+processes; `python -m board.pgn archive.pgn` replays a whole archive and reports the rate.
+"""
+import argparse
+import mmap
+import multiprocessing
+import os
+import re
+import time
+from collections import namedtuple, deque
+from concurrent.futures import ProcessPoolExecutor
+
+from board.bitboard import BISHOP, COLOR_INDEX, KING, KNIGHT, PAWN, QUEEN, ROOK
+from board.board import Board
+from board.fen import STARTING_FEN
+from board.movegen import move_between, parse_uci, square_name
+
+SAN_PIECES = {'N': KNIGHT, 'B': BISHOP, 'R': ROOK, 'Q': QUEEN, 'K': KING}
+SAN_LETTERS = {kind: letter for letter, kind in SAN_PIECES.items()}
+RESULTS = ('1-0', '0-1', '1/2-1/2', '*')
+SEVEN_TAG_ROSTER = ('Event', 'Site', 'Date', 'Round', 'White', 'Black', 'Result')
+
+_SAN = re.compile(r'([NBRQK])?([a-h])?([1-8])?x?([a-h][1-8])(?:=?([NBRQ]))?$')
+_TAG = re.compile(rb'\[\s*(\w+)\s+"((?:[^"\\]|\\.)*)"\s*\]')
+_TOKEN = re.compile(r'\{[^}]*\}|;[^\n]*|\$\d+|[()]|1-0|0-1|1/2-1/2|\*|\d+\.+|[^\s(){};$.]+')
+
+PgnGame = namedtuple('PgnGame', 'headers moves result')
+PgnGame.__doc__ = "A game read from PGN: its tag pairs, its mainline SAN moves and its result."
+
+_CHUNK_BYTES = 4 * 1024 * 1024  # Size of the parts an archive is split into for map_games
+
+
+def _kind_at(board, us, sq):
+    pieces = board.pieces[us]
+    for kind in range(6):
+        if (pieces[kind] >> sq) & 1:
+            return kind
+    return None
+
+
+def parse_san(board, san, moves=None):
+    """
+    Return the legal Move a SAN string describes in the board's position.
+
+    Args:
+        board (Board): The position, with the mover to move.
+        san (str): The move, e.g. 'e4', 'Nbd7', 'exd8=Q+' or 'O-O'.
+        moves (list): The side to move's legal moves, if already generated.
+
+    Raises:
+        ValueError: If the move is malformed, illegal or ambiguous.
+    """
+    us = COLOR_INDEX[board.turn]
+    if moves is None:
+        moves = board.generate_legal_moves(board.turn)
+    text = san.rstrip('+#!?')
+
+    if text in ('O-O', '0-0', 'O-O-O', '0-0-0'):
+        king_sq = board.king_squares[us]
+        end = king_sq + (2 if len(text) == 3 else -2)
+        for move in moves:
+            if move.start == king_sq and move.end == end:
+                return move
+        raise ValueError(f"Illegal move: {san}")
+
+    match = _SAN.match(text)
+    if match is None:
+        raise ValueError(f"Invalid SAN move: {san!r}")
+    piece, file, rank, target, promotion = match.groups()
+    kind = SAN_PIECES[piece] if piece else PAWN
+    end = ord(target[0]) - ord('a') + 8 * (int(target[1]) - 1)
+    promotion = SAN_PIECES[promotion] if promotion else None
+
+    found = None
+    for move in moves:
+        if move.end != end or _kind_at(board, us, move.start) != kind:
+            continue
+        if file and move.start & 7 != ord(file) - ord('a'):
+            continue
+        if rank and move.start >> 3 != int(rank) - 1:
+            continue
+        if move.promotion != promotion and not (promotion is None and move.promotion == QUEEN):
+            continue
+        if found is not None:
+            raise ValueError(f"Ambiguous move: {san}")
+        found = move
+    if found is None:
+        raise ValueError(f"Illegal move: {san}")
+    return found
+
+
+def move_to_san(board, move):
+    """Return the SAN string for a legal move in the board's position, including check marks."""
+    us = COLOR_INDEX[board.turn]
+    kind = _kind_at(board, us, move.start)
+    capture = (board.occupancy[1 - us] >> move.end) & 1 or (kind == PAWN and move.end == board.en_passant)
+
+    if kind == KING and abs((move.end & 7) - (move.start & 7)) == 2:
+        san = 'O-O' if move.end > move.start else 'O-O-O'
+    elif kind == PAWN:
+        san = (square_name(move.start)[0] + 'x' if capture else '') + square_name(move.end)
+        if move.promotion is not None:
+            san += '=' + SAN_LETTERS[move.promotion]
+    else:
+        rivals = [other.start for other in board.generate_legal_moves(board.turn)
+                  if other.end == move.end and other.start != move.start
+                  and _kind_at(board, us, other.start) == kind]
+        origin = square_name(move.start)
+        if not rivals:
+            disambiguation = ''
+        elif all(sq & 7 != move.start & 7 for sq in rivals):
+            disambiguation = origin[0]
+        elif all(sq >> 3 != move.start >> 3 for sq in rivals):
+            disambiguation = origin[1]
+        else:
+            disambiguation = origin
+        san = SAN_LETTERS[kind] + disambiguation + ('x' if capture else '') + square_name(move.end)
+
+    board.make_move(move)
+    try:
+        if board.is_king_in_check(board.turn):
+            san += '#' if not board.generate_legal_moves(board.turn) else '+'
+    finally:
+        board.unmake_move()
+    return san
+
+
+def parse_movetext(text):
+    """Return (moves, result) from PGN movetext: the mainline SAN moves, skipping move
+    numbers, comments, NAGs and variations, and the result token (None if missing)."""
+    moves = []
+    result = None
+    depth = 0
+    for token in _TOKEN.findall(text):
+        first = token[0]
+        if first == '(':
+            depth += 1
+        elif first == ')':
+            depth = max(depth - 1, 0)
+        elif depth or first in '{;$' or first.isdigit() and token[-1] == '.':
+            continue
+        elif token in RESULTS:
+            result = token
+        else:
+            moves.append(token)
+    return moves, result
+
+
+def _decode(raw):
+    return raw.decode('utf-8', errors='replace')
+
+
+def _is_game_start(data, index):
+    """Check that the '[' at `index` opens a tag line that follows a blank line."""
+    line_start = data.rfind(b'\n', 0, index - 1) + 1
+    return not data[line_start:index].strip()
+
+
+def next_game_start(data, offset):
+    """Return the offset of the first game starting at or after `offset`, or len(data)."""
+    if offset == 0 and data[:1] == b'[':
+        return 0
+    index = data.find(b'\n[', max(offset - 1, 0))
+    while index != -1:
+        if _is_game_start(data, index + 1):
+            return index + 1
+        index = data.find(b'\n[', index + 1)
+    return len(data)
+
+
+def iter_games(data, start=0, end=None):
+    """
+    Yield each game of a PGN archive as a PgnGame, one at a time.
+
+    Args:
+        data: Path of the archive, or a bytes-like object / mmap holding it.
+        start (int): Offset of the first game to read (a game boundary).
+        end (int): Offset at which to stop; games starting before it are read whole.
+    """
+    if isinstance(data, (str, os.PathLike)):
+        with open(data, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                yield from iter_games(mapped, start, end)
+        return
+
+    size = len(data)
+    end = size if end is None else min(end, size)
+    position = start
+    while position < end:
+        # Tag pairs: consecutive lines starting with '['
+        headers = {}
+        while True:
+            while position < size and data[position:position + 1].isspace():
+                position += 1
+            if data[position:position + 1] != b'[':
+                break
+            line_end = data.find(b'\n', position)
+            line_end = size if line_end == -1 else line_end
+            for name, value in _TAG.findall(data[position:line_end]):
+                headers[_decode(name)] = _decode(value).replace('\\"', '"').replace('\\\\', '\\')
+            position = line_end + 1
+        if position >= size and not headers:
+            return
+
+        # Movetext runs to the next game's tag section
+        game_end = next_game_start(data, position)
+        moves, result = parse_movetext(_decode(data[position:game_end]))
+        position = game_end
+        if headers or moves:
+            yield PgnGame(headers, moves, result or headers.get('Result'))
+
+
+def replay(game):
+    """
+    Replay a game, yielding (board, move, san) for each mainline move before it is played.
+
+    The same Board is updated in place between steps, so copy anything needed later.
+
+    Raises:
+        ValueError: If a move is illegal or the FEN tag is invalid.
+    """
+    board = Board.from_fen(game.headers['FEN']) if 'FEN' in game.headers else Board()
+    for san in game.moves:
+        move = parse_san(board, san)
+        yield board, move, san
+        board.make_move(move)
+        board.update_position_history()
+
+
+def apply_moves(board, moves, notation='uci'):
+    """
+    Play a list of moves on a board, stopping at the first one that is not legal.
+
+    Args:
+        board (Board): The position to start from; updated in place.
+        moves (list): Move strings in UCI ('e2e4', 'e7e8q') or SAN ('e4', 'exd8=Q').
+        notation (str): 'uci' or 'san'. A UCI pawn move to the last rank without a
+            promotion letter promotes to a queen, as on /move.
+
+    Returns:
+        tuple: (applied, error): how many moves were played, and None if all of them were,
+        otherwise why moves[applied] was rejected.
+    """
+    if notation not in ('uci', 'san'):
+        raise ValueError("notation must be 'uci' or 'san'")
+    for index, text in enumerate(moves):
+        legal = board.legal_moves()
+        try:
+            if not isinstance(text, str):
+                raise ValueError(f"Moves must be strings, not {text!r}")
+            if notation == 'san':
+                move = parse_san(board, text, legal)
+            else:
+                parsed = parse_uci(text)
+                move = move_between(legal, parsed.start, parsed.end, parsed.promotion)
+                if move is None:
+                    raise ValueError(f"Illegal move: {text}")
+        except ValueError as e:
+            return index, str(e)
+        board.make_move(move)
+        board.update_position_history()
+    return len(moves), None
+
+
+def final_board(game):
+    """Return the Board after all of a game's moves."""
+    board = None
+    for board, _, _ in replay(game):
+        pass
+    if board is None:
+        return Board.from_fen(game.headers['FEN']) if 'FEN' in game.headers else Board()
+    return board
+
+
+def write_game(moves, headers=None, start_fen=None, result=None, width=80):
+    """
+    Return a game as PGN text.
+
+    Args:
+        moves (list): The Move objects played, in order.
+        headers (dict): Tag pairs; the seven-tag roster is filled in with '?' as needed.
+        start_fen (str): The starting position, if not the standard one.
+        result (str): '1-0', '0-1', '1/2-1/2' or '*' (the default, or the Result tag).
+        width (int): Maximum movetext line length.
+    """
+    headers = dict(headers or {})
+    result = result or headers.get('Result') or '*'
+    headers['Result'] = result
+    if start_fen and start_fen != STARTING_FEN:
+        headers['SetUp'], headers['FEN'] = '1', start_fen
+    tags = [(name, headers.get(name, '?')) for name in SEVEN_TAG_ROSTER]
+    tags += [(name, value) for name, value in headers.items() if name not in SEVEN_TAG_ROSTER]
+
+    board = Board.from_fen(start_fen) if start_fen else Board()
+    tokens = []
+    for move in moves:
+        if board.turn == 'white':
+            tokens.append(f"{board.fullmove_number}.")
+        elif not tokens:
+            tokens.append(f"{board.fullmove_number}...")
+        tokens.append(move_to_san(board, move))
+        board.make_move(move)
+    tokens.append(result)
+
+    lines, line = [], ''
+    for token in tokens:
+        if line and len(line) + 1 + len(token) > width:
+            lines.append(line)
+            line = token
+        else:
+            line = f"{line} {token}" if line else token
+    lines.append(line)
+
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"') for _, value in tags)
+    tag_lines = [f'[{name} "{value}"]' for (name, _), value in zip(tags, escaped)]
+    return '\n'.join(tag_lines) + '\n\n' + '\n'.join(lines) + '\n'
+
+
+def split_archive(path, chunk_bytes=_CHUNK_BYTES):
+    """Return (start, end) byte ranges covering an archive, each beginning at a game boundary."""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            size = len(data)
+            bounds = [0]
+            while bounds[-1] < size:
+                bounds.append(next_game_start(data, bounds[-1] + chunk_bytes))
+    return list(zip(bounds, bounds[1:]))
+
+
+def _map_range(path, start, end, fn):
+    return [fn(game) for game in iter_games(path, start, end)]
+
+
+def map_games(path, fn, workers=None, chunk_bytes=_CHUNK_BYTES):
+    """
+    Apply `fn` to every game of an archive in worker processes, yielding results in order.
+
+    The archive is split at game boundaries into parts of about `chunk_bytes`, and only a
+    few parts per worker are in flight at once, so memory stays bounded.
+
+    Args:
+        path (str): The archive.
+        fn (callable): Module-level function taking a PgnGame; it and its results must pickle.
+        workers (int): Worker processes; defaults to the CPU count.
+    """
+    workers = workers or os.cpu_count() or 1
+    ranges = iter(split_archive(path, chunk_bytes))
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+        in_flight = deque()
+        for start, end in ranges:
+            in_flight.append(executor.submit(_map_range, path, start, end, fn))
+            if len(in_flight) >= 2 * workers:
+                yield from in_flight.popleft().result()
+        while in_flight:
+            yield from in_flight.popleft().result()
+
+
+def replay_summary(game):
+    """Replay a game and return (plies, error); used by the command line to time ingestion."""
+    plies = 0
+    try:
+        for _ in replay(game):
+            plies += 1
+    except ValueError as e:
+        return plies, str(e)
+    return plies, None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Replay every game of a PGN archive and report the rate.')
+    parser.add_argument('path')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: CPU count)')
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    games = plies = errors = 0
+    for game_plies, error in map_games(args.path, replay_summary, args.workers):
+        games += 1
+        plies += game_plies
+        errors += error is not None
+    elapsed = time.perf_counter() - started
+    print(f"{games} games  {plies} plies  {errors} error(s)  {elapsed:.2f}s  "
+          f"{games / elapsed * 60 if elapsed else 0:.0f} games/min")
+
+
+if __name__ == '__main__':
+    main()
@@ -5,21 +5,52 @@ for defining legal moves and handling move execution.
 
 from abc import ABC, abstractmethod
 
+from board.tables import RAY_SQUARES
+
 class Piece(ABC):
     """
     An abstract base class representing a generic chess piece. This class provides
-    the structure for defining legal moves and managing piece state.
+    the structure for defining legal moves; pieces themselves are immutable.
     """
     
-    def __init__(self, color):
+    __slots__ = ('color',)
+    _instances = {}  # The shared instance per (piece class, color)
+
+    def __new__(cls, color):
         """
-        Initializes a new Piece with a specified color.
+        Return the single shared piece of this class and color.
+
+        Pieces are flyweights: they hold nothing but their color, while where they stand
+        and whether they have moved are kept by the Board, so one instance per kind and
+        color serves every square of every game.
 
         Args:
             color (str): The color of the chess piece, typically 'white' or 'black'.
         """
-        self.color = color
-        self.has_moved = False
+        piece = Piece._instances.get((cls, color))
+        if piece is None:
+            piece = super().__new__(cls)
+            object.__setattr__(piece, 'color', color)
+            Piece._instances[cls, color] = piece
+        return piece
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} pieces are immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} pieces are immutable")
+
+    def __reduce__(self):
+        return type(self), (self.color,)  # Unpickle to the shared instance
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.color!r})"
 
     @abstractmethod
     def get_legal_moves(self, x, y, board, **kwargs):
@@ -37,6 +68,27 @@ class Piece(ABC):
         """
         return []
 
+    def _reachable(self, targets, board):
+        """Return the squares among the precomputed `targets` that are empty or hold an enemy piece."""
+        grid, color = board.board, self.color
+        return [(nx, ny) for nx, ny in targets if grid[ny][nx] is None or grid[ny][nx].color != color]
+
+    def _slide(self, x, y, board, directions):
+        """Return the squares reachable along the given rays (board.bitboard directions),
+        each up to and including the first piece if it is an enemy one."""
+        grid, color, sq = board.board, self.color, y * 8 + x
+        moves = []
+        for direction in directions:
+            for nx, ny in RAY_SQUARES[direction][sq]:
+                target = grid[ny][nx]
+                if target is None:
+                    moves.append((nx, ny))
+                    continue
+                if target.color != color:
+                    moves.append((nx, ny))
+                break
+        return moves
+
     def move(self, board, start_pos, end_pos):
         """
         Attempt to move the piece from start_pos to end_pos on the board, if it's a legal move.
@@ -50,9 +102,7 @@ class Piece(ABC):
             bool: True if the move was successful, False otherwise.
         """
         if end_pos in self.get_legal_moves(*self.pos_to_index(start_pos), board):
-            board.move_piece(start_pos, end_pos)
-            self.has_moved = True  # Update has_moved on successful move
-            return True
+            return board.move_piece(start_pos, end_pos)
         return False
 
     def pos_to_index(self, pos):
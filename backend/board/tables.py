@@ -0,0 +1,34 @@
+"""
+This module holds the per-square move tables used by the piece classes in board.model.
+With them, generating a piece's moves is a walk over precomputed coordinate tuples, with
+no offset arithmetic or bounds checks per step.
+
+    KNIGHT_TARGETS[sq]          (x, y) of every square a knight on sq reaches
+    KING_TARGETS[sq]            (x, y) of every square a king on sq reaches
+    PAWN_CAPTURES[color][sq]    (x, y) of the squares a pawn of color index `color` on sq
+                                attacks
+    RAY_SQUARES[direction][sq]  (x, y) of the squares from sq to the board edge, nearest
+                                first, for each direction of board.bitboard.DIRECTIONS
+
+They are read off the attack bitboards of board.bitboard, so both move generators share
+one definition of how the pieces move.
+"""
+from board.bitboard import (
+    KING_ATTACKS, KNIGHT_ATTACKS, PAWN_ATTACKS, POSITIVE_DIRECTIONS, RAYS, iter_squares, square_coords
+)
+
+
+def _coordinates(bb, reverse=False):
+    """Return the (x, y) of every square of a bitboard, lowest square first, or highest with reverse."""
+    squares = [square_coords(sq) for sq in iter_squares(bb)]
+    return tuple(reversed(squares) if reverse else squares)
+
+
+KNIGHT_TARGETS = tuple(_coordinates(bb) for bb in KNIGHT_ATTACKS)
+KING_TARGETS = tuple(_coordinates(bb) for bb in KING_ATTACKS)
+PAWN_CAPTURES = tuple(tuple(_coordinates(bb) for bb in table) for table in PAWN_ATTACKS)
+# A ray running towards lower squares meets its nearest square last when read lowest first
+RAY_SQUARES = tuple(
+    tuple(_coordinates(bb, direction not in POSITIVE_DIRECTIONS) for bb in rays)
+    for direction, rays in enumerate(RAYS)
+)
@@ -0,0 +1,39 @@
+"""
+This module holds the Zobrist keys used to hash board positions.
+
+A position's hash is the XOR of one key per (color, piece kind, square) occupied, a key
+for the castling-rights combination, a key for the en-passant file when a capture is
+available, and SIDE_KEY when black is to move. Each of these can be XORed in or out as
+the board changes, so the Board keeps its hash up to date incrementally.
+"""
+import random
+
+from board.bitboard import COLOR_INDEX, iter_squares
+
+_rng = random.Random(0x5EED)  # Fixed seed so hashes are stable across processes and restarts
+
+
+def _key():
+    return _rng.getrandbits(64)
+
+
+# PIECE_KEYS[color][kind][square]
+PIECE_KEYS = tuple(tuple(tuple(_key() for _ in range(64)) for _ in range(6)) for _ in range(2))
+SIDE_KEY = _key()
+CASTLING_KEYS = tuple(_key() for _ in range(16))
+EN_PASSANT_KEYS = tuple(_key() for _ in range(8))
+
+
+def hash_board(board):
+    """Compute a board's hash from scratch; the Board maintains the same value incrementally."""
+    h = 0
+    for color in range(2):
+        for kind, bb in enumerate(board.pieces[color]):
+            for sq in iter_squares(bb):
+                h ^= PIECE_KEYS[color][kind][sq]
+    h ^= CASTLING_KEYS[board.castling_rights]
+    if board.en_passant is not None:
+        h ^= EN_PASSANT_KEYS[board.en_passant & 7]
+    if COLOR_INDEX[board.turn]:
+        h ^= SIDE_KEY
+    return h
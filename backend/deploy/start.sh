@@ -0,0 +1,15 @@
+#!/bin/bash
+# Container entrypoint: the gunicorn web workers and the WebSocket server, side by side on
+# the shared game store (CHESS_STORE), so moves played over HTTP reach the sockets and the
+# other way round. When either exits, the other is stopped too and the container exits,
+# leaving restarts to the container runtime.
+
+gunicorn --workers "$CHESS_WEB_WORKERS" --threads 4 --bind 0.0.0.0:5000 main:app &
+python -m server.ws --host 0.0.0.0 --port 8765 &
+
+trap 'kill -TERM $(jobs -p) 2>/dev/null' TERM INT
+wait -n
+status=$?
+kill -TERM $(jobs -p) 2>/dev/null
+wait
+exit $status
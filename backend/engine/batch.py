@@ -0,0 +1,201 @@
+"""
+This module analyses many positions at once with NumPy, for bulk jobs over stored games
+where building a Board per position and generating its moves in Python is too slow.
+
+A batch of N positions is an (N, 12) uint64 array of bitboards, one per piece code
+``color * 6 + kind`` (the order used by board.packed), plus an (N,) bool array that is True
+where white is to move. (N, 12, 64) piece planes are accepted wherever bitboards are.
+Attack sets are computed for the whole batch with shifted bitboards and Kogge-Stone fills
+along each ray direction, so every operation is a handful of array instructions.
+
+    bitboards, white_to_move = stack_boards(boards)
+    scores = evaluate_batch(bitboards, white_to_move)
+    checks = in_check_batch(bitboards, white_to_move)
+"""
+import numpy as np
+
+from board.bitboard import BISHOP, KING, KING_ATTACKS, KNIGHT, KNIGHT_ATTACKS, PAWN, QUEEN, ROOK
+from engine.evaluation import ENDGAME_MATERIAL, KING_ENDGAME_PST, PIECE_VALUES, PST
+
+_U64 = np.uint64
+FILE_A = _U64(0x0101010101010101)
+FILE_H = _U64(0x8080808080808080)
+NOT_A = ~FILE_A
+NOT_H = ~FILE_H
+RANK_3 = _U64(0x0000000000FF0000)
+RANK_6 = _U64(0x0000FF0000000000)
+RANK_1 = _U64(0x00000000000000FF)
+RANK_8 = _U64(0xFF00000000000000)
+
+# (shift, mask applied after shifting) per ray direction; the mask drops squares that
+# wrapped around from one edge file to the other.
+ROOK_SHIFTS = ((8, ~_U64(0)), (-8, ~_U64(0)), (1, NOT_A), (-1, NOT_H))
+BISHOP_SHIFTS = ((9, NOT_A), (7, NOT_H), (-7, NOT_A), (-9, NOT_H))
+
+_KNIGHT_TABLE = np.array(KNIGHT_ATTACKS, dtype=_U64)
+_KING_TABLE = np.array(KING_ATTACKS, dtype=_U64)
+_SQUARE_BITS = np.left_shift(_U64(1), np.arange(64, dtype=_U64))
+
+# Piece-square values, material included, signed so that white pieces count positive.
+_PST = np.array([PST[color][kind] for color in range(2) for kind in range(6)], dtype=np.int32)
+_PST[6:] *= -1
+_PST[[KING, 6 + KING]] = 0  # Kings are scored separately, depending on the phase
+_KING_MIDDLEGAME = np.array([PST[0][KING], [-v for v in PST[1][KING]]], dtype=np.int32)
+_KING_ENDGAME = np.array([KING_ENDGAME_PST[0], [-v for v in KING_ENDGAME_PST[1]]], dtype=np.int32)
+_NON_PAWN_VALUES = np.array([0 if kind in (PAWN, KING) else PIECE_VALUES[kind] for kind in range(6)] * 2,
+                            dtype=np.int64)
+
+
+def _shift(bb, shift):
+    return np.left_shift(bb, _U64(shift)) if shift > 0 else np.right_shift(bb, _U64(-shift))
+
+
+def _popcount(bb):
+    return np.bitwise_count(bb).astype(np.int32)
+
+
+def stack_boards(boards):
+    """Return (bitboards, white_to_move) arrays for a sequence of Board objects."""
+    bitboards = np.array([[bb for color in range(2) for bb in board.pieces[color]] for board in boards],
+                         dtype=_U64).reshape(-1, 12)
+    white_to_move = np.array([board.turn == 'white' for board in boards], dtype=bool)
+    return bitboards, white_to_move
+
+
+def planes_to_bitboards(planes):
+    """Convert (N, 12, 64) piece planes (any numeric or bool dtype) to (N, 12) uint64 bitboards."""
+    packed = np.packbits(np.asarray(planes, dtype=bool), axis=-1, bitorder='little')
+    return np.ascontiguousarray(packed).view('<u8').reshape(packed.shape[:-1]).astype(_U64)
+
+
+def bitboards_to_planes(bitboards):
+    """Convert (N, 12) uint64 bitboards to (N, 12, 64) bool piece planes."""
+    raw = np.ascontiguousarray(bitboards, dtype='<u8').view(np.uint8)
+    return np.unpackbits(raw, axis=-1, bitorder='little').reshape(*bitboards.shape, 64).astype(bool)
+
+
+def as_bitboards(positions):
+    """Return a batch as (N, 12) uint64 bitboards, converting from piece planes if needed."""
+    positions = np.asarray(positions)
+    if positions.ndim == 3:
+        return planes_to_bitboards(positions)
+    return positions.astype(_U64, copy=False)
+
+
+def evaluate_batch(positions, white_to_move):
+    """
+    Return the static evaluation of every position, as engine.evaluation.evaluate would.
+
+    Returns:
+        ndarray: (N,) int32 scores in centipawns, positive when the side to move is better.
+    """
+    bitboards = as_bitboards(positions)
+    planes = bitboards_to_planes(bitboards)
+    score = np.einsum('npq,pq->n', planes.astype(np.int32), _PST)
+
+    non_pawn_material = (_popcount(bitboards) * _NON_PAWN_VALUES).sum(axis=1)
+    endgame = non_pawn_material <= ENDGAME_MATERIAL
+    kings = planes[:, [KING, 6 + KING]].astype(np.int32)  # (N, 2, 64)
+    middlegame_kings = np.einsum('ncq,cq->n', kings, _KING_MIDDLEGAME)
+    endgame_kings = np.einsum('ncq,cq->n', kings, _KING_ENDGAME)
+    score += np.where(endgame, endgame_kings, middlegame_kings)
+    return np.where(white_to_move, score, -score).astype(np.int32)
+
+
+def _slide(sliders, empty, shift, mask):
+    """Kogge-Stone fill: every square the sliders attack in one direction."""
+    propagate = empty & mask
+    sliders = sliders | (propagate & _shift(sliders, shift))
+    propagate = propagate & _shift(propagate, shift)
+    sliders = sliders | (propagate & _shift(sliders, 2 * shift))
+    propagate = propagate & _shift(propagate, 2 * shift)
+    sliders = sliders | (propagate & _shift(sliders, 4 * shift))
+    return _shift(sliders, shift) & mask
+
+
+def _leaper_targets(pieces, table):
+    """(N, 64) attack sets of each square holding one of `pieces`, zero elsewhere."""
+    present = (pieces[:, None] & _SQUARE_BITS) != 0
+    return np.where(present, table, _U64(0))
+
+
+def _pawn_attacks(pawns, color):
+    if color == 0:
+        return (_shift(pawns, 7) & NOT_H) | (_shift(pawns, 9) & NOT_A)
+    return (_shift(pawns, -9) & NOT_H) | (_shift(pawns, -7) & NOT_A)
+
+
+def attack_maps(positions):
+    """
+    Return the squares attacked by each side.
+
+    Returns:
+        ndarray: (N, 2) uint64 bitboards, white's attacks then black's.
+    """
+    bitboards = as_bitboards(positions)
+    empty = ~np.bitwise_or.reduce(bitboards, axis=1)
+    maps = np.zeros((len(bitboards), 2), dtype=_U64)
+    for color in range(2):
+        pieces = bitboards[:, color * 6:color * 6 + 6]
+        attacks = _pawn_attacks(pieces[:, PAWN], color)
+        attacks |= np.bitwise_or.reduce(_leaper_targets(pieces[:, KNIGHT], _KNIGHT_TABLE), axis=1)
+        attacks |= np.bitwise_or.reduce(_leaper_targets(pieces[:, KING], _KING_TABLE), axis=1)
+        rooks = pieces[:, ROOK] | pieces[:, QUEEN]
+        bishops = pieces[:, BISHOP] | pieces[:, QUEEN]
+        for shift, mask in ROOK_SHIFTS:
+            attacks |= _slide(rooks, empty, shift, mask)
+        for shift, mask in BISHOP_SHIFTS:
+            attacks |= _slide(bishops, empty, shift, mask)
+        maps[:, color] = attacks
+    return maps
+
+
+def in_check_batch(positions, white_to_move):
+    """Return an (N,) bool array, True where the side to move is in check."""
+    bitboards = as_bitboards(positions)
+    maps = attack_maps(bitboards)
+    white_checked = (bitboards[:, KING] & maps[:, 1]) != 0
+    black_checked = (bitboards[:, 6 + KING] & maps[:, 0]) != 0
+    return np.where(white_to_move, white_checked, black_checked)
+
+
+def mobility_batch(positions):
+    """
+    Count each side's pseudo-legal moves: moves that follow the pieces' movement rules
+    without checking whether they leave the king in check. Promotions count once per
+    piece they can promote to, as in move generation; castling and en passant are not
+    counted. Exact legal-move counts remain Board.generate_legal_moves' job.
+
+    Returns:
+        ndarray: (N, 2) int32 counts, white's then black's.
+    """
+    bitboards = as_bitboards(positions)
+    occupancy = np.stack([np.bitwise_or.reduce(bitboards[:, :6], axis=1),
+                          np.bitwise_or.reduce(bitboards[:, 6:], axis=1)], axis=1)
+    empty = ~(occupancy[:, 0] | occupancy[:, 1])
+    counts = np.zeros((len(bitboards), 2), dtype=np.int32)
+    for color in range(2):
+        pieces = bitboards[:, color * 6:color * 6 + 6]
+        targets = ~occupancy[:, color]
+        enemy = occupancy[:, 1 - color]
+        total = np.zeros(len(bitboards), dtype=np.int32)
+
+        # Sliders: rays of one piece set in one direction never overlap, so the union's
+        # population count is the sum of the pieces' individual moves.
+        for kind, shifts in ((ROOK, ROOK_SHIFTS), (BISHOP, BISHOP_SHIFTS), (QUEEN, ROOK_SHIFTS + BISHOP_SHIFTS)):
+            for shift, mask in shifts:
+                total += _popcount(_slide(pieces[:, kind], empty, shift, mask) & targets)
+        # Leapers can reach the same square from two origins, so count per square.
+        for kind, table in ((KNIGHT, _KNIGHT_TABLE), (KING, _KING_TABLE)):
+            total += _popcount(_leaper_targets(pieces[:, kind], table) & targets[:, None]).sum(axis=1)
+
+        pawns = pieces[:, PAWN]
+        forward, double_rank, last_rank = (8, RANK_3, RANK_8) if color == 0 else (-8, RANK_6, RANK_1)
+        single = _shift(pawns, forward) & empty
+        double = _shift(single & double_rank, forward) & empty
+        captures = [(_shift(pawns, forward - 1) & NOT_H) & enemy, (_shift(pawns, forward + 1) & NOT_A) & enemy]
+        for moves in [single] + captures:
+            total += _popcount(moves & ~last_rank) + 4 * _popcount(moves & last_rank)
+        total += _popcount(double)
+        counts[:, color] = total
+    return counts
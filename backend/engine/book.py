@@ -0,0 +1,226 @@
+"""
+This module reads and builds opening books in the Polyglot binary format.
+
+A book is a file of 16-byte big-endian entries sorted by position key:
+
+    8 bytes   position key
+    2 bytes   move: to file (bits 0-2), to rank (3-5), from file (6-8), from rank (9-11),
+              promotion (12-14: 1 knight, 2 bishop, 3 rook, 4 queen)
+    2 bytes   weight
+    4 bytes   learn (unused, written as 0)
+
+Castling is stored as the king capturing its own rook (e1h1, e1a1, ...), as in Polyglot.
+The keys are standard Polyglot keys (see engine.polyglot), so books built here work with
+other Polyglot tools and theirs work here.
+
+The file is memory-mapped and searched in place, so opening a book is instant and a
+lookup reads a few entries without copying the file:
+
+    python -m engine.book build book.bin games.pgn --plies 24
+    python -m engine.book probe book.bin "<fen>"
+"""
+import argparse
+import mmap
+import os
+import random
+import struct
+import threading
+from collections import defaultdict
+
+from board.bitboard import COLOR_INDEX, KING, ROOK
+from board.board import Board
+from board.movegen import Move, pack_move, unpack_move
+from board.pgn import iter_games, replay
+from engine.polyglot import polyglot_key
+
+ENTRY = struct.Struct('>QHHI')
+_KEY = struct.Struct('>Q')
+
+
+def encode_move(board, move):
+    """Return the 16-bit Polyglot encoding of a legal move in the board's position."""
+    start, end = move.start, move.end
+    us = COLOR_INDEX[board.turn]
+    if (board.pieces[us][KING] >> start) & 1 and abs((end & 7) - (start & 7)) == 2:
+        end = (end & ~7) | (7 if end > start else 0)  # Castling: the king "captures" its rook
+    # Polyglot's promotion codes are the piece kinds; only the two squares swap places
+    return pack_move(Move(end, start, move.promotion))
+
+
+def decode_move(board, raw, moves=None):
+    """
+    Return the Move a Polyglot move encoding stands for in the board's position, or None.
+
+    With `moves`, the side to move's legal moves, the result is checked to be one of them;
+    without, only that the side to move has a piece on the start square and not on the
+    destination, which is enough for callers that validate the move when playing it.
+    """
+    end, start, promotion = unpack_move(raw)
+    us = COLOR_INDEX[board.turn]
+    if (board.pieces[us][KING] >> start) & 1 and (board.pieces[us][ROOK] >> end) & 1:
+        end = start + (2 if end > start else -2)
+    if moves is None:
+        own = board.occupancy[us]
+        if (own >> start) & 1 and not (own >> end) & 1:
+            return Move(start, end, promotion)
+        return None
+    for move in moves:
+        if move.start == start and move.end == end and move.promotion == promotion:
+            return move
+    return None
+
+
+class OpeningBook:
+    """A memory-mapped Polyglot-format book, searched with binary search."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+        self.size = size // ENTRY.size
+
+    def _first_index(self, key):
+        data, low, high = self.data, 0, self.size
+        while low < high:
+            mid = (low + high) // 2
+            if _KEY.unpack_from(data, mid * ENTRY.size)[0] < key:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+    def raw_entries(self, key):
+        """Return the (move, weight) pairs stored for a position key, as encoded in the file."""
+        entries = []
+        index = self._first_index(key)
+        while index < self.size:
+            entry_key, move, weight, _ = ENTRY.unpack_from(self.data, index * ENTRY.size)
+            if entry_key != key:
+                break
+            entries.append((move, weight))
+            index += 1
+        return entries
+
+    def moves(self, board):
+        """Return the book's (Move, weight) pairs for a board's position, heaviest first."""
+        entries = self.raw_entries(polyglot_key(board))
+        if not entries:
+            return []
+        legal = board.legal_moves()
+        found = []
+        for raw, weight in entries:
+            move = decode_move(board, raw, legal)
+            if move is not None:  # Skip entries that do not fit the position
+                found.append((move, weight))
+        return sorted(found, key=lambda pair: pair[1], reverse=True)
+
+    def choose(self, board, rng=random):
+        """
+        Pick a book move for the position at random in proportion to weight, or None.
+
+        The move is not checked against the legal moves, which keeps a lookup to a few
+        microseconds; play it through Board.move_piece, which validates it.
+        """
+        entries = [(raw, weight) for raw, weight in self.raw_entries(polyglot_key(board)) if weight > 0]
+        if not entries:
+            return None
+        pick = rng.randrange(sum(weight for _, weight in entries))
+        for raw, weight in entries:
+            pick -= weight
+            if pick < 0:
+                return decode_move(board, raw)
+        return None
+
+    def __len__(self):
+        return self.size
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+
+
+def build_book(pgn_paths, out_path, max_plies=24, min_count=1):
+    """
+    Build a book from PGN archives.
+
+    Every move played within the first `max_plies` plies of a game is recorded; its weight
+    is two points per win and one per draw for the side that played it, as Polyglot does
+    (games without a result count as draws), and moves that occur fewer than `min_count`
+    times are dropped.
+
+    Returns:
+        int: The number of entries written.
+    """
+    stats = defaultdict(lambda: [0, 0])  # (key, move) -> [occurrences, points]
+    for path in pgn_paths:
+        for game in iter_games(path):
+            points = {'1-0': (2, 0), '0-1': (0, 2)}.get(game.result, (1, 1))
+            try:
+                for ply, (board, move, _) in enumerate(replay(game)):
+                    if ply >= max_plies:
+                        break
+                    entry = stats[polyglot_key(board), encode_move(board, move)]
+                    entry[0] += 1
+                    entry[1] += points[COLOR_INDEX[board.turn]]
+            except ValueError:
+                continue  # Keep the moves before an illegal one
+
+    by_key = defaultdict(list)
+    for (key, move), (count, points) in stats.items():
+        if count >= min_count:
+            by_key[key].append((move, points))
+    entries = []
+    for key, moves in by_key.items():
+        scale = max(1, -(-max(points for _, points in moves) // 0xFFFF))
+        entries.extend((key, move, points // scale) for move, points in moves)
+    entries.sort(key=lambda entry: (entry[0], -entry[2]))
+
+    with open(out_path, 'wb') as f:
+        for key, move, weight in entries:
+            f.write(ENTRY.pack(key, move, weight, 0))
+    return len(entries)
+
+
+_book = None
+_book_lock = threading.Lock()
+
+
+def opening_book():
+    """Return the process-wide book named by CHESS_BOOK, or None if none is configured."""
+    global _book
+    path = os.environ.get('CHESS_BOOK')
+    if not path or not os.path.exists(path):
+        return None
+    if _book is None or _book.path != path:
+        with _book_lock:
+            if _book is None or _book.path != path:
+                _book = OpeningBook(path)
+    return _book
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build or query a Polyglot-format opening book.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    build = commands.add_parser('build', help='build a book from PGN archives')
+    build.add_argument('book')
+    build.add_argument('pgn', nargs='+')
+    build.add_argument('--plies', type=int, default=24, help='record moves up to this ply (default 24)')
+    build.add_argument('--min-count', type=int, default=1, help='drop moves seen fewer times')
+    probe = commands.add_parser('probe', help='list the book moves for a position')
+    probe.add_argument('book')
+    probe.add_argument('fen', nargs='?', default=None)
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        count = build_book(args.pgn, args.book, args.plies, args.min_count)
+        print(f"{count} entries written to {args.book}")
+    else:
+        book = OpeningBook(args.book)
+        board = Board.from_fen(args.fen) if args.fen else Board()
+        for move, weight in book.moves(board):
+            print(f"{move.uci()}  {weight}")
+
+
+if __name__ == '__main__':
+    main()
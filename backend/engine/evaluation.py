@@ -0,0 +1,124 @@
+"""
+This module scores positions for the search: material plus piece-square tables, with a
+separate king table once the heavy pieces are gone. Scores are in centipawns from the
+point of view of the side to move.
+"""
+from board.bitboard import BISHOP, KING, KNIGHT, PAWN, QUEEN, ROOK, iter_squares
+
+PIECE_VALUES = (100, 320, 330, 500, 900, 0)  # Indexed by piece kind
+
+# Piece-square tables as seen from white, laid out like a diagram: rank 8 first, a-file left.
+_PAWN = (
+    0, 0, 0, 0, 0, 0, 0, 0,
+    50, 50, 50, 50, 50, 50, 50, 50,
+    10, 10, 20, 30, 30, 20, 10, 10,
+    5, 5, 10, 25, 25, 10, 5, 5,
+    0, 0, 0, 20, 20, 0, 0, 0,
+    5, -5, -10, 0, 0, -10, -5, 5,
+    5, 10, 10, -20, -20, 10, 10, 5,
+    0, 0, 0, 0, 0, 0, 0, 0,
+)
+_KNIGHT = (
+    -50, -40, -30, -30, -30, -30, -40, -50,
+    -40, -20, 0, 0, 0, 0, -20, -40,
+    -30, 0, 10, 15, 15, 10, 0, -30,
+    -30, 5, 15, 20, 20, 15, 5, -30,
+    -30, 0, 15, 20, 20, 15, 0, -30,
+    -30, 5, 10, 15, 15, 10, 5, -30,
+    -40, -20, 0, 5, 5, 0, -20, -40,
+    -50, -40, -30, -30, -30, -30, -40, -50,
+)
+_BISHOP = (
+    -20, -10, -10, -10, -10, -10, -10, -20,
+    -10, 0, 0, 0, 0, 0, 0, -10,
+    -10, 0, 5, 10, 10, 5, 0, -10,
+    -10, 5, 5, 10, 10, 5, 5, -10,
+    -10, 0, 10, 10, 10, 10, 0, -10,
+    -10, 10, 10, 10, 10, 10, 10, -10,
+    -10, 5, 0, 0, 0, 0, 5, -10,
+    -20, -10, -10, -10, -10, -10, -10, -20,
+)
+_ROOK = (
+    0, 0, 0, 0, 0, 0, 0, 0,
+    5, 10, 10, 10, 10, 10, 10, 5,
+    -5, 0, 0, 0, 0, 0, 0, -5,
+    -5, 0, 0, 0, 0, 0, 0, -5,
+    -5, 0, 0, 0, 0, 0, 0, -5,
+    -5, 0, 0, 0, 0, 0, 0, -5,
+    -5, 0, 0, 0, 0, 0, 0, -5,
+    0, 0, 0, 5, 5, 0, 0, 0,
+)
+_QUEEN = (
+    -20, -10, -10, -5, -5, -10, -10, -20,
+    -10, 0, 0, 0, 0, 0, 0, -10,
+    -10, 0, 5, 5, 5, 5, 0, -10,
+    -5, 0, 5, 5, 5, 5, 0, -5,
+    0, 0, 5, 5, 5, 5, 0, -5,
+    -10, 5, 5, 5, 5, 5, 0, -10,
+    -10, 0, 5, 0, 0, 0, 0, -10,
+    -20, -10, -10, -5, -5, -10, -10, -20,
+)
+_KING_MIDDLEGAME = (
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -20, -30, -30, -40, -40, -30, -30, -20,
+    -10, -20, -20, -20, -20, -20, -20, -10,
+    20, 20, 0, 0, 0, 0, 20, 20,
+    20, 30, 10, 0, 0, 10, 30, 20,
+)
+_KING_ENDGAME = (
+    -50, -40, -30, -20, -20, -30, -40, -50,
+    -30, -20, -10, 0, 0, -10, -20, -30,
+    -30, -10, 20, 30, 30, 20, -10, -30,
+    -30, -10, 30, 40, 40, 30, -10, -30,
+    -30, -10, 30, 40, 40, 30, -10, -30,
+    -30, -10, 20, 30, 30, 20, -10, -30,
+    -30, -30, 0, 0, 0, 0, -30, -30,
+    -50, -30, -30, -30, -30, -30, -30, -50,
+)
+
+# Once the non-pawn material of both sides together falls to this, use the endgame king table.
+ENDGAME_MATERIAL = 2600
+
+
+def _square_tables(diagram, value):
+    """Return (white, black) tables of value + bonus indexed by square (a1 = 0)."""
+    white = tuple(value + diagram[sq ^ 56] for sq in range(64))
+    black = tuple(value + diagram[sq] for sq in range(64))
+    return white, black
+
+
+# PST[color][kind][square], material included; the king entry is the middlegame table.
+_TABLES = [_square_tables(table, PIECE_VALUES[kind]) for kind, table in
+           ((PAWN, _PAWN), (KNIGHT, _KNIGHT), (BISHOP, _BISHOP), (ROOK, _ROOK), (QUEEN, _QUEEN),
+            (KING, _KING_MIDDLEGAME))]
+PST = tuple(tuple(_TABLES[kind][color] for kind in range(6)) for color in range(2))
+KING_ENDGAME_PST = _square_tables(_KING_ENDGAME, 0)
+
+
+def evaluate(board):
+    """Return the static evaluation in centipawns, positive when the side to move is better."""
+    scores = [0, 0]
+    non_pawn_material = 0
+    for color in range(2):
+        tables = PST[color]
+        pieces = board.pieces[color]
+        total = 0
+        for kind in range(5):
+            table = tables[kind]
+            for sq in iter_squares(pieces[kind]):
+                total += table[sq]
+                if kind != PAWN:
+                    non_pawn_material += PIECE_VALUES[kind]
+        scores[color] = total
+
+    king_tables = KING_ENDGAME_PST if non_pawn_material <= ENDGAME_MATERIAL else (PST[0][KING], PST[1][KING])
+    for color in range(2):
+        king_sq = board.king_squares[color]
+        if king_sq is not None:
+            scores[color] += king_tables[color][king_sq]
+
+    score = scores[0] - scores[1]
+    return score if board.turn == 'white' else -score
@@ -0,0 +1,233 @@
+"""
+This module runs engine work in a pool of worker processes, so searches use every core
+instead of queueing behind the GIL of the web process.
+
+A single search is split at the root: the legal moves are dealt round-robin to the workers,
+each worker deepens iteratively over its share, and the results are merged at the deepest
+depth every worker completed. Like Lazy SMP, the workers share one transposition table,
+placed in shared memory, so each benefits from what the others have searched. Batch
+analysis spreads independent positions across the same workers.
+
+Submissions are bounded: at most `max_pending` tasks may be queued or running, and work
+beyond that is rejected with PoolBusy rather than queued, so engine traffic can never pile
+up behind itself or starve the request threads serving moves.
+"""
+import atexit
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from board.board import Board
+from engine.search import MATE_THRESHOLD, SearchResult, Searcher
+from engine.transposition import TranspositionTable, set_shared_table, table_bytes, table_size_mb
+from metrics import METRICS
+
+
+class PoolBusy(Exception):
+    """Raised when the pool's queue is full; the caller should retry later."""
+
+
+def default_workers():
+    """
+    Return CHESS_ENGINE_WORKERS, or else this web process's share of the CPUs. Each of the
+    CHESS_WEB_WORKERS web processes starts its own pool, so each gets cpu_count // web
+    workers, and all the pools together hold about one searcher per core. A single web
+    process gets one fewer than the CPU count, so it keeps a core for itself.
+    """
+    configured = os.environ.get('CHESS_ENGINE_WORKERS')
+    if configured:
+        return max(1, int(configured))
+    cpus = os.cpu_count() or 1
+    web_workers = max(1, int(os.environ.get('CHESS_WEB_WORKERS') or 1))
+    if web_workers > 1:
+        return max(1, cpus // web_workers)
+    return max(1, cpus - 1)
+
+
+_worker_memory = None  # Keeps the worker's shared-memory mapping alive
+
+
+def _init_worker(memory_name, size_mb):
+    global _worker_memory
+    _worker_memory = shared_memory.SharedMemory(name=memory_name)
+    set_shared_table(TranspositionTable(size_mb, buffer=_worker_memory.buf))
+
+
+def _load(fen, history):
+    board = Board.from_fen(fen)
+    if history:
+        # Carry over the game's earlier positions so the workers still see repetitions
+        board.position_history.clear()
+        board.position_history.update(history)
+    return board
+
+
+def _search_split(fen, history, root_moves, depth, movetime_ms):
+    """Worker task: search a share of the root moves; returns every completed iteration."""
+    searcher = Searcher(_load(fen, history))
+    searcher.search(depth=depth, movetime_ms=movetime_ms, root_moves=root_moves)
+    return searcher.iterations, searcher.nodes
+
+
+def _search_position(fen, depth, movetime_ms):
+    """Worker task: search one whole position."""
+    return Searcher(_load(fen, None)).search(depth=depth, movetime_ms=movetime_ms)
+
+
+def _record(results, started):
+    """Count finished searches and their nodes, which the workers cannot report themselves."""
+    if METRICS.enabled:
+        METRICS.incr('searches', len(results))
+        METRICS.incr('search_nodes', sum(result.nodes for result in results))
+        METRICS.observe('search', time.perf_counter() - started)
+
+
+def merge_split_results(results):
+    """
+    Combine the results of a root-split search into one SearchResult.
+
+    Args:
+        results (list): (iterations, nodes) per worker, as returned by _search_split.
+
+    Returns:
+        SearchResult: The best move at the deepest depth all workers completed, or a forced
+        mate any worker proved, whichever is better; None if no worker finished depth 1.
+    """
+    finished = [iterations for iterations, _ in results if iterations]
+    if not finished:
+        return None
+    nodes = sum(count for _, count in results)
+    time_ms = max(iterations[-1].time_ms for iterations in finished)
+
+    # A worker that stopped on a forced mate is done; the others are compared at the
+    # deepest iteration they all reached.
+    depths = [iterations[-1].depth for iterations in finished if abs(iterations[-1].score) < MATE_THRESHOLD]
+    common = min(depths) if depths else max(iterations[-1].depth for iterations in finished)
+    candidates = []
+    for iterations in finished:
+        last = iterations[-1]
+        if last.score >= MATE_THRESHOLD:
+            candidates.append(last)
+        else:
+            candidates.append(next(result for result in reversed(iterations) if result.depth <= common))
+    best = max(candidates, key=lambda result: result.score)
+    return best._replace(nodes=nodes, time_ms=time_ms)
+
+
+class AnalysisPool:
+    """A bounded pool of search worker processes sharing one transposition table."""
+
+    def __init__(self, workers=None, max_pending=None, table_mb=None):
+        """
+        Args:
+            workers (int): Worker processes; defaults to default_workers().
+            max_pending (int): Tasks that may be queued or running at once; defaults to
+                twice the number of workers.
+            table_mb (float): Size of the shared transposition table; defaults to CHESS_TT_MB.
+        """
+        self.workers = workers or default_workers()
+        self.max_pending = max_pending or 2 * self.workers
+        table_mb = table_mb or table_size_mb()
+        self.memory = shared_memory.SharedMemory(create=True, size=table_bytes(table_mb))
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(self.memory.name, table_mb),
+        )
+        self.pending = 0
+        self.lock = threading.Lock()
+
+    def _reserve(self, count):
+        with self.lock:
+            if self.pending + count > self.max_pending:
+                raise PoolBusy(f"Engine is busy ({self.pending} of {self.max_pending} tasks pending)")
+            self.pending += count
+
+    def _release(self, _future=None):
+        with self.lock:
+            self.pending -= 1
+
+    def _submit_all(self, calls):
+        """Submit (function, *args) tuples as one reservation; returns their futures."""
+        self._reserve(len(calls))
+        futures = []
+        try:
+            for fn, *args in calls:
+                future = self.executor.submit(fn, *args)
+                futures.append(future)
+                future.add_done_callback(self._release)
+        except BaseException:
+            for _ in range(len(calls) - len(futures)):
+                self._release()
+            raise
+        return futures
+
+    def search(self, board, depth=None, movetime_ms=None):
+        """
+        Search a board's side to move across the workers.
+
+        Returns:
+            SearchResult: As engine.search.search.
+
+        Raises:
+            PoolBusy: If the queue has no room for the search.
+        """
+        started = time.perf_counter()
+        moves = board.legal_moves()
+        if len(moves) <= 1:
+            # Nothing to split: the move is forced, or the game is over
+            result = Searcher(board).search(depth=depth, movetime_ms=movetime_ms)
+            _record([result], started)
+            return result
+
+        fen = board.to_fen()
+        history = dict(board.position_history)
+        shares = [moves[i::self.workers] for i in range(min(self.workers, len(moves)))]
+        futures = self._submit_all([(_search_split, fen, history, share, depth, movetime_ms)
+                                    for share in shares])
+        result = merge_split_results([future.result() for future in futures])
+        if result is None:
+            # Too little time for even one ply; fall back to the first legal move
+            result = SearchResult(moves[0], 0, 0, 0, float(movetime_ms or 0), [moves[0]])
+        _record([result], started)
+        return result
+
+    def analyse(self, fens, depth=None, movetime_ms=None):
+        """
+        Search many independent positions, one per task, spread across the workers.
+
+        Returns:
+            list: A SearchResult per FEN, in order.
+
+        Raises:
+            PoolBusy: If the queue has no room for the whole batch.
+        """
+        started = time.perf_counter()
+        futures = self._submit_all([(_search_position, fen, depth, movetime_ms) for fen in fens])
+        results = [future.result() for future in futures]
+        _record(results, started)
+        return results
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+        self.memory.close()
+        self.memory.unlink()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def analysis_pool():
+    """Return the process-wide AnalysisPool, starting its workers on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = AnalysisPool()
+                atexit.register(_pool.shutdown)  # Stop the workers and free the shared table
+    return _pool
@@ -0,0 +1,309 @@
+"""
+This module is the engine's search: iterative-deepening negamax alpha-beta with a
+quiescence search over captures, and move ordering by transposition-table move, MVV-LVA
+for captures, killer moves and the history heuristic.
+
+Results are stored in the process-wide transposition table, so later searches, in this
+game or any other on the server, reuse work on positions they have in common. Positions
+covered by the endgame tablebases (CHESS_TABLEBASES) are scored by lookup.
+
+The search runs on the Board's make_move/unmake_move, stops when its depth or time budget
+is spent, and always returns the best move of the deepest completed iteration.
+"""
+import time
+from collections import namedtuple
+
+from board.bitboard import COLOR_INDEX, PAWN, popcount
+from board.board import PIECE_KINDS
+from engine.evaluation import PIECE_VALUES, evaluate
+from engine.tablebase import DRAW, WIN, tablebase
+from engine.transposition import EXACT, LOWER, NO_SCORE, TERMINAL_DEPTH, UPPER, shared_table
+
+MATE_SCORE = 100000
+MATE_THRESHOLD = MATE_SCORE - 1000  # Scores beyond this are "mate in N"
+INFINITY = MATE_SCORE + 1
+MAX_PLY = 128
+MAX_DEPTH = 64
+
+_CHECK_EVERY = 256  # Nodes between clock checks
+
+SearchResult = namedtuple('SearchResult', 'move score depth nodes time_ms pv')
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the time budget runs out."""
+
+
+def score_to_tt(score, ply):
+    """Make a mate score relative to the node at `ply` before storing it in the table."""
+    if score >= MATE_THRESHOLD:
+        return score + ply
+    if score <= -MATE_THRESHOLD:
+        return score - ply
+    return score
+
+
+def score_from_tt(score, ply):
+    """Turn a stored mate score back into one relative to the search root."""
+    if score >= MATE_THRESHOLD:
+        return score - ply
+    if score <= -MATE_THRESHOLD:
+        return score + ply
+    return score
+
+
+class Searcher:
+    """Searches one position. Create a new Searcher (or call search again) per move."""
+
+    def __init__(self, board, table=None):
+        self.board = board
+        self.table = table if table is not None else shared_table()
+        self.tablebase = tablebase()
+        self.nodes = 0
+        self.deadline = None
+        self.killers = [[None, None] for _ in range(MAX_PLY)]
+        self.history = [[0] * 64 for _ in range(64)]
+        self.path = []  # Hashes of the positions between the root and the current node
+        self.iterations = []  # SearchResult of every completed iteration, shallowest first
+        self.full_root = True
+
+    def search(self, depth=None, movetime_ms=None, root_moves=None):
+        """
+        Search the side to move's best move.
+
+        Args:
+            depth (int): Maximum depth in plies; defaults to MAX_DEPTH.
+            movetime_ms (float): Time budget in milliseconds; unlimited when None.
+            root_moves (list): Restrict the search to these root moves, for splitting one
+                search across workers; all legal moves by default.
+
+        Returns:
+            SearchResult: The move (None when there is no legal move), its score in
+            centipawns for the side to move, the depth reached, nodes searched, elapsed
+            milliseconds and the principal variation.
+        """
+        board = self.board
+        start = time.perf_counter()
+        self.deadline = start + movetime_ms / 1000 if movetime_ms else None
+        self.nodes = 0
+        self.iterations = []
+        self.table.new_search()
+        max_depth = min(depth or MAX_DEPTH, MAX_DEPTH)
+
+        if self.tablebase is not None and root_moves is None:
+            score = self._tablebase_score(0)
+            if score is not None:  # Endgame covered by the tablebases: no search needed
+                move = self.tablebase.best_move(board)
+                elapsed = round((time.perf_counter() - start) * 1000, 1)
+                return SearchResult(move, score, 0, 0, elapsed, [move] if move is not None else [])
+
+        legal_moves = board.generate_legal_moves(board.turn)
+        self.full_root = root_moves is None
+        root_moves = legal_moves if root_moves is None else [move for move in legal_moves if move in root_moves]
+        if not root_moves:
+            score = -MATE_SCORE if board.is_king_in_check(board.turn) else 0
+            return SearchResult(None, score, 0, 0, 0.0, [])
+
+        entry = self.table.probe(board.hash)
+        first = entry.move if entry is not None and entry.move in root_moves else root_moves[0]
+        best = SearchResult(first, 0, 0, 0, 0.0, [first])
+        for current_depth in range(1, max_depth + 1):
+            try:
+                score, pv = self._search_root(root_moves, current_depth, best.move)
+            except SearchTimeout:
+                break
+            elapsed = time.perf_counter() - start
+            best = SearchResult(pv[0], score, current_depth, self.nodes, round(elapsed * 1000, 1), pv)
+            self.iterations.append(best)
+            if abs(score) >= MATE_THRESHOLD or len(legal_moves) == 1:
+                break  # A forced mate was found, or there is nothing to choose between
+            if self.deadline is not None and time.perf_counter() + elapsed > self.deadline:
+                break  # The next, deeper iteration would not finish in time
+        return best._replace(nodes=self.nodes, time_ms=round((time.perf_counter() - start) * 1000, 1))
+
+    def _search_root(self, moves, depth, previous_best):
+        board = self.board
+        alpha, beta = -INFINITY, INFINITY
+        best_pv = None
+        self.path = [board.hash]
+        for move in self._order(moves, 0, previous_best):
+            board.make_move(move)
+            try:
+                score, child_pv = self._negamax(depth - 1, -beta, -alpha, 1)
+            finally:
+                board.unmake_move()
+            score = -score
+            if best_pv is None or score > alpha:
+                alpha = score
+                best_pv = [move] + child_pv
+        if self.full_root:  # A score over only some root moves is not the position's score
+            self.table.store(board.hash, best_pv[0], depth, score_to_tt(alpha, 0), EXACT)
+        return alpha, best_pv
+
+    def _negamax(self, depth, alpha, beta, ply):
+        board = self.board
+        self._count_node()
+
+        position_hash = board.hash
+        if position_hash in self.path or board.position_history.get(position_hash, 0) \
+                or board.no_capture_or_pawn_move_count >= 100:
+            return 0, []  # Repetition or fifty-move draw
+
+        if self.tablebase is not None:
+            score = self._tablebase_score(ply)
+            if score is not None:
+                return score, []
+
+        color = board.turn
+        in_check = board.is_king_in_check(color)
+        if in_check:
+            depth += 1  # Check extension
+        if depth <= 0 or ply >= MAX_PLY - 1:
+            return self._quiesce(alpha, beta, ply), []
+
+        table = self.table
+        entry = table.probe(position_hash)
+        tt_move = None
+        if entry is not None:
+            tt_move = entry.move
+            if entry.depth >= depth and entry.bound != NO_SCORE:
+                score = score_from_tt(entry.score, ply)
+                if entry.bound == EXACT or (entry.bound == LOWER and score >= beta) \
+                        or (entry.bound == UPPER and score <= alpha):
+                    return score, [tt_move] if tt_move is not None else []
+
+        moves = board.generate_legal_moves(color)
+        if not moves:
+            score = -MATE_SCORE + ply if in_check else 0
+            table.store(position_hash, None, TERMINAL_DEPTH, score_to_tt(score, ply), EXACT)
+            return score, []
+
+        original_alpha = alpha
+        best_score, best_pv = -INFINITY, []
+        self.path.append(position_hash)
+        try:
+            for move in self._order(moves, ply, tt_move):
+                capture = self._is_capture(move)
+                board.make_move(move)
+                try:
+                    score, child_pv = self._negamax(depth - 1, -beta, -alpha, ply + 1)
+                finally:
+                    board.unmake_move()
+                score = -score
+                if score > best_score:
+                    best_score, best_pv = score, [move] + child_pv
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        if not capture:
+                            self._record_cutoff(move, depth, ply)
+                        break
+        finally:
+            self.path.pop()
+
+        if best_score >= beta:
+            bound = LOWER
+        elif best_score > original_alpha:
+            bound = EXACT
+        else:
+            bound = UPPER
+        table.store(position_hash, best_pv[0], depth, score_to_tt(best_score, ply), bound)
+        return best_score, best_pv
+
+    def _quiesce(self, alpha, beta, ply):
+        board = self.board
+        self._count_node()
+        if ply >= MAX_PLY - 1:
+            return evaluate(board)
+        color = board.turn
+        in_check = board.is_king_in_check(color)
+        moves = board.generate_legal_moves(color)
+        if not moves:
+            return -MATE_SCORE + ply if in_check else 0
+
+        if not in_check:
+            stand_pat = evaluate(board)
+            if stand_pat >= beta:
+                return stand_pat
+            alpha = max(alpha, stand_pat)
+            moves = [move for move in moves if move.promotion is not None or self._is_capture(move)]
+
+        for move in self._order(moves, ply, None):
+            board.make_move(move)
+            try:
+                score = -self._quiesce(-beta, -alpha, ply + 1)
+            finally:
+                board.unmake_move()
+            if score >= beta:
+                return score
+            alpha = max(alpha, score)
+        return alpha
+
+    def _tablebase_score(self, ply):
+        """Return the tablebase score of the current position at `ply`, or None if not covered."""
+        board = self.board
+        if popcount(board.occupancy[0] | board.occupancy[1]) != 3:
+            return None
+        result = self.tablebase.probe(board)
+        if result is None:
+            return None
+        if result.wdl == DRAW:
+            return 0
+        if result.wdl == WIN:
+            return MATE_SCORE - ply - result.dtm
+        return -MATE_SCORE + ply + result.dtm
+
+    def _count_node(self):
+        self.nodes += 1
+        if self.deadline is not None and not self.nodes % _CHECK_EVERY and time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+
+    def _is_capture(self, move):
+        board = self.board
+        them = 1 - COLOR_INDEX[board.turn]
+        if (board.occupancy[them] >> move.end) & 1:
+            return True
+        return move.end == board.en_passant and (board.pieces[1 - them][PAWN] >> move.start) & 1
+
+    def _order(self, moves, ply, best_move):
+        """Return moves sorted best-first for the search."""
+        board = self.board
+        grid = board.board
+        them = 1 - COLOR_INDEX[board.turn]
+        enemy = board.occupancy[them]
+        killers = self.killers[ply]
+        history = self.history
+
+        def key(move):
+            if move == best_move:
+                return 10_000_000
+            score = 0
+            if (enemy >> move.end) & 1:
+                victim = grid[move.end >> 3][move.end & 7]
+                attacker = grid[move.start >> 3][move.start & 7]
+                # MVV-LVA: most valuable victim first, then least valuable attacker
+                score = 1_000_000 + 10 * PIECE_VALUES[PIECE_KINDS[type(victim)]] \
+                    - PIECE_VALUES[PIECE_KINDS[type(attacker)]]
+            if move.promotion is not None:
+                score += 1_000_000 + PIECE_VALUES[move.promotion]
+            if score:
+                return score
+            if move == killers[0]:
+                return 900_000
+            if move == killers[1]:
+                return 800_000
+            return history[move.start][move.end]
+
+        return sorted(moves, key=key, reverse=True)
+
+    def _record_cutoff(self, move, depth, ply):
+        killers = self.killers[ply]
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+        self.history[move.start][move.end] += depth * depth
+
+
+def search(board, depth=None, movetime_ms=None, root_moves=None):
+    """Search the best move for the side to move; see Searcher.search."""
+    return Searcher(board).search(depth=depth, movetime_ms=movetime_ms, root_moves=root_moves)
@@ -0,0 +1,338 @@
+"""
+This module generates and probes endgame tablebases for a king and one piece against a
+lone king: KQK, KRK, KPK (and the drawn KBK and KNK).
+
+A table holds one byte per position, indexed by
+
+    side << 18 | strong_king << 12 | weak_king << 6 | piece
+
+where side is 0 when the side with the piece is to move and 1 otherwise, with the strong
+side always seen as white (positions with a black piece are mirrored top to bottom).
+A byte is 0 for a draw, ILLEGAL for an impossible position, and otherwise 1 + the
+distance to mate in plies; only the strong side can win, so a non-zero value is a win
+when the strong side is to move and a loss when the weak side is. This gives win/draw/loss
+(WDL) and distance to mate (DTM) from a single lookup.
+
+Tables are built by retrograde analysis: starting from the checkmates, positions are
+resolved backwards by un-moving pieces, one ply at a time, so each position is visited
+once. KPK resolves its promotions through the KQK and KRK tables, which are built first.
+
+    python -m engine.tablebase generate tablebases/
+"""
+import argparse
+import mmap
+import os
+import threading
+from collections import namedtuple
+
+from board.bitboard import (
+    BISHOP, COLOR_INDEX, KING_ATTACKS, KNIGHT, KNIGHT_ATTACKS, PAWN, PAWN_ATTACKS, QUEEN,
+    ROOK, bishop_attacks, iter_squares, popcount, queen_attacks, rook_attacks
+)
+
+ILLEGAL = 255
+TABLE_SIZE = 1 << 19
+TABLES = {'KQK': QUEEN, 'KRK': ROOK, 'KPK': PAWN, 'KBK': BISHOP, 'KNK': KNIGHT}
+TABLE_NAMES = {kind: name for name, kind in TABLES.items()}
+WIN, DRAW, LOSS = 1, 0, -1
+
+TablebaseResult = namedtuple('TablebaseResult', 'wdl dtm')
+TablebaseResult.__doc__ = ("Outcome for the side to move: wdl is WIN, DRAW or LOSS, and dtm the "
+                           "distance to mate in plies (None for draws).")
+
+_NEIGHBOURS = tuple(tuple(iter_squares(KING_ATTACKS[sq])) for sq in range(64))
+
+
+def table_index(strong_to_move, strong_king, weak_king, piece):
+    return (0 if strong_to_move else 1) << 18 | strong_king << 12 | weak_king << 6 | piece
+
+
+def _attacks(kind, sq, occupied):
+    """Squares the strong piece of `kind` on sq attacks (white pawns)."""
+    if kind == QUEEN:
+        return queen_attacks(sq, occupied)
+    if kind == ROOK:
+        return rook_attacks(sq, occupied)
+    if kind == BISHOP:
+        return bishop_attacks(sq, occupied)
+    if kind == KNIGHT:
+        return KNIGHT_ATTACKS[sq]
+    return PAWN_ATTACKS[0][sq]
+
+
+def _is_valid(kind, strong_king, weak_king, piece):
+    """Check the placement: three distinct squares, kings apart, no pawn on the back ranks."""
+    if strong_king == weak_king or piece == strong_king or piece == weak_king:
+        return False
+    if (KING_ATTACKS[strong_king] >> weak_king) & 1:
+        return False
+    return kind != PAWN or 8 <= piece < 56
+
+
+def _weak_in_check(kind, strong_king, weak_king, piece):
+    occupied = 1 << strong_king | 1 << weak_king | 1 << piece
+    return (_attacks(kind, piece, occupied) >> weak_king) & 1
+
+
+def _weak_moves(kind, strong_king, weak_king, piece):
+    """Yield the weak king's legal destinations; capturing the piece is included."""
+    guarded = KING_ATTACKS[strong_king]
+    for target in _NEIGHBOURS[weak_king]:
+        if target == strong_king or (guarded >> target) & 1:
+            continue
+        if target == piece:
+            yield target  # Capture, legal since the square is not guarded by the king
+            continue
+        occupied = 1 << strong_king | 1 << target | 1 << piece
+        if not (_attacks(kind, piece, occupied) >> target) & 1:
+            yield target
+
+
+def _piece_unmoves(kind, strong_king, weak_king, piece):
+    """Yield the squares the strong piece could have come from to reach `piece`."""
+    occupied = 1 << strong_king | 1 << weak_king | 1 << piece
+    if kind == PAWN:
+        below = piece - 8
+        if below >= 8 and not (occupied >> below) & 1:
+            yield below
+            if 24 <= piece < 32 and not (occupied >> (below - 8)) & 1:
+                yield below - 8
+        return
+    for origin in iter_squares(_attacks(kind, piece, occupied) & ~occupied):
+        yield origin
+
+
+def generate(kind, tables=None):
+    """
+    Build the table for king + piece of `kind` against a lone king.
+
+    Args:
+        kind (int): The strong side's piece kind.
+        tables (dict): Already built tables by kind; KPK needs KQK and KRK for promotions.
+
+    Returns:
+        bytearray: TABLE_SIZE bytes, encoded as described in the module docstring.
+    """
+    table = bytearray(TABLE_SIZE)
+    pending = {}  # Weak-to-move index -> legal moves not yet known to lose
+    levels = [[]]  # levels[n]: positions resolved at distance n plies
+
+    for strong_king in range(64):
+        for weak_king in range(64):
+            for piece in range(64):
+                if not _is_valid(kind, strong_king, weak_king, piece):
+                    table[table_index(True, strong_king, weak_king, piece)] = ILLEGAL
+                    table[table_index(False, strong_king, weak_king, piece)] = ILLEGAL
+                    continue
+                if _weak_in_check(kind, strong_king, weak_king, piece):
+                    table[table_index(True, strong_king, weak_king, piece)] = ILLEGAL
+                index = table_index(False, strong_king, weak_king, piece)
+                moves = sum(1 for _ in _weak_moves(kind, strong_king, weak_king, piece))
+                if moves:
+                    pending[index] = moves
+                elif _weak_in_check(kind, strong_king, weak_king, piece):
+                    table[index] = 1  # Checkmate
+                    levels[0].append(index)
+
+    if kind == PAWN:
+        # Promotions: a push to the last rank reaches a weak-to-move queen or rook ending
+        for strong_king in range(64):
+            for weak_king in range(64):
+                for piece in range(48, 56):
+                    index = table_index(True, strong_king, weak_king, piece)
+                    promotion = piece + 8
+                    if table[index] == ILLEGAL or promotion in (strong_king, weak_king):
+                        continue
+                    best = None
+                    for promoted in (QUEEN, ROOK):
+                        value = tables[promoted][table_index(False, strong_king, weak_king, promotion)]
+                        if value not in (0, ILLEGAL) and (best is None or value < best):
+                            best = value
+                    if best is not None:
+                        while len(levels) <= best:
+                            levels.append([])
+                        levels[best].append(index)  # Candidate win in `best` plies
+
+    distance = 0
+    while distance < len(levels):
+        if distance + 1 == len(levels):
+            levels.append([])
+        for index in levels[distance]:
+            if index >> 18 == 0:
+                # Strong side to move: levels are processed in order, so the first time a
+                # position comes up is its shortest win; later duplicates are skipped.
+                if table[index]:
+                    continue
+                table[index] = distance + 1
+            strong_king, weak_king, piece = index >> 12 & 63, index >> 6 & 63, index & 63
+            if index >> 18:
+                # Weak side to move and lost: every strong move reaching it wins
+                wins = levels[distance + 1]
+                for origin in _NEIGHBOURS[strong_king]:
+                    if origin != weak_king and origin != piece \
+                            and not (KING_ATTACKS[origin] >> weak_king) & 1:
+                        previous = table_index(True, origin, weak_king, piece)
+                        if not table[previous]:  # Skips known wins and impossible positions
+                            wins.append(previous)
+                for origin in _piece_unmoves(kind, strong_king, weak_king, piece):
+                    previous = table_index(True, strong_king, weak_king, origin)
+                    if not table[previous]:
+                        wins.append(previous)
+            else:
+                # Strong side to move and winning: weak moves into it lose once all do
+                guarded = KING_ATTACKS[strong_king]
+                for origin in _NEIGHBOURS[weak_king]:
+                    if origin == strong_king or origin == piece or (guarded >> origin) & 1:
+                        continue
+                    previous = table_index(False, strong_king, origin, piece)
+                    left = pending.get(previous)
+                    if left is None:
+                        continue
+                    if left == 1:
+                        del pending[previous]
+                        table[previous] = distance + 2
+                        levels[distance + 1].append(previous)
+                    else:
+                        pending[previous] = left - 1
+        levels[distance] = None  # Free the level once it is processed
+        distance += 1
+        if not any(levels[distance:]):
+            break
+    return table
+
+
+def generate_all(directory, names=('KQK', 'KRK', 'KPK')):
+    """Generate tables into `directory` as <name>.tb files; returns the paths written."""
+    os.makedirs(directory, exist_ok=True)
+    built, paths = {}, []
+    order = sorted(names, key=lambda name: TABLES[name] == PAWN)  # KPK after KQK and KRK
+    for name in order:
+        kind = TABLES[name]
+        if kind == PAWN:
+            for needed in (QUEEN, ROOK):
+                if needed not in built:
+                    built[needed] = generate(needed)
+        built[kind] = generate(kind, built)
+        path = os.path.join(directory, f"{name}.tb")
+        with open(path, 'wb') as f:
+            f.write(built[kind])
+        paths.append(path)
+    return paths
+
+
+class Tablebase:
+    """Memory-mapped tables from a directory of <name>.tb files, probed by Board position."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.tables = {}
+        for name, kind in TABLES.items():
+            path = os.path.join(directory, f"{name}.tb")
+            if os.path.exists(path) and os.path.getsize(path) == TABLE_SIZE:
+                with open(path, 'rb') as f:
+                    self.tables[kind] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def covers(self, board):
+        """Check whether the board's material has a table."""
+        return self._lookup(board) is not None
+
+    def _lookup(self, board):
+        if popcount(board.occupancy[0] | board.occupancy[1]) != 3:
+            return None
+        strong = 0 if popcount(board.occupancy[0]) == 2 else 1
+        pieces = board.pieces[strong]
+        for kind in range(5):
+            if pieces[kind]:
+                break
+        else:
+            return None
+        table = self.tables.get(kind)
+        if table is None:
+            return None
+        flip = 56 if strong else 0  # Mirror so the strong side plays up the board
+        piece = (pieces[kind].bit_length() - 1) ^ flip
+        index = table_index(COLOR_INDEX[board.turn] == strong, board.king_squares[strong] ^ flip,
+                            board.king_squares[1 - strong] ^ flip, piece)
+        return table[index], index
+
+    def probe(self, board):
+        """
+        Return the TablebaseResult for the side to move, or None if the position is not
+        covered (other material, or an impossible position). Castling rights and the
+        fifty-move rule are not taken into account.
+        """
+        found = self._lookup(board)
+        if found is None:
+            return None
+        value, index = found
+        if value == ILLEGAL:
+            return None
+        if value == 0:
+            return TablebaseResult(DRAW, None)
+        return TablebaseResult(LOSS if index >> 18 else WIN, value - 1)
+
+    def best_move(self, board):
+        """Return the move that keeps the best result for the side to move, fastest mate
+        first when winning and longest resistance when losing, or None if not covered."""
+        result = self.probe(board)
+        if result is None:
+            return None
+        best, best_key = None, None
+        for move in board.generate_legal_moves(board.turn):
+            board.make_move(move)
+            try:
+                reply = self.probe(board)
+            finally:
+                board.unmake_move()
+            if reply is None:  # Captured down to two kings
+                key = (0, 0)
+            elif reply.wdl == DRAW:
+                key = (0, 0)
+            elif reply.wdl == LOSS:  # The opponent loses: mate as fast as possible
+                key = (2, -reply.dtm)
+            else:
+                key = (-2, reply.dtm)
+            if best_key is None or key > best_key:
+                best, best_key = move, key
+        return best
+
+    def close(self):
+        for table in self.tables.values():
+            table.close()
+
+
+_tablebase = None
+_tablebase_lock = threading.Lock()
+
+
+def tablebase():
+    """Return the process-wide Tablebase from CHESS_TABLEBASES, or None if none is configured."""
+    global _tablebase
+    directory = os.environ.get('CHESS_TABLEBASES')
+    if not directory or not os.path.isdir(directory):
+        return None
+    if _tablebase is None or _tablebase.directory != directory:
+        with _tablebase_lock:
+            if _tablebase is None or _tablebase.directory != directory:
+                _tablebase = Tablebase(directory)
+    return _tablebase
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate endgame tablebases.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    build = commands.add_parser('generate', help='generate tables into a directory')
+    build.add_argument('directory')
+    build.add_argument('names', nargs='*', metavar='NAME',
+                       help=f"tables to build, of {' '.join(sorted(TABLES))} (default: all)")
+    args = parser.parse_args(argv)
+    # Checked here rather than with choices=, which argparse also applies to the default list
+    unknown = [name for name in args.names if name not in TABLES]
+    if unknown:
+        parser.error(f"unknown table(s): {', '.join(unknown)} (choose from {', '.join(sorted(TABLES))})")
+    for path in generate_all(args.directory, args.names or sorted(TABLES)):
+        print(f"wrote {path}")
+
+
+if __name__ == '__main__':
+    main()
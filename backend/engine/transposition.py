@@ -0,0 +1,138 @@
+"""
+This module is the transposition table: a fixed-size, array-backed cache of search results
+keyed by the Board's Zobrist hash, shared by every game in the process.
+
+The table is two flat arrays of 64-bit words, sized from a megabyte budget. Each bucket
+holds two entries: a depth-preferred slot, replaced only by a search at least as deep or
+by any search once the entry is stale, and an always-replace slot that takes everything
+else. An entry packs its best move, depth, score, bound type and search generation into
+one word; the key is stored XORed with that word, so an entry torn by a concurrent write
+fails verification instead of being misread. That also lets worker processes share one
+table placed in shared memory (see engine.parallel).
+"""
+import os
+import threading
+from collections import namedtuple
+
+from board.movegen import pack_move, unpack_move
+from metrics import METRICS
+
+EXACT, LOWER, UPPER, NO_SCORE = range(4)  # Bound types; NO_SCORE entries carry only a move
+TERMINAL_DEPTH = 255  # Depth of entries for positions without legal moves
+
+ENTRY_BYTES = 16  # 8 for the key, 8 for the packed data
+BUCKET_SLOTS = 2
+DEFAULT_SIZE_MB = 16
+
+_SCORE_BIAS = 1 << 31
+_GENERATION_MASK = 0x3F
+
+TTEntry = namedtuple('TTEntry', 'move depth score bound')
+
+
+class TranspositionTable:
+    """Fixed-size hash table of (best move, depth, score, bound) keyed by position hash."""
+
+    def __init__(self, size_mb=DEFAULT_SIZE_MB, buffer=None):
+        """
+        Args:
+            size_mb (float): Memory budget in megabytes; the table never grows past it.
+            buffer: Zero-filled writable buffer of at least table_bytes(size_mb) bytes to
+                hold the entries, e.g. shared memory; a private one is allocated when None.
+        """
+        self.buckets = max(1, int(size_mb * 1024 * 1024) // (ENTRY_BYTES * BUCKET_SLOTS))
+        slots = self.buckets * BUCKET_SLOTS
+        self.buffer = bytearray(table_bytes(size_mb)) if buffer is None else buffer
+        words = memoryview(self.buffer).cast('B')[:slots * ENTRY_BYTES].cast('Q')
+        self.keys = words[:slots]
+        self.data = words[slots:]
+        self.generation = 0
+
+    def new_search(self):
+        """Start a new search generation, so entries from older searches become replaceable."""
+        self.generation = (self.generation + 1) & _GENERATION_MASK
+
+    def clear(self):
+        """Drop every entry."""
+        raw = memoryview(self.buffer).cast('B')
+        raw[:] = bytes(len(raw))
+
+    def probe(self, key):
+        """Return the TTEntry stored for a position hash, or None."""
+        index = key % self.buckets * BUCKET_SLOTS
+        keys, data = self.keys, self.data
+        for slot in (index, index + 1):
+            word = data[slot]
+            if word and keys[slot] ^ word == key:
+                if METRICS.enabled:
+                    METRICS.incr('tt_hits')
+                move = word & 0xFFFF
+                return TTEntry(unpack_move(move) if move else None, word >> 16 & 0xFF,
+                               (word >> 32) - _SCORE_BIAS, word >> 24 & 0x3)
+        if METRICS.enabled:
+            METRICS.incr('tt_misses')
+        return None
+
+    def store(self, key, move, depth, score, bound):
+        """
+        Record a search result for a position hash.
+
+        Args:
+            key (int): The position's Zobrist hash.
+            move (Move): Best move found, or None.
+            depth (int): Remaining depth the result was searched to (TERMINAL_DEPTH for
+                positions without legal moves).
+            score (int): Score for the side to move; mate scores must be relative to
+                this position rather than to the search root.
+            bound (int): EXACT, LOWER (fail high), UPPER (fail low) or NO_SCORE.
+        """
+        index = key % self.buckets * BUCKET_SLOTS
+        keys, data = self.keys, self.data
+        word = (min(max(depth, 0), TERMINAL_DEPTH) << 16 | bound << 24 | self.generation << 26
+                | (score + _SCORE_BIAS) << 32)
+        if move is not None:
+            word |= pack_move(move)  # No move packs to 0: a move never goes from a1 to a1
+
+        deep = data[index]
+        if not deep or keys[index] ^ deep == key or depth >= (deep >> 16 & 0xFF) \
+                or (deep >> 26 & _GENERATION_MASK) != self.generation:
+            slot = index
+        else:
+            slot = index + 1
+        old = data[slot]
+        if move is None and old and keys[slot] ^ old == key:
+            word |= old & 0xFFFF  # Keep the best move already known for this position
+        data[slot] = word
+        keys[slot] = key ^ word
+
+
+def table_bytes(size_mb):
+    """Return the number of bytes a table with the given budget occupies."""
+    buckets = max(1, int(size_mb * 1024 * 1024) // (ENTRY_BYTES * BUCKET_SLOTS))
+    return buckets * BUCKET_SLOTS * ENTRY_BYTES
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def table_size_mb():
+    """Return the configured table budget: CHESS_TT_MB, default 16."""
+    return float(os.environ.get('CHESS_TT_MB', DEFAULT_SIZE_MB))
+
+
+def shared_table():
+    """Return the process-wide table, created on first use unless installed with set_shared_table."""
+    global _shared
+    if _shared is None:
+        with _shared_lock:
+            if _shared is None:
+                _shared = TranspositionTable(table_size_mb())
+    return _shared
+
+
+def set_shared_table(table):
+    """Make `table` the process-wide table, e.g. one backed by memory shared between workers."""
+    global _shared
+    with _shared_lock:
+        _shared = table
@@ -0,0 +1,101 @@
+"""
+This module is the application's logging layer: JSON-lines records with levels, optional
+sampling of high-volume loggers, and a trace switch for per-square move-generation tracing.
+
+Configuration comes from the environment when configure() is called without arguments:
+
+    CHESS_LOG_LEVEL   minimum level, e.g. DEBUG, INFO (default), WARNING
+    CHESS_LOG_SAMPLE  fraction (0..1] of sampled records to keep, default 1
+    CHESS_TRACE       1 to enable hot-path tracing (off by default)
+
+Hot-path call sites guard their logging with ``if TRACE.enabled:``, so when tracing is off
+they pay for one attribute read and never build a message.
+"""
+import json
+import logging
+import os
+import random
+import sys
+
+
+class _TraceSwitch:
+    """Process-wide flag checked by hot-path code before emitting trace records."""
+    __slots__ = ('enabled',)
+
+    def __init__(self):
+        self.enabled = False
+
+
+TRACE = _TraceSwitch()
+
+ROOT_LOGGER = 'chess'
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats each record as one JSON object, including any fields passed via extra={'fields': ...}."""
+
+    def format(self, record):
+        entry = {
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        fields = getattr(record, 'fields', None)
+        if fields:
+            entry.update(fields)
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps a random fraction of records below WARNING; warnings and errors always pass."""
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return record.levelno >= logging.WARNING or self.rate >= 1 or random.random() < self.rate
+
+
+def get_logger(name):
+    """Return the logger for a component, namespaced under 'chess'."""
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+def configure(level=None, sample_rate=None, trace=None, stream=None):
+    """
+    Install the JSON handler on the 'chess' logger.
+
+    Args:
+        level (str|int): Minimum level; defaults to CHESS_LOG_LEVEL or INFO.
+        sample_rate (float): Fraction of sub-WARNING records kept from sampled loggers
+            (currently 'chess.requests'); defaults to CHESS_LOG_SAMPLE or 1.
+        trace (bool): Enable hot-path tracing (logged at DEBUG); defaults to CHESS_TRACE.
+        stream: Output stream, stderr by default.
+    """
+    level = level or os.environ.get('CHESS_LOG_LEVEL', 'INFO')
+    sample_rate = float(os.environ.get('CHESS_LOG_SAMPLE', 1) if sample_rate is None else sample_rate)
+    if trace is None:
+        trace = os.environ.get('CHESS_TRACE', '') not in ('', '0', 'false', 'False')
+    TRACE.enabled = bool(trace)
+
+    root = logging.getLogger(ROOT_LOGGER)
+    root.setLevel(logging.DEBUG if TRACE.enabled else level)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler.setFormatter(JsonFormatter())
+    root.addHandler(handler)
+    root.propagate = False
+
+    requests_logger = get_logger('requests')
+    for existing in list(requests_logger.filters):
+        if isinstance(existing, SamplingFilter):
+            requests_logger.removeFilter(existing)
+    if sample_rate < 1:
+        requests_logger.addFilter(SamplingFilter(sample_rate))
+    return root
+
@@ -1,29 +1,155 @@
 """
 This module sets up the Flask application and defines routes for a chess game backend.
 It handles game state and player actions.
+
+Games live in a GameRegistry keyed by game ID, so one process hosts many concurrent games.
+The original /move, /board and /reset routes act on a single game with the ID 'default'.
 """
 
-from flask import Flask, request, jsonify
+import base64
+import cProfile
+import io
+import marshal
+import math
+import os
+import pstats
+
+from flask import Flask, Response, g, request, jsonify
 from flask_cors import CORS
-from player.player import Player
-from player.chess_rules import ChessRules
 from board.board import Board
+from board.movegen import LETTER_PROMOTIONS
+from board.pgn import apply_moves
+from engine.book import opening_book
+from engine.parallel import PoolBusy, analysis_pool
+from engine.search import SearchResult
+from logger import configure, get_logger
+from player.chess_rules import ChessRules
+from metrics import METRICS, configure as configure_metrics, profiling_allowed
+from server.registry import GameRegistry, NotYourTurn
+from server.store import GameConflict, open_store
+
+configure()
+configure_metrics()
+log = get_logger('app')
+request_log = get_logger('requests')  # Sampled via CHESS_LOG_SAMPLE
 
 app = Flask(__name__)
 CORS(app)
 
-player1 = Player('white')
-player2 = Player('black')
-current_player = player1
-game_board = Board()
-rules = ChessRules(game_board)
+DEFAULT_GAME_ID = 'default'
+registry = GameRegistry(ttl_seconds=float(os.environ.get('CHESS_GAME_TTL', 30 * 60)), store=open_store())
 
-@app.route('/move', methods=['POST'])
-def move():
-    """Process a move request from a player and update the game state accordingly."""
-    global current_player
-    data = request.json
-    print("Received data:", data)
+BOARD_FORMATS = ('grid', 'fen', 'packed')
+ENGINE_DEFAULT_MOVETIME_MS = 1000
+ENGINE_MAX_MOVETIME_MS = 10000
+ENGINE_MAX_DEPTH = 32
+MOVE_MESSAGES = {'checkmate': 'Checkmate', 'stalemate': 'Stalemate', 'draw': 'Draw'}
+MAX_BATCH_MOVES = 20000  # Most moves accepted by one batch request, over all its games
+PROFILE_FORMATS = ('pstats', 'text')
+
+
+@app.before_request
+def start_profile():
+    """Profile this request when it asks with ?profile=pstats|text and CHESS_PROFILING allows it."""
+    fmt = request.args.get('profile')
+    if fmt and profiling_allowed():
+        if fmt not in PROFILE_FORMATS:
+            return jsonify({'success': False, 'message': f"'profile' must be one of {', '.join(PROFILE_FORMATS)}"}), 400
+        g.profile_format = fmt
+        g.profiler = cProfile.Profile()
+        g.profiler.enable()
+
+
+@app.after_request
+def finish_profile(response):
+    """Replace a profiled request's body with the profile.
+
+    'pstats' returns the binary dump that pstats, snakeviz or flameprof load; 'text' returns
+    the 50 costliest calls by cumulative time. The original status code is kept, and the
+    response the request would have produced is dropped.
+    """
+    profiler = g.pop('profiler', None)
+    if profiler is None:
+        return response
+    profiler.disable()
+    stats = pstats.Stats(profiler, stream=io.StringIO())
+    if g.pop('profile_format') == 'text':
+        stats.sort_stats('cumulative').print_stats(50)
+        return Response(stats.stream.getvalue(), status=response.status_code, mimetype='text/plain')
+    return Response(marshal.dumps(stats.stats), status=response.status_code, mimetype='application/octet-stream',
+                    headers={'Content-Disposition': 'attachment; filename="request.prof"'})
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Return the hot-path counters and timers in the Prometheus text format (see CHESS_METRICS).
+
+    The numbers are those of the worker process that answers, not of the whole server.
+    """
+    return Response(METRICS.render(), mimetype='text/plain; version=0.0.4')
+
+
+def requested_format(data=None):
+    """Return the board format asked for via ?format= or a JSON 'format' field (default 'grid')."""
+    fmt = request.args.get('format') or (data or {}).get('format') or 'grid'
+    if fmt not in BOARD_FORMATS:
+        raise ValueError(f"Unknown board format: {fmt} (expected one of {', '.join(BOARD_FORMATS)})")
+    return fmt
+
+
+def board_payload(board, fmt):
+    """Return the response fields describing the board in the given format.
+
+    'grid' is the 8x8 list of piece dicts, 'fen' a FEN string and 'packed' the base64 of
+    the compact binary encoding; the latter two are far smaller than the grid.
+    """
+    if fmt == 'fen':
+        return {'fen': board.to_fen()}
+    if fmt == 'packed':
+        return {'packed': base64.b64encode(board.to_packed()).decode('ascii')}
+    return {'board': board.get_board_state()}
+
+
+def board_from_payload(data):
+    """Return a Board for the payload's optional 'fen' start position, or None when it has
+    none. Raises ValueError if the FEN is not a string or is invalid."""
+    fen = data.get('fen')
+    if fen is None or fen == '':
+        return None
+    if not isinstance(fen, str):
+        raise ValueError("'fen' must be a string")
+    return Board.from_fen(fen)
+
+
+def game_not_found(game_id):
+    return jsonify({'success': False, 'message': f'Unknown game: {game_id}'}), 404
+
+
+@app.errorhandler(GameConflict)
+def game_conflict(error):
+    """A worker sharing the game store moved first; the client should reload and retry."""
+    return jsonify({'success': False, 'message': str(error)}), 409
+
+
+@app.errorhandler(NotYourTurn)
+def not_your_turn(error):
+    """The move was for the side that is not to move."""
+    return jsonify({'success': False, 'message': str(error), 'turn': error.turn}), 409
+
+
+def stale_version(session, data):
+    """Return a 409 response if the payload's optional 'version' is not the game's current
+    version (its ply count), otherwise None. Call with the session lock held."""
+    expected = data.get('version')
+    if expected is None or expected == session.ply:
+        return None
+    return jsonify({'success': False, 'message': f'Game is at version {session.ply}, not {expected}',
+                    'version': session.ply, 'fen': session.board.to_fen()}), 409
+
+
+def apply_move(session, data):
+    """Validate and apply the move described by a request payload to a game session."""
+    request_log.debug("move request", extra={'fields': {'game_id': session.game_id, 'payload': data}})
 
     if not data:
         return jsonify({'success': False, 'message': 'No JSON payload provided'}), 400
@@ -31,57 +157,344 @@ def move():
     color = data.get('color')
     start_pos = data.get('start_pos')
     end_pos = data.get('end_pos')
+    promotion = data.get('promotion')
 
     if not (color and start_pos and end_pos):
         return jsonify({'success': False, 'message': 'Missing parameters'}), 400
+    if color not in ('white', 'black'):
+        return jsonify({'success': False, 'message': 'color must be white or black'}), 400
+    if promotion is not None and (not isinstance(promotion, str) or promotion not in LETTER_PROMOTIONS):
+        return jsonify({'success': False, 'message': 'promotion must be one of q, r, b or n'}), 400
 
-    current_player = player1 if color == 'white' else player2
-    print(f"Current player color: {current_player.color}, Move: {start_pos} to {end_pos}")
-
+    game_board = session.board
     try:
+        fmt = requested_format(data)
         game_board.pos_to_index(start_pos)
         game_board.pos_to_index(end_pos)
     except ValueError as e:
         return jsonify({'success': False, 'message': str(e)}), 400
 
-    if current_player.set_move(start_pos, end_pos) and game_board.is_legal_move(start_pos, end_pos, current_player.color):
-        game_board.move_piece(start_pos, end_pos)
-        current_player = player2 if current_player == player1 else player1
-        print(f"Switched to player color: {current_player.color}")
+    with session.lock:
+        conflict = stale_version(session, data)
+        if conflict is not None:
+            return conflict
+        delta = session.play_move(color, start_pos, end_pos, LETTER_PROMOTIONS.get(promotion))
+        if delta is None:
+            return jsonify({'success': False, 'message': 'Invalid move'}), 400
+        request_log.info("move", extra={'fields': {'game_id': session.game_id, 'color': delta['color'],
+                                                   'from': start_pos, 'to': end_pos, 'status': delta['status']}})
 
-        if rules.is_checkmate(current_player.color):
-            return jsonify({'success': True, 'message': 'Checkmate', 'board': game_board.get_board_state()}), 200
-        if rules.is_stalemate(current_player.color):
-            return jsonify({'success': True, 'message': 'Stalemate', 'board': game_board.get_board_state()}), 200
+        message = MOVE_MESSAGES.get(delta['status'], 'Move successful')
+        return jsonify({'success': True, 'message': message, 'version': delta['version'],
+                        'move': delta['move'], 'captured': delta['captured'], 'promotion': delta['promotion'],
+                        'status': delta['status'], 'draw_reason': delta['draw_reason'], 'turn': delta['turn'],
+                        **board_payload(session.board, fmt)}), 200
 
-        return jsonify({
-            'success': True,
-            'message': 'Move successful',
-            'board': game_board.get_board_state()
-        }), 200
-    else:
-        return jsonify({'success': False, 'message': 'Invalid move'}), 400
+
+def board_response(session):
+    try:
+        fmt = requested_format()
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    with session.lock:
+        return jsonify({'version': session.ply, **board_payload(session.board, fmt)})
+
+
+@app.route('/move', methods=['POST'])
+def move():
+    """Process a move request from a player and update the game state accordingly.
+
+    A pawn reaching the last rank promotes to the optional 'promotion' letter (q, r, b or
+    n; queen by default). The response reports the move played, any capture or promotion,
+    and the resulting status, with 'draw_reason' set when the game is drawn.
+
+    The payload may carry 'version', the game version (ply count) the client last saw; the
+    move is then refused with a 409 if the game has moved on since.
+    """
+    return apply_move(registry.get_or_create(DEFAULT_GAME_ID), request.json)
 
 
 @app.route('/board', methods=['GET'])
 def get_board():
     """Return the current state of the board."""
-    return jsonify({'board': game_board.get_board_state()})
+    return board_response(registry.get_or_create(DEFAULT_GAME_ID))
 
 
 @app.route('/reset', methods=['POST'])
 def reset_game():
     """Reset the game to its initial state."""
-    global player1, player2, current_player, game_board
-    player1 = Player('white')
-    player2 = Player('black')
-    current_player = player1
-    game_board = Board()
+    try:
+        fmt = requested_format(request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
 
+    session = registry.create(DEFAULT_GAME_ID)
     return jsonify({
         'success': True,
         'message': 'Game reset successfully',
-        'board': game_board.get_board_state()
+        **board_payload(session.board, fmt)
+    }), 200
+
+
+@app.route('/games', methods=['POST'])
+def create_game():
+    """Start a new game, optionally from a FEN position, and return its ID."""
+    data = request.get_json(silent=True) or {}
+    try:
+        fmt = requested_format(data)
+        board = board_from_payload(data)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+    session = registry.create(board=board)
+    return jsonify({
+        'success': True,
+        'game_id': session.game_id,
+        **board_payload(session.board, fmt)
+    }), 201
+
+
+@app.route('/games/<game_id>/move', methods=['POST'])
+def move_in_game(game_id):
+    """Apply a move to the given game."""
+    session = registry.get(game_id)
+    if session is None:
+        return game_not_found(game_id)
+    return apply_move(session, request.get_json(silent=True))
+
+
+@app.route('/games/<game_id>/board', methods=['GET'])
+def get_game_board(game_id):
+    """Return the board of the given game."""
+    session = registry.get(game_id)
+    if session is None:
+        return game_not_found(game_id)
+    return board_response(session)
+
+
+def move_list(value):
+    """Check that a request's move list is a list of strings, raising ValueError otherwise."""
+    if not isinstance(value, list) or not all(isinstance(text, str) for text in value):
+        raise ValueError("'moves' must be a list of move strings")
+    return value
+
+
+def move_notation(data):
+    notation = data.get('notation', 'uci')
+    if notation not in ('uci', 'san'):
+        raise ValueError("'notation' must be 'uci' or 'san'")
+    return notation
+
+
+@app.route('/games/<game_id>/moves', methods=['POST'])
+def play_moves(game_id):
+    """Apply a list of moves to the given game in one request, for imports and replays.
+
+    Takes JSON {"moves": [...], "notation": "uci" | "san"} (UCI by default). The moves are
+    played in order from the side to move, all or nothing: if one is illegal, the game is
+    left unchanged and its index is returned with a 400. Only the final FEN, status, side
+    to move and version are returned, not the board. An optional 'version' is checked as
+    on /move.
+    """
+    session = registry.get(game_id)
+    if session is None:
+        return game_not_found(game_id)
+    data = request.get_json(silent=True) or {}
+    try:
+        moves = move_list(data.get('moves'))
+        notation = move_notation(data)
+        if len(moves) > MAX_BATCH_MOVES:
+            raise ValueError(f"At most {MAX_BATCH_MOVES} moves per request")
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+    with session.lock:
+        conflict = stale_version(session, data)
+        if conflict is not None:
+            return conflict
+        result = session.play_moves(moves, notation)
+    request_log.info("moves", extra={'fields': {'game_id': game_id, 'count': len(moves),
+                                                'applied': result['applied'], 'status': result['status']}})
+    if result['error'] is not None:
+        return jsonify({'success': False, 'message': result['error'], **result}), 400
+    return jsonify({'success': True, 'message': MOVE_MESSAGES.get(result['status'], 'Moves applied'),
+                    **result}), 200
+
+
+@app.route('/validate-moves', methods=['POST'])
+def validate_moves():
+    """Check the move lists of many games without creating or changing any game.
+
+    Takes JSON {"games": [{"moves": [...], "fen": optional start}, ...], "notation": ...}.
+    Each game is replayed up to its first illegal move; the response has, per game, how
+    many moves were legal, the index of the first illegal one (or null) and the FEN and
+    status reached.
+    """
+    data = request.get_json(silent=True) or {}
+    games = data.get('games')
+    try:
+        if not isinstance(games, list) or not games or not all(isinstance(game, dict) for game in games):
+            raise ValueError("'games' must be a non-empty list of objects")
+        notation = move_notation(data)
+        move_lists = [move_list(game.get('moves')) for game in games]
+        if sum(len(moves) for moves in move_lists) > MAX_BATCH_MOVES:
+            raise ValueError(f"At most {MAX_BATCH_MOVES} moves per request")
+        boards = [board_from_payload(game) or Board() for game in games]
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+    results = []
+    for board, moves in zip(boards, move_lists):
+        applied, error = apply_moves(board, moves, notation)
+        results.append({
+            'applied': applied,
+            'error_index': None if error is None else applied,
+            'error': error,
+            'status': ChessRules(board).status(),
+            'turn': board.turn,
+            'fen': board.to_fen(),
+        })
+    return jsonify({'success': True, 'results': results}), 200
+
+
+@app.route('/games/<game_id>/legal-moves', methods=['GET'])
+def get_legal_moves(game_id):
+    """Return the side to move's legal moves in the given game, as UCI strings and grouped by
+    starting square, together with the game status. `?square=e2` keeps only the moves of
+    the piece on that square. Both are served from the board's per-position cache."""
+    session = registry.get(game_id)
+    if session is None:
+        return game_not_found(game_id)
+    square = request.args.get('square')
+    with session.lock:
+        board = session.board
+        if square:
+            try:
+                board.pos_to_index(square)
+            except ValueError as e:
+                return jsonify({'success': False, 'message': str(e)}), 400
+        moves = [move for move in board.legal_moves() if not square or move.start_pos == square]
+        targets = {}
+        for move in moves:
+            targets.setdefault(move.start_pos, []).append(move.end_pos)
+        return jsonify({
+            'success': True,
+            'turn': board.turn,
+            'status': session.status(),
+            'moves': [move.uci() for move in moves],
+            'targets': targets,
+        }), 200
+
+
+def engine_busy(error):
+    return jsonify({'success': False, 'message': str(error)}), 503, {'Retry-After': '1'}
+
+
+def search_summary(result):
+    """Return the JSON description of a SearchResult."""
+    return {
+        'move': result.move.uci() if result.move is not None else None,
+        'score': result.score,
+        'depth': result.depth,
+        'nodes': result.nodes,
+        'time_ms': result.time_ms,
+        'pv': [move.uci() for move in result.pv],
+    }
+
+
+def engine_budget(data):
+    """Return (depth, movetime_ms) from an engine request, clamped to the server limits."""
+    depth = data.get('depth')
+    movetime_ms = data.get('movetime_ms')
+    try:
+        depth = min(int(depth), ENGINE_MAX_DEPTH) if depth is not None else None
+        movetime_ms = float(movetime_ms) if movetime_ms is not None else None
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError("depth and movetime_ms must be numbers") from None
+    if movetime_ms is not None and not math.isfinite(movetime_ms):
+        raise ValueError("movetime_ms must be finite")  # NaN would never end the search
+    if (depth is not None and depth < 1) or (movetime_ms is not None and movetime_ms <= 0):
+        raise ValueError("depth and movetime_ms must be positive")
+    if movetime_ms is None and depth is None:
+        movetime_ms = ENGINE_DEFAULT_MOVETIME_MS
+    # Every search is bounded in time, even when only a depth is requested
+    return depth, min(movetime_ms or ENGINE_MAX_MOVETIME_MS, ENGINE_MAX_MOVETIME_MS)
+
+
+@app.route('/games/<game_id>/engine-move', methods=['POST'])
+def engine_move(game_id):
+    """Let the engine search and play a move for the side to move in the given game.
+
+    Accepts optional JSON fields 'depth' (plies) and 'movetime_ms'; the engine answers with
+    the best move of the deepest search completed within the budget. The search runs in the
+    analysis worker pool, and a 503 is returned when the pool's queue is full. Positions in
+    the opening book (CHESS_BOOK) are answered from the book without searching.
+    """
+    session = registry.get(game_id)
+    if session is None:
+        return game_not_found(game_id)
+    data = request.get_json(silent=True) or {}
+    try:
+        fmt = requested_format(data)
+        depth, movetime_ms = engine_budget(data)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+    with session.lock:
+        board = session.board
+        delta = None
+        book = opening_book()
+        book_move = book.choose(board) if book is not None else None
+        if book_move is not None:
+            result = SearchResult(book_move, 0, 0, 0, 0.0, [book_move])
+            delta = session.play_move(board.turn, book_move.start_pos, book_move.end_pos, book_move.promotion)
+        if delta is None:  # Not in the book, or the book entry did not fit the position
+            book_move = None
+            try:
+                result = analysis_pool().search(board, depth=depth, movetime_ms=movetime_ms)
+            except PoolBusy as e:
+                return engine_busy(e)
+            if result.move is None:
+                return jsonify({'success': False, 'message': 'Game is over', 'status': session.status()}), 409
+            delta = session.play_move(board.turn, result.move.start_pos, result.move.end_pos, result.move.promotion)
+        log.info("engine move", extra={'fields': {'game_id': game_id, 'move': result.move.uci(),
+                                                  'depth': result.depth, 'nodes': result.nodes,
+                                                  'time_ms': result.time_ms}})
+        return jsonify({
+            'success': True,
+            'message': MOVE_MESSAGES.get(delta['status'], 'Move successful'),
+            'move': delta,
+            'engine': {**search_summary(result), 'book': book_move is not None},
+            **board_payload(board, fmt)
+        }), 200
+
+
+@app.route('/analyse', methods=['POST'])
+def analyse():
+    """Search a batch of independent positions, given as a JSON list 'positions' of FEN strings.
+
+    Takes the same optional 'depth' and 'movetime_ms' as engine-move, applied to each position.
+    The positions are spread across the analysis worker pool; a batch that does not fit in
+    the pool's queue is rejected with a 503.
+    """
+    data = request.get_json(silent=True) or {}
+    positions = data.get('positions')
+    if not isinstance(positions, list) or not positions or not all(isinstance(fen, str) for fen in positions):
+        return jsonify({'success': False, 'message': "'positions' must be a non-empty list of FEN strings"}), 400
+    try:
+        depth, movetime_ms = engine_budget(data)
+        for fen in positions:
+            Board.from_fen(fen)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+    try:
+        results = analysis_pool().analyse(positions, depth=depth, movetime_ms=movetime_ms)
+    except PoolBusy as e:
+        return engine_busy(e)
+    return jsonify({
+        'success': True,
+        'results': [{'fen': fen, **search_summary(result)} for fen, result in zip(positions, results)],
     }), 200
 
 
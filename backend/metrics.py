@@ -0,0 +1,101 @@
+"""
+This module keeps process-wide counters and timers for the hot paths (move generation,
+attack checks, make/unmake, cache lookups, engine searches) and renders them in the
+Prometheus text exposition format for the /metrics endpoint.
+
+Collection is off unless enabled, from CHESS_METRICS when configure() is called without
+arguments:
+
+    CHESS_METRICS     1 to collect counters and timers (off by default)
+    CHESS_PROFILING   1 to allow per-request cProfile dumps (off by default)
+
+Like tracing in the logger module, hot-path call sites guard their bookkeeping with
+``if METRICS.enabled:``, so a disabled counter costs one attribute read. Counts are
+updated without a lock and may drop the odd increment under concurrent requests.
+
+The counters are not shared between processes. Under gunicorn each worker keeps its
+own, and /metrics reports those of whichever worker answers the scrape, labelled with
+its pid in a comment. For totals over a deployment, run a single worker or scrape the
+workers one by one.
+"""
+import os
+
+PREFIX = 'chess_'
+
+# Counter name -> help text. Exported as <PREFIX><name>_total.
+COUNTERS = {
+    'movegen_calls': 'Legal move generations.',
+    'attack_checks': 'Attack queries on a square (Board.attackers_to).',
+    'make_move': 'Moves made on a board.',
+    'unmake_move': 'Moves taken back on a board.',
+    'legal_moves_cache_hits': "Legal-move lookups answered from the board's per-position cache.",
+    'legal_moves_cache_misses': 'Legal-move lookups that had to generate the moves.',
+    'tt_hits': 'Transposition table probes that found the position.',
+    'tt_misses': 'Transposition table probes that did not find the position.',
+    'searches': 'Engine searches, counting each position of a batch.',
+    'search_nodes': 'Nodes visited by engine searches, including those of worker processes.',
+}
+
+# Timer name -> help text. Exported as a Prometheus summary: <PREFIX><name>_seconds_{count,sum}.
+TIMERS = {
+    'movegen': 'Time spent generating legal moves.',
+    'search': 'Wall-clock time of engine search requests; a batch counts once.',
+}
+
+
+class Metrics:
+    """Counters and timers for one process; METRICS is the shared instance."""
+    __slots__ = ('enabled', 'counters', 'timers')
+
+    def __init__(self):
+        self.enabled = False
+        self.reset()
+
+    def reset(self):
+        """Set every counter and timer back to zero."""
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.timers = {name: [0, 0.0] for name in TIMERS}  # name -> [observations, total seconds]
+
+    def incr(self, name, amount=1):
+        """Add `amount` to a counter."""
+        self.counters[name] += amount
+
+    def observe(self, name, seconds):
+        """Record one timed operation that took `seconds`."""
+        timer = self.timers[name]
+        timer[0] += 1
+        timer[1] += seconds
+
+    def render(self):
+        """Return every metric in the Prometheus text exposition format (version 0.0.4)."""
+        lines = [f'# Counters of process {os.getpid()} only; other worker processes keep their own.']
+        if not self.enabled:
+            lines.append('# Metrics collection is disabled; set CHESS_METRICS=1 to enable it.')
+        for name, help_text in COUNTERS.items():
+            metric = f'{PREFIX}{name}_total'
+            lines += [f'# HELP {metric} {help_text}', f'# TYPE {metric} counter',
+                      f'{metric} {self.counters[name]}']
+        for name, help_text in TIMERS.items():
+            metric = f'{PREFIX}{name}_seconds'
+            count, total = self.timers[name]
+            lines += [f'# HELP {metric} {help_text}', f'# TYPE {metric} summary',
+                      f'{metric}_count {count}', f'{metric}_sum {total:.6f}']
+        return '\n'.join(lines) + '\n'
+
+
+METRICS = Metrics()
+
+
+def _env_flag(name):
+    return os.environ.get(name, '') not in ('', '0', 'false', 'False')
+
+
+def configure(enabled=None):
+    """Turn collection on or off; defaults to CHESS_METRICS."""
+    METRICS.enabled = _env_flag('CHESS_METRICS') if enabled is None else bool(enabled)
+    return METRICS
+
+
+def profiling_allowed():
+    """Return whether requests may ask for a cProfile dump (CHESS_PROFILING)."""
+    return _env_flag('CHESS_PROFILING')
@@ -1,31 +1,84 @@
+from board.bitboard import BISHOP, KNIGHT, PAWN, QUEEN, ROOK
 from board.board import Board
+from engine.search import MATE_SCORE
+from engine.tablebase import DRAW, LOSS, tablebase
+from engine.transposition import EXACT, NO_SCORE, TERMINAL_DEPTH, shared_table
+
+LIGHT_SQUARES = 0x55AA55AA55AA55AA
+DRAW_REASONS = ('threefold_repetition', 'fifty_move_rule', 'insufficient_material')
 
 
 # chess_rules.py
 class ChessRules:
-    def __init__(self, board):
+    def __init__(self, board, table=None):
         self.board = board
+        self.table = table if table is not None else shared_table()
 
     def is_stalemate(self, color):
         """Check if the current player's king is not in check but the player has no legal moves."""
         if self.is_in_check(color):
             return False
-        all_pieces = self.board.get_all_pieces(color)
-        return not any(self.board.can_move_piece(piece.position_x, piece.position_y) for piece in all_pieces)
+        result = self.tablebase_result(color)
+        if result is not None and result.wdl != DRAW:
+            return False
+        return not self.has_legal_moves(color)
 
 
     def is_checkmate(self, color):
         """Check if the current player's king is in check and has no legal moves."""
         if not self.is_in_check(color):
             return False
-        all_pieces = self.board.get_all_pieces(color)
-        return not any(self.board.can_move_piece(x, y) for piece in all_pieces for x, y in [(piece.position_x, piece.position_y)])
+        result = self.tablebase_result(color)
+        if result is not None:
+            return result.wdl == LOSS and result.dtm == 0
+        return not self.has_legal_moves(color)
+
+    def tablebase_result(self, color):
+        """Return the endgame tablebase's TablebaseResult for `color` when it is to move in a
+        position the tables cover (see CHESS_TABLEBASES), otherwise None."""
+        tables = tablebase()
+        if tables is None or color != self.board.turn:
+            return None
+        return tables.probe(self.board)
+
+    def has_legal_moves(self, color):
+        """Check if the given color has any legal move, answering from the transposition table
+        when the side to move's position has been seen before, in this game or another."""
+        board = self.board
+        if color != board.turn:
+            return bool(board.legal_moves(color))
+        moves = board.position_cache.get('legal_moves')
+        if moves is not None:
+            return bool(moves)
+        entry = self.table.probe(board.hash)
+        if entry is not None:
+            # Only positions without legal moves are stored at TERMINAL_DEPTH. Other entries
+            # can lack a move (a search that failed low), so the move alone proves nothing.
+            return entry.depth != TERMINAL_DEPTH
+        moves = board.legal_moves()
+        if moves:
+            self.table.store(board.hash, moves[0], 0, 0, NO_SCORE)
+        else:
+            score = -MATE_SCORE if board.is_king_in_check(color) else 0
+            self.table.store(board.hash, None, TERMINAL_DEPTH, score, EXACT)
+        return bool(moves)
 
     def is_draw_by_insufficient_material(self):
-        # Check for a draw by insufficient material
-        pieces = self.board.get_all_pieces()
-        non_king_pieces = [p for p in pieces if type(p).__name__ != 'King']
-        return len(non_king_pieces) <= 2 and all(type(p).__name__ in ['Bishop', 'Knight'] for p in non_king_pieces)
+        """Check that neither side can ever mate: bare kings, a single minor piece, or only
+        bishops that all stand on squares of the same color. Reads the board's material
+        counters, so it costs the same whatever the position."""
+        white, black = self.board.material
+        if white[PAWN] or black[PAWN] or white[ROOK] or black[ROOK] or white[QUEEN] or black[QUEEN]:
+            return False
+        knights = white[KNIGHT] + black[KNIGHT]
+        if knights + white[BISHOP] + black[BISHOP] <= 1:
+            return True
+        if knights:
+            return False
+        pieces = self.board.pieces
+        bishops = pieces[0][BISHOP] | pieces[1][BISHOP]
+        light = bishops & LIGHT_SQUARES
+        return light == 0 or light == bishops
 
     def is_threefold_repetition(self):
         # Check if current position has occurred three times
@@ -33,20 +86,48 @@ class ChessRules:
         return position_count >= 3
 
     def is_fifty_move_rule(self):
-        # Check if the last fifty moves involved no pawn moves or captures
-        return self.board.no_capture_or_pawn_move_count >= 50
+        # Check if the last fifty moves of each side (100 plies) involved no pawn moves or captures
+        return self.board.no_capture_or_pawn_move_count >= 100
 
     def is_in_check(self, color):
         return self.board.is_king_in_check(color)
 
+    def draw_reason(self):
+        """Return which of DRAW_REASONS applies to the current position, or None."""
+        if self.is_threefold_repetition():
+            return 'threefold_repetition'
+        if self.is_fifty_move_rule():
+            return 'fifty_move_rule'
+        if self.is_draw_by_insufficient_material():
+            return 'insufficient_material'
+        return None
+
+    def is_draw(self):
+        """Check for a draw by threefold repetition, the fifty-move rule or insufficient material."""
+        return self.draw_reason() is not None
+
+    def status(self):
+        """Return the state of the game for the side to move: 'checkmate', 'stalemate', 'draw',
+        'check' or 'ongoing'. It is worked out once per position and cached on the board."""
+        cache = self.board.position_cache
+        status = cache.get('status')
+        if status is None:
+            color = self.board.turn
+            if self.is_checkmate(color):
+                status = 'checkmate'
+            elif self.is_stalemate(color):
+                status = 'stalemate'
+            elif self.is_draw():
+                status = 'draw'
+            elif self.is_in_check(color):
+                status = 'check'
+            else:
+                status = 'ongoing'
+            cache['status'] = status
+        return status
+
 
 
     def can_move_piece(self, piece, x, y):
         """Check if the piece at position (x, y) can make any legal moves."""
-        for dx in range(-8, 9):
-            for dy in range(-8, 9):
-                nx, ny = x + dx, y + dy
-                if self.is_within_bounds(nx, ny):
-                    if piece.is_valid_move(x, y, nx, ny, self):
-                        return True
-        return False
+        return self.board.can_move_piece(x, y)
@@ -1,6 +1,9 @@
 from board.board import Board
+from logger import get_logger
 from .player import Player
 
+log = get_logger('game')
+
 class Game:
     def __init__(self):
         self.board = Board()
@@ -16,7 +19,7 @@ class Game:
             self.make_move()
             self.game_over = self.is_game_over()
             if self.game_over:
-                print("Game over. Resetting the game.")
+                log.info("Game over. Resetting the game.")
                 self.reset_game()
 
     def make_move(self):
@@ -46,4 +49,4 @@ class Game:
         self.players = [Player('white'), Player('black')]  # Reinitialize players
         self.current_player_index = 0
         self.game_over = False
-        print("Game has been reset. New game can start.")
+        log.info("Game has been reset. New game can start.")
@@ -0,0 +1,333 @@
+"""
+This module keeps the games hosted by one server process.
+
+Each game lives in a GameSession holding its own Board, ChessRules, players and lock, so
+requests for different games never contend. The GameRegistry maps game IDs to sessions
+and evicts games that have been idle for longer than its TTL.
+
+Every game and accepted move is logged in a store (see server.store). A MemoryStore keeps
+the log in this process. With a GameStore it goes to disk, and a game that is not in
+memory, after a restart or an eviction, is loaded from the store when it is next
+requested. Several worker processes can share one store: each request first brings the
+game up to date with moves the other workers logged, and a move that loses a race with
+another worker raises GameConflict instead of being applied.
+
+Listeners added with GameRegistry.add_listener hear about every change to a game, whoever
+made it, so the WebSocket server can push moves played over HTTP:
+
+    listener(session, 'move', delta)   a single move was played; delta as from play_move
+    listener(session, 'sync', None)    the game changed in some other way (a batch of
+                                       moves, a reset, or moves caught up from the store)
+
+They are called with the session lock held and should return quickly.
+"""
+import threading
+import time
+import uuid
+
+from board.board import Board
+from board.movegen import PROMOTION_LETTERS
+from board.pgn import apply_moves
+from player.chess_rules import ChessRules
+from player.player import Player
+from server.store import GameConflict, MemoryStore, new_epoch
+
+
+class NotYourTurn(Exception):
+    """Raised when a move is submitted for the side that is not to move."""
+
+    def __init__(self, color, turn):
+        super().__init__(f"Not your turn: {turn} to move")
+        self.color = color
+        self.turn = turn
+
+
+class GameSession:
+    """A single game: its board, rules, players and the lock serializing access to them."""
+
+    def __init__(self, game_id, board=None, store=None, ply=0, epoch=None, listener=None):
+        self.game_id = game_id
+        self.board = board if board is not None else Board()
+        self.ply = ply  # Moves played in the game, including those before a restored snapshot
+        self.epoch = epoch or new_epoch()  # With ply, the game's version in the store
+        if store is None:  # A session on its own keeps its log to itself
+            store = MemoryStore()
+            store.create_game(game_id, self.epoch, self.board.to_fen())
+        self.store = store
+        self.rules = ChessRules(self.board)
+        self.players = {'white': Player('white'), 'black': Player('black')}
+        self.listener = listener  # Called as listener(session, event, delta) after each change
+        self.lock = threading.RLock()
+        self.last_access = time.monotonic()
+
+    def _notify(self, event, delta=None):
+        if self.listener is not None:
+            self.listener(self, event, delta)
+
+    def status(self):
+        """Return the state of the game for the side to move: 'checkmate', 'stalemate', 'draw', 'check' or 'ongoing'."""
+        return self.rules.status()
+
+    def draw_reason(self):
+        """Return why the game is drawn ('threefold_repetition', 'fifty_move_rule' or
+        'insufficient_material'), or None if it is not."""
+        return self.rules.draw_reason() if self.status() == 'draw' else None
+
+    def play_move(self, color, start_pos, end_pos, promotion=None):
+        """
+        Validate and apply a move for the given color, promoting to the piece kind
+        `promotion` (a queen by default) when a pawn reaches the last rank.
+
+        Returns:
+            dict: The move delta (from, to, UCI move, color, captured piece type, promotion
+            letter, status, draw reason, side to move, FEN and version), or None if the move
+            is malformed or illegal.
+
+        Raises:
+            NotYourTurn: If `color` is not the side to move.
+            GameConflict: If another process sharing the store moved first; the game has
+                been brought up to date and the move was not applied.
+        """
+        with self.lock:
+            if color != self.board.turn:
+                raise NotYourTurn(color, self.board.turn)
+            player = self.players.get(color)
+            if player is None or not player.set_move(start_pos, end_pos):
+                return None
+            if not self.board.move_piece(start_pos, end_pos, color, promotion):
+                return None
+            self._log_moves(1)
+            captured = self.board.last_captured()
+            played = self.board.move_stack[-1]
+            delta = {
+                'from': start_pos,
+                'to': end_pos,
+                'move': played.uci(),
+                'color': color,
+                'captured': type(captured).__name__ if captured is not None else None,
+                'promotion': PROMOTION_LETTERS.get(played.promotion),
+                'status': self.status(),
+                'draw_reason': self.draw_reason(),
+                'turn': self.board.turn,
+                'fen': self.board.to_fen(),
+                'version': self.ply,
+            }
+            self._notify('move', delta)
+            return delta
+
+    def play_moves(self, moves, notation='uci'):
+        """
+        Validate and apply a list of moves, alternating sides from the side to move, as one
+        all-or-nothing step: if any move is illegal, none of them is kept.
+
+        Args:
+            moves (list): Move strings, in the notation given ('uci' or 'san').
+
+        Returns:
+            dict: 'applied' (moves played), 'error_index' and 'error' (the first rejected
+            move's index and the reason, or None), and the resulting status, draw reason,
+            side to move, FEN and version.
+
+        Raises:
+            GameConflict: As play_move.
+        """
+        with self.lock:
+            applied, error = apply_moves(self.board, moves, notation)
+            error_index = None
+            if error is not None:
+                self._take_back(applied)
+                error_index, applied = applied, 0
+            elif applied:
+                self._log_moves(applied)
+                self._notify('sync')
+            return {
+                'applied': applied,
+                'error_index': error_index,
+                'error': error,
+                'status': self.status(),
+                'draw_reason': self.draw_reason(),
+                'turn': self.board.turn,
+                'fen': self.board.to_fen(),
+                'version': self.ply,
+            }
+
+    def _log_moves(self, count):
+        """Write the last `count` moves to the store, taking them back if that fails."""
+        try:
+            self.store.append_moves(self.game_id, self.epoch, self.ply + count, self.board, count).result()
+        except Exception as e:
+            self._take_back(count)  # Keep the board in step with the log
+            if isinstance(e, GameConflict):
+                self.refresh()
+            raise
+        self.ply += count
+
+    def refresh(self):
+        """
+        Bring the game up to date with the store, replaying moves that other processes
+        sharing it have logged, or reloading it if it was reset there.
+
+        Returns:
+            bool: False if the game is no longer in the store.
+        """
+        with self.lock:
+            state = self.store.state(self.game_id)
+            if state is None:
+                return False
+            epoch, ply = state
+            if epoch == self.epoch and ply == self.ply:
+                return True
+            if epoch == self.epoch and ply > self.ply:
+                for move in self.store.moves_since(self.game_id, self.ply):
+                    self.board.make_move(move)
+                    self.board.update_position_history()
+                    self.ply += 1
+                self._notify('sync')
+                return True
+            loaded = self.store.load(self.game_id)
+            if loaded is None:
+                return False
+            self.board, self.ply, self.epoch = loaded
+            self.rules = ChessRules(self.board)
+            self._notify('sync')
+            return True
+
+    def _take_back(self, count=1):
+        board = self.board
+        for _ in range(count):
+            board.position_history[board.current_position()] -= 1
+            board.unmake_move()
+
+    def touch(self, now=None):
+        """Record that the game was just used."""
+        self.last_access = time.monotonic() if now is None else now
+
+
+class GameRegistry:
+    """Thread-safe map of game ID to GameSession with idle-time eviction."""
+
+    def __init__(self, ttl_seconds=30 * 60, sweep_interval=60, clock=time.monotonic, store=None):
+        """
+        Args:
+            ttl_seconds (float): Idle time after which a game is evicted from memory.
+            sweep_interval (float): Minimum time between eviction sweeps.
+            clock (callable): Monotonic time source, replaceable for testing.
+            store: Where games are logged, a GameStore or MemoryStore; a new MemoryStore
+                by default.
+        """
+        self.store = store if store is not None else MemoryStore()
+        self.listeners = []
+        self.ttl_seconds = ttl_seconds
+        self.sweep_interval = sweep_interval
+        self.clock = clock
+        self._games = {}
+        self._lock = threading.Lock()
+        self._last_sweep = clock()
+
+    def add_listener(self, listener):
+        """Have `listener` called for every change to any game (see the module docstring)."""
+        self.listeners.append(listener)
+
+    def _notify(self, session, event, delta):
+        for listener in self.listeners:
+            listener(session, event, delta)
+
+    def _session(self, game_id, board=None, ply=0, epoch=None):
+        return GameSession(game_id, board, self.store, ply, epoch, listener=self._notify)
+
+    def create(self, game_id=None, board=None):
+        """Create and register a new game, replacing any game with the same ID."""
+        session = self._session(game_id or uuid.uuid4().hex, board)
+        session.touch(self.clock())
+        self.store.create_game(session.game_id, session.epoch,
+                               board.to_fen() if board is not None else None).result()
+        with self._lock:
+            self._games[session.game_id] = session
+        with session.lock:
+            session._notify('sync')  # Clients watching a game with this ID see it start afresh
+        self._maybe_sweep()
+        return session
+
+    def get(self, game_id):
+        """Return the session for game_id, or None if it does not exist or has been evicted
+        (and is not in the store)."""
+        self._maybe_sweep()
+        with self._lock:
+            session = self._games.get(game_id)
+        if session is not None and not session.refresh():
+            session = self._forget(game_id, session)  # Removed by another process
+        if session is None:
+            session = self._load(game_id)
+        if session is not None:
+            session.touch(self.clock())
+        return session
+
+    def get_or_create(self, game_id):
+        """Return the session for game_id, creating a fresh game if there is none."""
+        with self._lock:
+            session = self._games.get(game_id)
+        if session is not None and not session.refresh():
+            session = self._forget(game_id, session)
+        if session is None:
+            session = self._load(game_id)
+        if session is None:
+            created = None
+            with self._lock:
+                session = self._games.get(game_id)
+                if session is None:
+                    session = self._games[game_id] = self._session(game_id)
+                    # Queued under the lock, so it precedes any move
+                    created = self.store.create_game(game_id, session.epoch)
+            if created is not None:
+                created.result()
+        session.touch(self.clock())
+        return session
+
+    def _load(self, game_id):
+        """Restore a game from the store into memory; None if it is not stored."""
+        loaded = self.store.load(game_id)
+        if loaded is None:
+            return None
+        board, ply, epoch = loaded
+        with self._lock:  # Another request may have loaded the game meanwhile
+            return self._games.setdefault(game_id, self._session(game_id, board, ply, epoch))
+
+    def _forget(self, game_id, session):
+        """Drop a session from memory if it is still the registered one; returns None."""
+        with self._lock:
+            if self._games.get(game_id) is session:
+                del self._games[game_id]
+        return None
+
+    def remove(self, game_id):
+        """Drop a game, from the store too; returns True if it existed in memory."""
+        with self._lock:
+            removed = self._games.pop(game_id, None) is not None
+        self.store.delete_game(game_id).result()
+        return removed
+
+    def evict_idle(self):
+        """Remove every game idle for longer than the TTL from memory (a GameStore keeps them,
+        a MemoryStore drops them too) and return how many were removed."""
+        cutoff = self.clock() - self.ttl_seconds
+        with self._lock:
+            expired = [game_id for game_id, session in self._games.items() if session.last_access < cutoff]
+            for game_id in expired:
+                del self._games[game_id]
+        for game_id in expired:
+            self.store.release(game_id)
+        return len(expired)
+
+    def _maybe_sweep(self):
+        now = self.clock()
+        if now - self._last_sweep >= self.sweep_interval:
+            self._last_sweep = now
+            self.evict_idle()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._games)
+
+    def __contains__(self, game_id):
+        with self._lock:
+            return game_id in self._games
@@ -0,0 +1,374 @@
+"""
+This module persists games in SQLite so that they survive a restart and can be read by
+other server processes.
+
+Every accepted move is appended to a log as one small row (game, ply, 16-bit move), and
+every `snapshot_every` plies the position itself is saved, packed (see board.packed)
+together with its repetition history. All writes go through a single writer thread. It
+commits whatever has queued up in one transaction (group commit), so moves in concurrent
+games share one disk sync. The database runs in WAL mode, so reads never wait for it.
+
+Nothing is read at startup. A game is loaded the first time it is requested, from its
+latest snapshot plus the moves logged after it, so restart time does not depend on how
+many games the store holds. A loaded board's move_stack starts at that snapshot.
+
+Several processes may share one database, each keeping the games it serves in memory.
+Writes are optimistic: a game's version is its ply count plus an epoch that changes when
+the game is created or reset, and a move is only logged if its ply is still free in the
+same epoch. A process that loses the race gets GameConflict and catches up with
+state() and moves_since() before trying again.
+
+MemoryStore offers the same interface for games kept in one process only, so the registry
+treats both backends alike.
+
+    CHESS_STATE_BACKEND  'memory' to keep games in this process only (MemoryStore), or
+                         'sqlite' to keep them in the CHESS_STORE database (GameStore);
+                         'sqlite' when CHESS_STORE is set
+    CHESS_STORE          path of the database
+    CHESS_STORE_SYNC     SQLite synchronous level, NORMAL (default) or FULL
+"""
+import atexit
+import os
+import queue
+import sqlite3
+import threading
+import uuid
+from array import array
+from concurrent.futures import Future
+
+from board.board import Board
+from board.movegen import pack_move, unpack_move
+from logger import get_logger
+
+log = get_logger('store')
+
+SNAPSHOT_EVERY = 32  # Plies between position snapshots
+MAX_BATCH = 512  # Most writes committed in one transaction
+SYNCHRONOUS_LEVELS = ('NORMAL', 'FULL')
+BACKENDS = ('memory', 'sqlite')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    game_id TEXT PRIMARY KEY,
+    fen TEXT,                      -- Starting position; NULL for the standard one
+    epoch TEXT NOT NULL            -- Changes whenever the game is created afresh
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS moves (
+    game_id TEXT NOT NULL,
+    ply INTEGER NOT NULL,          -- 1 for the first move of the game
+    move INTEGER NOT NULL,         -- board.movegen.pack_move encoding
+    PRIMARY KEY (game_id, ply)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS snapshots (
+    game_id TEXT PRIMARY KEY,
+    ply INTEGER NOT NULL,          -- Plies played before the position
+    position BLOB NOT NULL,        -- board.packed encoding
+    history BLOB NOT NULL          -- Repetition history: (hash, count) pairs as uint64
+) WITHOUT ROWID;
+"""
+
+
+class GameConflict(Exception):
+    """Raised when a write is based on an outdated version of a game."""
+
+
+def new_epoch():
+    """Return a fresh, unique game epoch."""
+    return uuid.uuid4().hex
+
+
+def _pack_history(history):
+    return array('Q', [value for item in history.items() if item[1] for value in item]).tobytes()
+
+
+def _unpack_history(data):
+    values = array('Q')
+    values.frombytes(data)
+    return dict(zip(values[::2], values[1::2]))
+
+
+def _completed(error=None):
+    """Return a Future that has already finished, failed with `error` if given."""
+    future = Future()
+    if error is None:
+        future.set_result(None)
+    else:
+        future.set_exception(error)
+    return future
+
+
+class MemoryStore:
+    """
+    The GameStore interface for games kept in this process only: each game's starting
+    FEN, epoch and moves. Writes complete at once, and an evicted game is dropped, since
+    no other process could pick it up again.
+    """
+    shared = False  # Other processes cannot see these games
+
+    def __init__(self):
+        self._games = {}  # game_id -> (fen, epoch, list of Moves)
+        self._lock = threading.Lock()
+
+    def create_game(self, game_id, epoch, fen=None):
+        with self._lock:
+            self._games[game_id] = (fen, epoch, [])
+        return _completed()
+
+    def append_moves(self, game_id, epoch, ply, board, count=1):
+        with self._lock:
+            game = self._games.get(game_id)
+            if game is None or game[1] != epoch:
+                return _completed(GameConflict(f"Game {game_id} was reset or removed"))
+            if len(game[2]) != ply - count:
+                return _completed(GameConflict(f"Game {game_id} has moved on"))
+            game[2].extend(board.move_stack[len(board.move_stack) - count:])
+        return _completed()
+
+    def delete_game(self, game_id):
+        with self._lock:
+            self._games.pop(game_id, None)
+        return _completed()
+
+    def release(self, game_id):
+        """Forget a game evicted from memory."""
+        self.delete_game(game_id)
+
+    def flush(self):
+        pass
+
+    def state(self, game_id):
+        with self._lock:
+            game = self._games.get(game_id)
+            return None if game is None else (game[1], len(game[2]))
+
+    def moves_since(self, game_id, ply):
+        with self._lock:
+            game = self._games.get(game_id)
+            return game[2][ply:] if game is not None else []
+
+    def load(self, game_id):
+        with self._lock:
+            game = self._games.get(game_id)
+            if game is None:
+                return None
+            fen, epoch, moves = game[0], game[1], list(game[2])
+        board = Board(fen)
+        for move in moves:
+            board.make_move(move)
+            board.update_position_history()
+        return board, len(moves), epoch
+
+    def close(self):
+        pass
+
+
+class GameStore:
+    """A SQLite-backed, append-only log of games, written by a group-committing thread."""
+    shared = True  # Any process opening the same database sees the same games
+
+    def __init__(self, path, snapshot_every=SNAPSHOT_EVERY, synchronous='NORMAL'):
+        """
+        Args:
+            path (str): Database file; created with its tables if missing.
+            snapshot_every (int): Plies between position snapshots.
+            synchronous (str): SQLite synchronous level for the writer, NORMAL or FULL.
+        """
+        if synchronous not in SYNCHRONOUS_LEVELS:
+            raise ValueError(f"synchronous must be one of {', '.join(SYNCHRONOUS_LEVELS)}")
+        self.path = path
+        self.snapshot_every = snapshot_every
+        self._reader = self._connect(synchronous, check_same_thread=False)
+        self._reader.executescript(SCHEMA)
+        self._read_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, args=(synchronous,),
+                                        name='game-store-writer', daemon=True)
+        self._writer.start()
+
+    def _connect(self, synchronous, check_same_thread=True):
+        db = sqlite3.connect(self.path, isolation_level=None, check_same_thread=check_same_thread)
+        db.execute('PRAGMA journal_mode=WAL')
+        db.execute(f'PRAGMA synchronous={synchronous}')
+        db.execute('PRAGMA busy_timeout=5000')
+        return db
+
+    def _submit(self, kind, *args):
+        """Queue a write; the returned Future resolves once it is committed."""
+        future = Future()
+        self._queue.put((kind, args, future))
+        return future
+
+    def create_game(self, game_id, epoch, fen=None):
+        """Start a game's log afresh under a new epoch, discarding anything stored under the same ID."""
+        return self._submit('create', game_id, epoch, fen)
+
+    def append_moves(self, game_id, epoch, ply, board, count=1):
+        """
+        Log the last `count` moves made on `board`, the last of them as ply `ply` of the
+        game, in one transaction. The resulting position is snapshotted when the moves
+        reach or cross a multiple of `snapshot_every` plies.
+
+        Returns:
+            Future: Resolves when the moves are committed. Fails with GameConflict if the
+            game is no longer at epoch `epoch` or a ply was already logged, as happens when
+            another process moved first, or with sqlite3.Error.
+        """
+        first = ply - count + 1
+        rows = [(game_id, first + index, pack_move(move))
+                for index, move in enumerate(board.move_stack[len(board.move_stack) - count:])]
+        snapshot = None
+        if ply // self.snapshot_every > (first - 1) // self.snapshot_every:
+            snapshot = (game_id, ply, board.to_packed(), _pack_history(board.position_history))
+        return self._submit('moves', epoch, rows, snapshot)
+
+    def delete_game(self, game_id):
+        """Remove a game and its log."""
+        return self._submit('delete', game_id)
+
+    def release(self, game_id):
+        """Called when a game is evicted from memory; it stays in the database."""
+
+    def flush(self):
+        """Block until every write queued so far is committed."""
+        self._submit('flush').result()
+
+    def state(self, game_id):
+        """Return a stored game's version as (epoch, ply), or None if there is no such game."""
+        with self._read_lock:
+            return self._reader.execute(
+                'SELECT epoch, (SELECT COALESCE(MAX(ply), 0) FROM moves WHERE game_id = games.game_id) '
+                'FROM games WHERE game_id = ?', (game_id,)).fetchone()
+
+    def moves_since(self, game_id, ply):
+        """Return the Moves logged for a game after ply `ply`, in order."""
+        with self._read_lock:
+            rows = self._reader.execute('SELECT move FROM moves WHERE game_id = ? AND ply > ? ORDER BY ply',
+                                        (game_id, ply)).fetchall()
+        return [unpack_move(code) for (code,) in rows]
+
+    def load(self, game_id):
+        """
+        Rebuild a stored game from its latest snapshot and the moves logged after it.
+
+        Returns:
+            tuple: (board, ply, epoch), or None if the store has no such game.
+        """
+        self.flush()  # Writes still queued for the game must be visible
+        with self._read_lock:
+            game = self._reader.execute('SELECT fen, epoch FROM games WHERE game_id = ?', (game_id,)).fetchone()
+            if game is None:
+                return None
+            snapshot = self._reader.execute('SELECT ply, position, history FROM snapshots WHERE game_id = ?',
+                                            (game_id,)).fetchone()
+            ply = snapshot[0] if snapshot else 0
+            moves = self._reader.execute('SELECT move FROM moves WHERE game_id = ? AND ply > ? ORDER BY ply',
+                                         (game_id, ply)).fetchall()
+
+        if snapshot:
+            board = Board.from_packed(snapshot[1])
+            board.position_history.clear()
+            board.position_history.update(_unpack_history(snapshot[2]))
+        else:
+            board = Board(game[0])
+        for (code,) in moves:
+            board.make_move(unpack_move(code))
+            board.update_position_history()
+        return board, ply + len(moves), game[1]
+
+    def _apply(self, db, kind, args):
+        if kind == 'create':
+            game_id, epoch, fen = args
+            db.execute('DELETE FROM moves WHERE game_id = ?', (game_id,))
+            db.execute('DELETE FROM snapshots WHERE game_id = ?', (game_id,))
+            db.execute('INSERT OR REPLACE INTO games (game_id, fen, epoch) VALUES (?, ?, ?)', (game_id, fen, epoch))
+        elif kind == 'moves':
+            epoch, rows, snapshot = args
+            changes = db.total_changes
+            try:
+                # Only log into the epoch the moves were made in; a taken ply breaks the key
+                db.executemany('INSERT INTO moves (game_id, ply, move) SELECT ?, ?, ? '
+                               'WHERE EXISTS (SELECT 1 FROM games WHERE game_id = ? AND epoch = ?)',
+                               [(*row, row[0], epoch) for row in rows])
+            except sqlite3.IntegrityError as e:
+                raise GameConflict(f"Game {rows[0][0]} has moved on: {e}") from e
+            if db.total_changes - changes != len(rows):
+                raise GameConflict(f"Game {rows[0][0]} was reset or removed")
+            if snapshot is not None:
+                db.execute('INSERT OR REPLACE INTO snapshots (game_id, ply, position, history) VALUES (?, ?, ?, ?)',
+                           snapshot)
+        elif kind == 'delete':
+            (game_id,) = args
+            for table in ('moves', 'snapshots', 'games'):
+                db.execute(f'DELETE FROM {table} WHERE game_id = ?', (game_id,))
+
+    def _commit(self, db, writes):
+        db.execute('BEGIN IMMEDIATE')  # Take the write lock up front; other processes may share the file
+        try:
+            for kind, args, _ in writes:
+                self._apply(db, kind, args)
+            db.execute('COMMIT')
+        except BaseException:
+            if db.in_transaction:
+                db.execute('ROLLBACK')
+            raise
+
+    def _write_loop(self, synchronous):
+        db = self._connect(synchronous)
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < MAX_BATCH:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            writes = [item for item in batch if item[0] not in ('flush', 'close')]
+            results = {}
+            if writes:
+                try:
+                    self._commit(db, writes)
+                except Exception:
+                    # Commit the writes one by one, so one bad write fails only its own caller.
+                    # Whatever goes wrong, the writer keeps running and every Future resolves.
+                    for write in writes:
+                        try:
+                            self._commit(db, [write])
+                        except GameConflict as e:
+                            results[id(write)] = e
+                        except Exception as e:
+                            log.error("store write failed", extra={'fields': {'kind': write[0], 'error': str(e)}})
+                            results[id(write)] = e
+            for item in batch:
+                error = results.get(id(item))
+                if error is None:
+                    item[2].set_result(None)
+                else:
+                    item[2].set_exception(error)
+            if any(item[0] == 'close' for item in batch):
+                db.close()
+                return
+
+    def close(self):
+        """Commit the queued writes and stop the writer thread."""
+        if self._writer.is_alive():
+            self._submit('close')
+            self._writer.join()
+        self._reader.close()
+
+
+def open_store():
+    """
+    Return the game-state backend chosen by CHESS_STATE_BACKEND: a GameStore on the
+    CHESS_STORE database for 'sqlite', or a MemoryStore for 'memory', where each process
+    keeps its games to itself.
+    """
+    path = os.environ.get('CHESS_STORE')
+    backend = os.environ.get('CHESS_STATE_BACKEND') or ('sqlite' if path else 'memory')
+    if backend not in BACKENDS:
+        raise ValueError(f"CHESS_STATE_BACKEND must be one of {', '.join(BACKENDS)}")
+    if backend == 'memory':
+        return MemoryStore()
+    if not path:
+        raise ValueError("CHESS_STATE_BACKEND=sqlite needs CHESS_STORE, the database path")
+    store = GameStore(path, synchronous=os.environ.get('CHESS_STORE_SYNC', 'NORMAL').upper())
+    atexit.register(store.close)
+    return store
@@ -0,0 +1,179 @@
+"""
+This module is the asyncio WebSocket server mode. Each game has a channel that players and
+spectators join, and every accepted move is pushed to all of them as a small delta rather
+than having clients poll for the whole board.
+
+Run it from the backend directory:
+
+    python -m server.ws --host 0.0.0.0 --port 8765
+
+Protocol (JSON text frames) on ws://<host>:<port>/games/<game_id>[?role=spectator]:
+
+    on connect, server -> client:
+        {"type": "snapshot", "game_id": ..., "fen": ..., "status": ..., "draw_reason": ...,
+         "turn": ..., "version": ..., "moves": [...]}
+    client -> server ("promotion" is optional: q, r, b or n, queen by default):
+        {"type": "move", "color": "white", "start_pos": "e2", "end_pos": "e4", "promotion": "q"}
+    server -> every connection on the game, the same move delta /move reports:
+        {"type": "move", "from": "e2", "to": "e4", "move": "e2e4", "color": "white",
+         "captured": null, "promotion": null, "status": "ongoing", "draw_reason": null,
+         "turn": "black", "fen": ..., "version": 1}
+    server -> sender only, when a message is rejected:
+        {"type": "error", "message": ...}
+    server -> every connection on the game, when it changed other than by a single move
+    (a batch of moves, a reset):
+        a new snapshot
+
+Connecting to an unknown game ID starts a new game with that ID.
+
+The game is looked up in the registry for every message, so a game evicted or reloaded
+in the meantime is picked up again rather than played on a stale copy. Changes are pushed
+from the registry's listener, so moves played over HTTP in the same process reach the
+sockets too. With a shared store (see server.store), the games that have subscribers are
+also refreshed from the store every CHESS_WS_POLL seconds (default 0.5), which pushes the
+moves other processes, such as the HTTP workers, have played. Messages are handled in
+worker threads, since a move waits for the store to commit it, and a slow commit must not
+hold up the other sockets.
+"""
+import argparse
+import asyncio
+import json
+import os
+from urllib.parse import parse_qs, urlsplit
+
+from websockets.asyncio.server import broadcast, serve
+
+from board.movegen import LETTER_PROMOTIONS
+from server.registry import GameRegistry, NotYourTurn
+from server.store import GameConflict, open_store
+
+
+class ChessSocketServer:
+    """Routes WebSocket connections to per-game channels backed by a GameRegistry."""
+
+    def __init__(self, registry=None, poll_interval=None):
+        self.registry = registry if registry is not None else GameRegistry(store=open_store())
+        self.registry.add_listener(self._on_change)
+        self.poll_interval = poll_interval or float(os.environ.get('CHESS_WS_POLL', 0.5))
+        self.channels = {}  # game_id -> set of open connections
+        self.loop = None  # The event loop serving the connections, set when serving starts
+
+    def _on_change(self, session, event, delta):
+        """Registry listener: queue a change for the game's subscribers. May run on any thread."""
+        if self.loop is None or session.game_id not in self.channels:
+            return
+        message = {'type': 'move', **delta} if event == 'move' else self.snapshot(session)
+        self.loop.call_soon_threadsafe(self._publish, session.game_id, json.dumps(message))
+
+    def _publish(self, game_id, text):
+        subscribers = self.channels.get(game_id)
+        if subscribers:
+            broadcast(subscribers, text)
+
+    async def watch_store(self):
+        """Refresh the subscribed games from the store forever, so that moves other
+        processes log are pushed to this process's sockets."""
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            for game_id in list(self.channels):
+                await asyncio.to_thread(self.registry.get, game_id)
+
+    def snapshot(self, session):
+        """Return the message describing a game's current position."""
+        with session.lock:
+            board = session.board
+            return {
+                'type': 'snapshot',
+                'game_id': session.game_id,
+                'fen': board.to_fen(),
+                'status': session.status(),
+                'draw_reason': session.draw_reason(),
+                'turn': board.turn,
+                'version': session.ply,
+                'moves': [move.uci() for move in board.move_stack],
+            }
+
+    def handle_message(self, game_id, role, raw):
+        """
+        Apply one client message to the game. An accepted move reaches the whole channel
+        through the registry listener.
+
+        Returns:
+            dict: An error message for the sender only, or None if the move was played.
+        """
+        try:
+            data = json.loads(raw)
+        except ValueError:
+            return {'type': 'error', 'message': 'Messages must be JSON'}
+        if not isinstance(data, dict) or data.get('type') != 'move':
+            return {'type': 'error', 'message': 'Unsupported message type'}
+        if role == 'spectator':
+            return {'type': 'error', 'message': 'Spectators cannot move'}
+
+        color, start_pos, end_pos = data.get('color'), data.get('start_pos'), data.get('end_pos')
+        promotion = data.get('promotion')
+        if not (color and isinstance(start_pos, str) and isinstance(end_pos, str)):
+            return {'type': 'error', 'message': 'Missing parameters'}
+        if color not in ('white', 'black'):
+            return {'type': 'error', 'message': 'color must be white or black'}
+        if promotion is not None and (not isinstance(promotion, str) or promotion not in LETTER_PROMOTIONS):
+            return {'type': 'error', 'message': 'promotion must be one of q, r, b or n'}
+
+        session = self.registry.get_or_create(game_id)  # Never a session evicted meanwhile
+        try:
+            delta = session.play_move(color, start_pos, end_pos, LETTER_PROMOTIONS.get(promotion))
+        except (GameConflict, NotYourTurn) as e:
+            return {'type': 'error', 'message': str(e)}
+        if delta is None:
+            return {'type': 'error', 'message': 'Invalid move'}
+        return None
+
+    async def handler(self, connection):
+        url = urlsplit(connection.request.path)
+        parts = url.path.strip('/').split('/')
+        if len(parts) != 2 or parts[0] != 'games' or not parts[1]:
+            await connection.close(code=1008, reason='Expected /games/<game_id>')
+            return
+        game_id = parts[1]
+        role = parse_qs(url.query).get('role', ['player'])[0]
+
+        self.loop = asyncio.get_running_loop()
+        subscribers = self.channels.setdefault(game_id, set())
+        subscribers.add(connection)
+        try:
+            # Registry and session calls may wait on the store; keep them off the event loop
+            snapshot = await asyncio.to_thread(lambda: self.snapshot(self.registry.get_or_create(game_id)))
+            await connection.send(json.dumps(snapshot))
+            async for raw in connection:
+                reply = await asyncio.to_thread(self.handle_message, game_id, role, raw)
+                if reply is not None:
+                    await connection.send(json.dumps(reply))
+        finally:
+            subscribers.discard(connection)
+            if not subscribers:
+                self.channels.pop(game_id, None)
+
+
+async def run(host='0.0.0.0', port=8765, registry=None):
+    """Serve WebSocket game channels until cancelled."""
+    server = ChessSocketServer(registry)
+    server.loop = asyncio.get_running_loop()
+    watcher = asyncio.create_task(server.watch_store()) if server.registry.store.shared else None
+    try:
+        async with serve(server.handler, host, port) as ws_server:
+            await ws_server.serve_forever()
+    finally:
+        if watcher is not None:
+            watcher.cancel()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the chess WebSocket server.')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args(argv)
+    asyncio.run(run(args.host, args.port))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+import random
+
+import numpy as np
+import pytest
+
+from board.bitboard import iter_squares
+from board.board import Board
+from board.model.pawn import Pawn
+from engine.batch import (
+    attack_maps, bitboards_to_planes, evaluate_batch, in_check_batch, mobility_batch, planes_to_bitboards,
+    stack_boards
+)
+from engine.evaluation import evaluate
+
+COLORS = ('white', 'black')
+FENS = [
+    '4k3/8/8/8/8/8/4Q3/4K3 b - - 0 1',  # Black in check, white left with a queen: an endgame
+    '4k3/1P6/8/8/8/8/6p1/4K3 w - - 0 1',  # Promotions for both sides
+    'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1',
+]
+
+
+@pytest.fixture(scope='module')
+def boards():
+    """Positions from a few random games, plus some set up by FEN."""
+    rng = random.Random(11)
+    positions = [Board.from_fen(fen) for fen in FENS]
+    for _ in range(4):
+        board = Board()
+        for _ in range(160):
+            moves = board.generate_legal_moves(board.turn)
+            if not moves:
+                break
+            board.make_move(rng.choice(moves))
+            positions.append(Board.from_fen(board.to_fen()))
+    return positions
+
+
+def pseudo_legal_moves(board, color):
+    """Count the moves of color's pieces by their movement rules, as mobility_batch does."""
+    count = 0
+    for y, row in enumerate(board.board):
+        for x, piece in enumerate(row):
+            if piece is None or piece.color != color:
+                continue
+            for nx, ny in piece.get_legal_moves(x, y, board, check_castling=False):
+                if isinstance(piece, Pawn):
+                    if nx != x and board.board[ny][nx] is None:
+                        continue  # En passant
+                    if ny in (0, 7):
+                        count += 4
+                        continue
+                count += 1
+    return count
+
+
+def test_planes_round_trip(boards):
+    bitboards, _ = stack_boards(boards)
+    planes = bitboards_to_planes(bitboards)
+    assert planes.shape == (len(boards), 12, 64)
+    assert np.array_equal(planes_to_bitboards(planes), bitboards)
+    assert np.array_equal(planes_to_bitboards(planes.astype(np.float32)), bitboards)
+
+
+def test_evaluate_batch_matches_evaluate(boards):
+    bitboards, white_to_move = stack_boards(boards)
+    expected = [evaluate(board) for board in boards]
+    assert evaluate_batch(bitboards, white_to_move).tolist() == expected
+    assert evaluate_batch(bitboards_to_planes(bitboards), white_to_move).tolist() == expected
+
+
+def test_in_check_batch_matches_board(boards):
+    bitboards, white_to_move = stack_boards(boards)
+    expected = [board.is_in_check(board.turn) for board in boards]
+    assert any(expected)
+    assert in_check_batch(bitboards, white_to_move).tolist() == expected
+    assert in_check_batch(bitboards_to_planes(bitboards), white_to_move).tolist() == expected
+
+
+def test_attack_maps_match_board(boards):
+    bitboards, _ = stack_boards(boards)
+    maps = attack_maps(bitboards)
+    assert np.array_equal(attack_maps(bitboards_to_planes(bitboards)), maps)
+    for board, (white, black) in zip(boards, maps.tolist()):
+        for color, attacked in zip(COLORS, (white, black)):
+            expected = {sq for sq in range(64) if board.is_square_attacked(sq & 7, sq >> 3, color)}
+            assert set(iter_squares(attacked)) == expected
+
+
+def test_mobility_batch_counts_pseudo_legal_moves(boards):
+    bitboards, _ = stack_boards(boards)
+    counts = mobility_batch(bitboards)
+    assert np.array_equal(mobility_batch(bitboards_to_planes(bitboards)), counts)
+    expected = [[pseudo_legal_moves(board, color) for color in COLORS] for board in boards]
+    assert counts.tolist() == expected
@@ -0,0 +1,61 @@
+import random
+
+import pytest
+
+from board.bitboard import (
+    BLACK, KING_ATTACKS, KNIGHT_ATTACKS, WHITE, bishop_attacks, iter_squares, popcount, queen_attacks,
+    rook_attacks, square
+)
+from board.board import Board
+
+
+def walk(sq, occupied, directions):
+    """Attacked squares found by stepping along each direction until a blocker or the edge."""
+    attacks = 0
+    for dx, dy in directions:
+        x, y = sq & 7, sq >> 3
+        while 0 <= x + dx < 8 and 0 <= y + dy < 8:
+            x, y = x + dx, y + dy
+            attacks |= 1 << square(x, y)
+            if occupied >> square(x, y) & 1:
+                break
+    return attacks
+
+
+ROOK_STEPS = ((0, 1), (1, 0), (0, -1), (-1, 0))
+BISHOP_STEPS = ((1, 1), (-1, 1), (-1, -1), (1, -1))
+
+
+def test_leaper_tables():
+    assert sorted(iter_squares(KNIGHT_ATTACKS[0])) == [10, 17]  # a1: c2, b3
+    assert popcount(KNIGHT_ATTACKS[27]) == 8  # d4
+    assert popcount(KING_ATTACKS[0]) == 3
+    assert popcount(KING_ATTACKS[27]) == 8
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_sliding_attacks_match_a_board_walk(seed):
+    rng = random.Random(seed)
+    for _ in range(200):
+        occupied = rng.getrandbits(64) & rng.getrandbits(64)
+        sq = rng.randrange(64)
+        assert rook_attacks(sq, occupied) == walk(sq, occupied, ROOK_STEPS)
+        assert bishop_attacks(sq, occupied) == walk(sq, occupied, BISHOP_STEPS)
+        assert queen_attacks(sq, occupied) == walk(sq, occupied, ROOK_STEPS + BISHOP_STEPS)
+
+
+def test_bitboards_follow_the_mailbox():
+    board = Board()
+    for start, end in [('e2', 'e4'), ('d7', 'd5'), ('e4', 'd5'), ('g8', 'f6'), ('f1', 'b5'), ('c7', 'c6')]:
+        assert board.move_piece(start, end)
+        for color, name in ((WHITE, 'white'), (BLACK, 'black')):
+            mailbox = 0
+            for y in range(8):
+                for x in range(8):
+                    piece = board.board[y][x]
+                    if piece is not None and piece.color == name:
+                        mailbox |= 1 << square(x, y)
+            assert board.occupancy[color] == mailbox
+            kinds = board.pieces[color]
+            assert sum(popcount(bb) for bb in kinds) == popcount(mailbox)
+            assert kinds[0] | kinds[1] | kinds[2] | kinds[3] | kinds[4] | kinds[5] == mailbox
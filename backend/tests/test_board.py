@@ -0,0 +1,69 @@
+import random
+
+from board.board import Board
+
+
+def snapshot(board):
+    """Everything make_move changes, in comparable form."""
+    mailbox = tuple(tuple((type(piece), piece.color) if piece else None for piece in row) for row in board.board)
+    return (mailbox, tuple(map(tuple, board.pieces)), tuple(board.occupancy), tuple(board.king_squares),
+            board.turn, board.castling_rights, board.en_passant, board.no_capture_or_pawn_move_count, board.hash)
+
+
+def test_unmake_restores_every_position():
+    board = Board()
+    rng = random.Random(5)
+    history = []
+    for _ in range(80):
+        moves = board.generate_legal_moves(board.turn)
+        if not moves:
+            break
+        history.append(snapshot(board))
+        board.make_move(rng.choice(moves))
+    while history:
+        board.unmake_move()
+        assert snapshot(board) == history.pop()
+    assert board.move_stack == []
+
+
+def test_only_side_to_move_can_move():
+    board = Board()
+    assert board.move_piece('e2', 'e4')
+    assert not board.move_piece('e4', 'e5')  # White again
+    assert board.turn == 'black'
+    assert board.to_fen() == 'rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 1'
+
+
+def test_color_must_match_side_to_move():
+    board = Board()
+    assert not board.move_piece('e7', 'e5', 'white')
+    assert not board.move_piece('e7', 'e5', 'black')
+    assert not board.is_legal_move('e7', 'e5', 'black')
+    assert board.is_legal_move('e2', 'e4', 'white')
+    assert board.move_piece('e2', 'e4', 'white')
+    assert board.move_piece('e7', 'e5', 'black')
+
+
+def test_legal_moves_cache_follows_make_and_unmake():
+    board = Board()
+    rng = random.Random(9)
+    for _ in range(40):
+        moves = board.legal_moves()
+        assert board.legal_moves() is moves
+        assert set(moves) == set(board.generate_legal_moves(board.turn))
+        if not moves:
+            break
+        move = rng.choice(moves)
+        board.make_move(move)
+        assert set(board.legal_moves()) == set(board.generate_legal_moves(board.turn))
+        board.unmake_move()
+        assert set(board.legal_moves()) == set(moves)
+        board.make_move(move)
+
+
+def test_legal_moves_of_the_other_side_bypass_the_cache():
+    board = Board()
+    white = board.legal_moves()
+    black = board.legal_moves('black')
+    assert {move.start_pos[1] for move in black} == {'7', '8'}
+    assert board.legal_moves() is white
@@ -0,0 +1,70 @@
+import pytest
+
+from board.board import Board
+from board.movegen import parse_uci
+from engine.book import OpeningBook, build_book, decode_move, encode_move
+from engine.polyglot import polyglot_key
+
+# Reference keys from the Polyglot book format specification
+KNOWN_KEYS = [
+    ([], 0x463B96181691FC9C),
+    (['e2e4'], 0x823C9B50FD114196),
+    (['e2e4', 'd7d5'], 0x0756B94461C50FB0),
+    (['e2e4', 'd7d5', 'e4e5'], 0x662FAFB965DB29D4),
+    (['e2e4', 'd7d5', 'e4e5', 'f7f5'], 0x22A48B5A8E47FF78),
+    (['e2e4', 'd7d5', 'e4e5', 'f7f5', 'e1e2'], 0x652A607CA3F242C1),
+    (['e2e4', 'd7d5', 'e4e5', 'f7f5', 'e1e2', 'e8f7'], 0x00FDD303C946BDD9),
+    (['a2a4', 'b7b5', 'h2h4', 'b5b4', 'c2c4'], 0x3C8123EA7B067637),
+    (['a2a4', 'b7b5', 'h2h4', 'b5b4', 'c2c4', 'b4c3', 'a1a3'], 0x5C3F9B829B279560),
+]
+
+
+def play(board, moves):
+    for text in moves:
+        move = parse_uci(text)
+        assert board.move_piece(move.start_pos, move.end_pos, promotion=move.promotion), text
+    return board
+
+
+@pytest.mark.parametrize('moves, key', KNOWN_KEYS)
+def test_polyglot_keys(moves, key):
+    assert polyglot_key(play(Board(), moves)) == key
+
+
+def test_castling_is_encoded_as_king_takes_rook():
+    board = Board('r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1')
+    castle = next(move for move in board.legal_moves() if move.uci() == 'e1g1')
+    raw = encode_move(board, castle)
+    assert (raw & 63, raw >> 6 & 63) == (7, 4)  # e1h1
+    assert decode_move(board, raw, board.legal_moves()) == castle
+
+
+def test_build_and_probe(tmp_path):
+    pgn = tmp_path / 'games.pgn'
+    pgn.write_text('[Result "1-0"]\n\n1. e4 e5 2. Nf3 1-0\n\n'
+                   '[Result "0-1"]\n\n1. d4 d5 0-1\n\n'
+                   '[Result "1-0"]\n\n1. e4 c5 1-0\n')
+    path = tmp_path / 'book.bin'
+    assert build_book([str(pgn)], str(path), max_plies=4) == 6
+
+    book = OpeningBook(str(path))
+    try:
+        assert [(move.uci(), weight) for move, weight in book.moves(Board())] == [('e2e4', 4), ('d2d4', 0)]
+        replies = {move.uci(): weight for move, weight in book.moves(play(Board(), ['e2e4']))}
+        assert replies == {'e7e5': 0, 'c7c5': 0}
+    finally:
+        book.close()
+
+
+
+@pytest.mark.parametrize('fen, uci, raw', [
+    (None, 'e2e4', 0x031C),
+    (None, 'g1f3', 0x0195),
+    ('8/P6k/8/8/8/8/8/K7 w - - 0 1', 'a7a8q', 0x4C38),
+    ('4k3/8/8/8/8/8/1p6/4K3 b - - 0 1', 'b2b1n', 0x1241),
+])
+def test_polyglot_move_encoding(fen, uci, raw):
+    board = Board(fen)
+    move = parse_uci(uci)
+    assert encode_move(board, move) == raw
+    assert decode_move(board, raw, board.legal_moves()) == move
@@ -0,0 +1,45 @@
+import pytest
+
+from board.board import Board
+from board.fen import STARTING_FEN
+
+POSITIONS = [
+    STARTING_FEN,
+    'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1',
+    '8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1',
+    'rnbqkbnr/ppp1p1pp/8/3pPp2/8/8/PPPP1PPP/RNBQKBNR w KQkq f6 0 3',
+    'r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10',
+    '4k3/8/8/8/8/8/8/4K3 b - - 99 250',
+]
+
+
+@pytest.mark.parametrize('fen', POSITIONS)
+def test_fen_round_trip(fen):
+    assert Board.from_fen(fen).to_fen() == fen
+
+
+@pytest.mark.parametrize('fen', POSITIONS)
+def test_packed_round_trip(fen):
+    board = Board.from_fen(fen)
+    packed = board.to_packed()
+    assert len(packed) <= 29
+    restored = Board.from_packed(packed)
+    assert restored.to_fen() == fen
+    assert restored.hash == board.hash
+
+
+@pytest.mark.parametrize('fen', [
+    'not a fen',
+    'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBN w KQkq - 0 1',  # Short row
+    '4k3/8/8/8/8/8/8/8 w - - 0 1',  # No white king
+    '4k3/8/8/8/8/8/8/4K2P w - - 0 1',  # Pawn on the first rank
+    'p3k3/8/8/8/8/8/8/4K3 w - - 0 1',  # Pawn on the last rank
+    '4k3/8/8/8/8/8/8/4R1K1 w - - 0 1',  # Black, not to move, is in check
+    '4k3/8/8/8/8/8/8/4K3 w - - -1 1',  # Negative halfmove clock
+    '4k3/8/8/8/8/8/8/4K3 w - - 0 0',  # Fullmove number below 1
+    '4k3/8/8/8/8/8/8/4K3 w - - x 1',
+    5,
+])
+def test_invalid_fen_is_rejected(fen):
+    with pytest.raises(ValueError):
+        Board.from_fen(fen)
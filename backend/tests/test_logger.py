@@ -0,0 +1,72 @@
+import io
+import json
+import random
+
+import pytest
+
+import logger
+from board.board import Board
+from logger import TRACE, configure, get_logger
+
+
+@pytest.fixture
+def stream():
+    """Capture the 'chess' loggers' output, then put back the environment's configuration."""
+    stream = io.StringIO()
+    yield stream
+    configure()
+
+
+def records(stream):
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_records_are_json_lines_with_fields(stream):
+    configure(level='INFO', sample_rate=1, trace=False, stream=stream)
+    get_logger('app').info('hello', extra={'fields': {'game_id': 'g'}})
+    [record] = records(stream)
+    assert (record['level'], record['logger'], record['msg'], record['game_id']) == ('INFO', 'chess.app', 'hello', 'g')
+
+
+def test_records_below_the_level_are_dropped(stream):
+    configure(level='WARNING', sample_rate=1, trace=False, stream=stream)
+    log = get_logger('app')
+    log.info('dropped')
+    log.warning('kept')
+    assert [record['msg'] for record in records(stream)] == ['kept']
+
+
+def test_sampling_keeps_a_fraction_of_request_records(stream, monkeypatch):
+    configure(level='INFO', sample_rate=0.25, trace=False, stream=stream)
+    rng = random.Random(3)
+    monkeypatch.setattr(logger.random, 'random', rng.random)
+    requests_log = get_logger('requests')
+    for _ in range(2000):
+        requests_log.info('request')
+    requests_log.warning('slow')
+    get_logger('app').info('unsampled')
+    messages = [record['msg'] for record in records(stream)]
+    assert 400 < messages.count('request') < 600
+    assert 'slow' in messages and 'unsampled' in messages
+
+
+def test_reconfiguring_replaces_the_sampling_filter(stream):
+    configure(sample_rate=0.5, trace=False, stream=stream)
+    configure(sample_rate=1, trace=False, stream=stream)
+    assert get_logger('requests').filters == []
+
+
+def test_trace_flag_enables_hot_path_records(stream, monkeypatch):
+    monkeypatch.setenv('CHESS_TRACE', '1')
+    configure(level='INFO', stream=stream)
+    assert TRACE.enabled
+    Board().is_empty(4, 4)
+    assert [record['msg'] for record in records(stream)] == ['is_empty']
+
+
+def test_trace_is_off_by_default(stream, monkeypatch):
+    monkeypatch.delenv('CHESS_TRACE', raising=False)
+    configure(level='DEBUG', stream=stream)
+    assert not TRACE.enabled
+    Board().is_empty(4, 4)
+    assert records(stream) == []
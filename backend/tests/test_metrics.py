@@ -0,0 +1,72 @@
+import marshal
+
+import pytest
+
+import main
+from metrics import METRICS
+from server.registry import GameRegistry
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(main, 'registry', GameRegistry())
+    return main.app.test_client()
+
+
+@pytest.fixture
+def metrics(monkeypatch):
+    monkeypatch.setattr(METRICS, 'enabled', True)
+    METRICS.reset()
+    yield METRICS
+    METRICS.reset()
+
+
+def samples(text):
+    """Return the metric samples of a Prometheus text page as a name -> value dict."""
+    return {name: float(value) for name, value in
+            (line.split() for line in text.splitlines() if line and not line.startswith('#'))}
+
+
+def test_metrics_count_a_move(client, metrics):
+    game_id = client.post('/games', json={}).get_json()['game_id']
+    response = client.post(f'/games/{game_id}/move', json={'color': 'white', 'start_pos': 'e2', 'end_pos': 'e4'})
+    assert response.status_code == 200
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    values = samples(response.get_data(as_text=True))
+    assert values['chess_make_move_total'] >= 1
+    assert values['chess_movegen_calls_total'] >= 1
+    assert values['chess_movegen_seconds_count'] == values['chess_movegen_calls_total']
+
+
+def test_disabled_metrics_say_so(client, monkeypatch):
+    monkeypatch.setattr(METRICS, 'enabled', False)
+    text = client.get('/metrics').get_data(as_text=True)
+    assert 'CHESS_METRICS=1' in text
+    assert '# TYPE chess_searches_total counter' in text
+
+
+@pytest.mark.parametrize('fmt', ['pstats', 'text'])
+def test_profile_replaces_the_body(client, monkeypatch, fmt):
+    monkeypatch.setenv('CHESS_PROFILING', '1')
+    game_id = client.post('/games', json={}).get_json()['game_id']
+    response = client.get(f'/games/{game_id}/board?profile={fmt}')
+    assert response.status_code == 200
+    if fmt == 'pstats':
+        stats = marshal.loads(response.get_data())
+        assert any(function == 'get_game_board' for _, _, function in stats)
+    else:
+        assert 'function calls' in response.get_data(as_text=True)
+
+
+def test_profile_rejects_unknown_format(client, monkeypatch):
+    monkeypatch.setenv('CHESS_PROFILING', '1')
+    assert client.get('/metrics?profile=svg').status_code == 400
+
+
+def test_profile_is_ignored_unless_allowed(client, monkeypatch):
+    monkeypatch.delenv('CHESS_PROFILING', raising=False)
+    game_id = client.post('/games', json={}).get_json()['game_id']
+    response = client.get(f'/games/{game_id}/board?profile=pstats')
+    assert response.is_json
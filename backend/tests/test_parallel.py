@@ -0,0 +1,31 @@
+import pytest
+
+from board.board import Board
+from engine import parallel
+
+
+@pytest.mark.parametrize('env, cpus, expected', [
+    ({}, 8, 7),
+    ({'CHESS_WEB_WORKERS': '1'}, 8, 7),
+    ({'CHESS_WEB_WORKERS': '4'}, 8, 2),
+    ({'CHESS_WEB_WORKERS': '4'}, 2, 1),
+    ({'CHESS_WEB_WORKERS': '4', 'CHESS_ENGINE_WORKERS': '3'}, 8, 3),
+    ({}, 1, 1),
+])
+def test_default_workers(monkeypatch, env, cpus, expected):
+    monkeypatch.delenv('CHESS_WEB_WORKERS', raising=False)
+    monkeypatch.delenv('CHESS_ENGINE_WORKERS', raising=False)
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    monkeypatch.setattr(parallel.os, 'cpu_count', lambda: cpus)
+    assert parallel.default_workers() == expected
+
+
+def test_pool_finds_mate_in_one():
+    pool = parallel.AnalysisPool(workers=2, table_mb=1)
+    try:
+        result = pool.search(Board('6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1'), depth=3)
+        assert result.move.uci() == 'a1a8'
+        assert [r.move.uci() for r in pool.analyse(['4k3/8/8/3q4/8/8/8/3RK3 w - - 0 1'], depth=2)] == ['d1d5']
+    finally:
+        pool.shutdown()
@@ -0,0 +1,17 @@
+import pytest
+
+from board.board import Board
+from board.perft import REFERENCE_POSITIONS, perft, verify_piece_moves
+
+
+@pytest.mark.parametrize('name, fen, counts', REFERENCE_POSITIONS, ids=[p[0] for p in REFERENCE_POSITIONS])
+def test_perft(name, fen, counts):
+    board = Board.from_fen(fen)
+    for depth, expected in enumerate(counts[:3], 1):
+        assert perft(board, depth) == expected, f"{name} depth {depth}"
+    assert board.hash == Board.from_fen(fen).hash  # make/unmake left it unchanged
+
+
+@pytest.mark.parametrize('name, fen, counts', REFERENCE_POSITIONS, ids=[p[0] for p in REFERENCE_POSITIONS])
+def test_piece_classes_agree_with_generator(name, fen, counts):
+    assert verify_piece_moves(Board.from_fen(fen), 1) == []
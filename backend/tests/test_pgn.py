@@ -0,0 +1,40 @@
+import random
+
+import pytest
+
+from board.board import Board
+from board.pgn import apply_moves, iter_games, replay, write_game
+
+KIWIPETE = 'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1'
+
+
+def random_game(fen, plies, seed):
+    board = Board(fen)
+    rng = random.Random(seed)
+    for _ in range(plies):
+        moves = board.generate_legal_moves(board.turn)
+        if not moves:
+            break
+        board.make_move(rng.choice(moves))
+        board.update_position_history()
+    return board
+
+
+@pytest.mark.parametrize('fen, seed', [(None, 1), (None, 2), (KIWIPETE, 3), ('8/2P3k1/8/8/8/8/5p2/K7 w - - 0 1', 4)])
+def test_pgn_round_trip(tmp_path, fen, seed):
+    board = random_game(fen, 120, seed)
+    text = write_game(board.move_stack, {'Event': 'test'}, start_fen=fen)
+    path = tmp_path / 'game.pgn'
+    path.write_text(text + '\n' + text)  # Two games, to cover the boundary between them
+
+    games = list(iter_games(str(path)))
+    assert len(games) == 2
+    replayed = [move for _, move, _ in replay(games[1])]
+    assert replayed == board.move_stack
+
+
+def test_apply_moves_stops_at_first_illegal_move():
+    board = Board()
+    assert apply_moves(board, ['e2e4', 'e7e5', 'e1e3', 'g1f3']) == (2, 'Illegal move: e1e3')
+    assert board.turn == 'white'
+    assert apply_moves(Board(), ['e4', 'e5', 'Nf3', 'Nc6'], 'san') == (4, None)
@@ -0,0 +1,42 @@
+import copy
+import pickle
+
+import pytest
+
+from board.board import Board
+from board.model.knight import Knight
+from board.model.pawn import Pawn
+from board.model.queen import Queen
+
+
+def test_pieces_are_shared_per_kind_and_color():
+    assert Pawn('white') is Pawn('white')
+    assert Pawn('white') is not Pawn('black')
+    assert Pawn('white') is not Knight('white')
+
+
+def test_boards_share_their_pieces():
+    first, second = Board(), Board()
+    assert first.get_piece(0, 1) is second.get_piece(7, 1) is Pawn('white')
+    assert first.get_piece(3, 7) is Queen('black')
+
+
+@pytest.mark.parametrize('clone', [copy.copy, copy.deepcopy, lambda piece: pickle.loads(pickle.dumps(piece))])
+def test_copies_are_the_shared_instance(clone):
+    assert clone(Knight('black')) is Knight('black')
+
+
+def test_deep_copied_board_keeps_the_shared_pieces():
+    board = copy.deepcopy(Board())
+    assert board.get_piece(1, 0) is Knight('white')
+
+
+def test_pieces_are_immutable():
+    pawn = Pawn('white')
+    with pytest.raises(AttributeError):
+        pawn.color = 'black'
+    with pytest.raises(AttributeError):
+        pawn.has_moved = True
+    with pytest.raises(AttributeError):
+        del pawn.color
+    assert pawn.color == 'white'
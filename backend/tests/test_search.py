@@ -0,0 +1,50 @@
+import pytest
+
+import main
+from board.board import Board
+from engine.search import MATE_THRESHOLD, search
+from server.registry import GameRegistry
+
+
+def test_finds_mate_in_one():
+    board = Board('6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1')
+    result = search(board, depth=3)
+    assert result.move.uci() == 'a1a8'
+    assert result.score >= MATE_THRESHOLD
+    assert board.to_fen() == '6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1'
+
+
+def test_wins_hanging_queen():
+    board = Board('4k3/8/8/3q4/8/8/8/3RK3 w - - 0 1')
+    assert search(board, depth=2).move.uci() == 'd1d5'
+
+
+@pytest.mark.parametrize('data, expected', [
+    ({}, (None, main.ENGINE_DEFAULT_MOVETIME_MS)),
+    ({'depth': 4}, (4, main.ENGINE_MAX_MOVETIME_MS)),
+    ({'depth': 1000, 'movetime_ms': 1e12}, (main.ENGINE_MAX_DEPTH, main.ENGINE_MAX_MOVETIME_MS)),
+    ({'movetime_ms': '250'}, (None, 250.0)),
+])
+def test_engine_budget_is_clamped(data, expected):
+    assert main.engine_budget(data) == expected
+
+
+@pytest.mark.parametrize('data', [
+    {'movetime_ms': float('nan')},
+    {'movetime_ms': 'inf'},
+    {'depth': float('inf')},
+    {'depth': 0},
+    {'movetime_ms': -5},
+    {'depth': 'deep'},
+])
+def test_engine_budget_rejects_bad_values(data):
+    with pytest.raises(ValueError):
+        main.engine_budget(data)
+
+
+def test_engine_move_rejects_nan_movetime(monkeypatch):
+    monkeypatch.setattr(main, 'registry', GameRegistry())
+    main.registry.create('g')
+    response = main.app.test_client().post('/games/g/engine-move', data='{"movetime_ms": NaN}',
+                                           content_type='application/json')
+    assert response.status_code == 400
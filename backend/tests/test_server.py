@@ -0,0 +1,181 @@
+import pytest
+
+import main
+from board.fen import STARTING_FEN
+from server.registry import GameRegistry, GameSession, NotYourTurn
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(main, 'registry', GameRegistry())
+    return main.app.test_client()
+
+
+def new_game(client, **payload):
+    return client.post('/games', json=payload).get_json()['game_id']
+
+
+def test_games_are_independent(client):
+    first, second = new_game(client), new_game(client)
+    assert first != second
+    response = client.post(f'/games/{first}/move', json={'color': 'white', 'start_pos': 'e2', 'end_pos': 'e4'})
+    assert response.status_code == 200
+    assert client.get(f'/games/{first}/board?format=fen').get_json()['fen'] != STARTING_FEN
+    assert client.get(f'/games/{second}/board?format=fen').get_json()['fen'] == STARTING_FEN
+
+
+def test_unknown_game_is_404(client):
+    assert client.get('/games/missing/board').status_code == 404
+    assert client.post('/games/missing/move', json={'color': 'white', 'start_pos': 'e2',
+                                                    'end_pos': 'e4'}).status_code == 404
+
+
+def test_idle_games_are_evicted():
+    now = [0.0]
+    registry = GameRegistry(ttl_seconds=10, clock=lambda: now[0])
+    registry.create('old')
+    now[0] = 6
+    registry.create('recent')
+    now[0] = 11
+    assert registry.evict_idle() == 1
+    assert 'old' not in registry and 'recent' in registry
+
+
+def test_session_rejects_move_out_of_turn():
+    session = GameSession('game')
+    with pytest.raises(NotYourTurn):
+        session.play_move('black', 'e7', 'e5')
+    assert session.play_move('white', 'e2', 'e4')['turn'] == 'black'
+    with pytest.raises(NotYourTurn):
+        session.play_move('white', 'd2', 'd4')
+    assert session.ply == 1
+
+
+def test_move_out_of_turn_is_409(client):
+    game_id = new_game(client)
+    response = client.post(f'/games/{game_id}/move', json={'color': 'black', 'start_pos': 'e7', 'end_pos': 'e5'})
+    assert response.status_code == 409
+    assert response.get_json()['turn'] == 'white'
+    assert 'Not your turn' in response.get_json()['message']
+
+
+def test_move_reports_status(client):
+    game_id = new_game(client)
+    response = client.post(f'/games/{game_id}/move', json={'color': 'white', 'start_pos': 'e2', 'end_pos': 'e4'})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert (body['move'], body['status'], body['turn'], body['version']) == ('e2e4', 'ongoing', 'black', 1)
+
+
+def test_move_rejects_unknown_color(client):
+    game_id = new_game(client)
+    response = client.post(f'/games/{game_id}/move', json={'color': 'blue', 'start_pos': 'e7', 'end_pos': 'e5'})
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize('fen', [5, ['4k3/8/8/8/8/8/8/4K3 w - - 0 1'], '4k3/8/8/8/8/8/8/4R1K1 w - - 0 1'])
+def test_create_game_rejects_bad_fen(client, fen):
+    assert client.post('/games', json={'fen': fen}).status_code == 400
+
+
+def test_validate_moves_rejects_bad_fen(client):
+    response = client.post('/validate-moves', json={'games': [{'moves': ['e2e4'], 'fen': 5}]})
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize('promotion', ['x', ['q'], 5])
+def test_move_rejects_bad_promotion(client, promotion):
+    game_id = new_game(client, fen='8/P6k/8/8/8/8/8/K7 w - - 0 1')
+    response = client.post(f'/games/{game_id}/move',
+                           json={'color': 'white', 'start_pos': 'a7', 'end_pos': 'a8', 'promotion': promotion})
+    assert response.status_code == 400
+
+
+def test_move_reports_promotion_and_draw(client):
+    game_id = new_game(client, fen='8/P6k/8/8/8/8/8/K7 w - - 0 1')
+    body = client.post(f'/games/{game_id}/move', json={'color': 'white', 'start_pos': 'a7', 'end_pos': 'a8',
+                                                       'promotion': 'n'}).get_json()
+    assert (body['move'], body['promotion'], body['status'], body['draw_reason']) == \
+        ('a7a8n', 'n', 'draw', 'insufficient_material')
+
+
+def test_stale_version_is_409(client):
+    game_id = new_game(client)
+    client.post(f'/games/{game_id}/move', json={'color': 'white', 'start_pos': 'e2', 'end_pos': 'e4'})
+    response = client.post(f'/games/{game_id}/move', json={'color': 'black', 'start_pos': 'e7', 'end_pos': 'e5',
+                                                           'version': 0})
+    assert response.status_code == 409
+    assert response.get_json()['version'] == 1
+
+
+def test_session_play_moves_is_all_or_nothing():
+    session = GameSession('game')
+    start_fen = session.board.to_fen()
+    result = session.play_moves(['e2e4', 'e7e5', 'e1e3', 'g1f3'])
+    assert (result['applied'], result['error_index'], result['version']) == (0, 2, 0)
+    assert result['error']
+    assert (session.board.to_fen(), session.ply, session.board.move_stack) == (start_fen, 0, [])
+    assert session.store.state('game')[1] == 0
+    result = session.play_moves(['e2e4', 'e7e5'])
+    assert (result['applied'], result['error_index'], result['turn'], result['version']) == (2, None, 'white', 2)
+    assert session.store.state('game')[1] == 2
+
+
+def test_session_play_moves_accepts_san():
+    session = GameSession('game')
+    result = session.play_moves(['f3', 'e5', 'g4', 'Qh4#'], notation='san')
+    assert (result['applied'], result['status'], result['turn']) == (4, 'checkmate', 'white')
+
+
+def test_batch_moves_report_the_rejected_move(client):
+    game_id = new_game(client)
+    response = client.post(f'/games/{game_id}/moves', json={'moves': ['e4', 'e5', 'Ke3'], 'notation': 'san'})
+    assert response.status_code == 400
+    body = response.get_json()
+    assert (body['applied'], body['error_index'], body['version']) == (0, 2, 0)
+    assert client.get(f'/games/{game_id}/board?format=fen').get_json()['fen'] == STARTING_FEN
+    response = client.post(f'/games/{game_id}/moves', json={'moves': ['e2e4', 'e7e5']})
+    assert response.status_code == 200
+    assert (response.get_json()['applied'], response.get_json()['version']) == (2, 2)
+
+
+def test_batch_moves_are_capped(client, monkeypatch):
+    monkeypatch.setattr(main, 'MAX_BATCH_MOVES', 3)
+    game_id = new_game(client)
+    response = client.post(f'/games/{game_id}/moves', json={'moves': ['e2e4', 'e7e5', 'g1f3', 'b8c6']})
+    assert response.status_code == 400
+    assert 'At most 3 moves' in response.get_json()['message']
+    games = [{'moves': ['e2e4', 'e7e5']}, {'moves': ['d2d4', 'd7d5']}]
+    assert client.post('/validate-moves', json={'games': games}).status_code == 400
+    assert client.post('/validate-moves', json={'games': games[:1]}).status_code == 200
+
+
+def test_validate_moves_checks_each_game(client):
+    games = [{'moves': ['e4', 'e5', 'Nf3']}, {'moves': ['d4', 'Ke7']},
+             {'moves': ['Qh5#'], 'fen': 'rnbqkbnr/ppppp2p/8/5pp1/4P3/8/PPPP1PPP/RNBQKBNR w KQkq g6 0 3'}]
+    response = client.post('/validate-moves', json={'games': games, 'notation': 'san'})
+    assert response.status_code == 200
+    results = response.get_json()['results']
+    assert [(r['applied'], r['error_index']) for r in results] == [(3, None), (1, 1), (1, None)]
+    assert results[1]['error']
+    assert (results[0]['turn'], results[2]['status']) == ('black', 'checkmate')
+    assert len(main.registry) == 0
+
+
+def test_legal_moves_lists_the_side_to_move(client):
+    game_id = new_game(client)
+    body = client.get(f'/games/{game_id}/legal-moves').get_json()
+    assert (body['turn'], body['status'], len(body['moves'])) == ('white', 'ongoing', 20)
+    assert sorted(body['targets']['g1']) == ['f3', 'h3']
+    client.post(f'/games/{game_id}/move', json={'color': 'white', 'start_pos': 'e2', 'end_pos': 'e4'})
+    body = client.get(f'/games/{game_id}/legal-moves').get_json()
+    assert body['turn'] == 'black' and 'e7e5' in body['moves']
+
+
+def test_legal_moves_square_filter(client):
+    game_id = new_game(client)
+    body = client.get(f'/games/{game_id}/legal-moves?square=e2').get_json()
+    assert (sorted(body['moves']), body['targets']) == (['e2e3', 'e2e4'], {'e2': ['e3', 'e4']})
+    assert client.get(f'/games/{game_id}/legal-moves?square=e5').get_json()['moves'] == []
+    assert client.get(f'/games/{game_id}/legal-moves?square=z9').status_code == 400
+    assert client.get('/games/missing/legal-moves').status_code == 404
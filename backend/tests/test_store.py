@@ -0,0 +1,124 @@
+import pytest
+
+from board.bitboard import KNIGHT
+from board.board import Board
+from server.registry import GameRegistry
+from server.store import GameConflict, GameStore, MemoryStore
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def store(request, tmp_path):
+    if request.param == 'memory':
+        yield MemoryStore()
+        return
+    store = GameStore(str(tmp_path / 'games.db'), snapshot_every=4)
+    yield store
+    store.close()
+
+
+def play(board, *moves):
+    for start, end in moves:
+        assert board.move_piece(start, end)
+    return board
+
+
+def test_log_and_load(store):
+    store.create_game('g', 'epoch')
+    board = Board()
+    for start, end in [('e2', 'e4'), ('e7', 'e5'), ('g1', 'f3'), ('b8', 'c6'), ('f1', 'b5')]:
+        play(board, (start, end))
+        store.append_moves('g', 'epoch', len(board.move_stack), board).result()  # Snapshot at ply 4
+    loaded, ply, epoch = store.load('g')
+    assert (ply, epoch) == (5, 'epoch')
+    assert loaded.to_fen() == board.to_fen()
+    assert store.state('g') == ('epoch', 5)
+    assert [move.uci() for move in store.moves_since('g', 3)] == ['b8c6', 'f1b5']
+
+
+def test_stale_writes_conflict(store):
+    store.create_game('g', 'epoch')
+    board = play(Board(), ('e2', 'e4'))
+    store.append_moves('g', 'epoch', 1, board).result()
+    with pytest.raises(GameConflict):
+        store.append_moves('g', 'epoch', 1, board).result()  # Ply 1 is taken
+    with pytest.raises(GameConflict):
+        store.append_moves('g', 'old-epoch', 2, play(board, ('e7', 'e5'))).result()
+    store.delete_game('g').result()
+    assert store.state('g') is None and store.load('g') is None
+
+
+
+def test_promotions_survive_the_log(store):
+    fen = '8/P6k/8/8/8/8/8/K7 w - - 0 1'
+    store.create_game('g', 'epoch', fen)
+    board = Board(fen)
+    assert board.move_piece('a7', 'a8', promotion=KNIGHT)
+    store.append_moves('g', 'epoch', 1, board).result()
+    loaded, _, _ = store.load('g')
+    assert loaded.to_fen() == board.to_fen()
+    assert store.moves_since('g', 0) == board.move_stack
+
+
+class FailingStore(GameStore):
+    """A store whose writes for the game 'bad' fail with an unexpected error."""
+
+    def _apply(self, db, kind, args):
+        if args[0] == 'bad':
+            raise RuntimeError('disk on fire')
+        super()._apply(db, kind, args)
+
+
+def test_unexpected_write_error_fails_only_its_caller(tmp_path):
+    store = FailingStore(str(tmp_path / 'games.db'))
+    try:
+        bad, good = store.create_game('bad', 'epoch'), store.create_game('good', 'epoch')
+        with pytest.raises(RuntimeError):
+            bad.result(timeout=5)
+        good.result(timeout=5)
+        store.create_game('later', 'epoch').result(timeout=5)  # The writer is still running
+        assert store.state('good') == ('epoch', 0) and store.state('bad') is None
+    finally:
+        store.close()
+
+def test_registries_sharing_a_database_stay_consistent(tmp_path):
+    first_store, second_store = GameStore(str(tmp_path / 'games.db')), GameStore(str(tmp_path / 'games.db'))
+    try:
+        first, second = GameRegistry(store=first_store), GameRegistry(store=second_store)
+        first.create('g')
+        second.get('g').play_move('white', 'e2', 'e4')
+        session = first.get('g')  # Catches up with the other process's move
+        assert session.ply == 1 and session.board.turn == 'black'
+
+        stale = second.get('g')
+        session.play_move('black', 'e7', 'e5')
+        with pytest.raises(GameConflict):
+            stale.play_move('black', 'c7', 'c5')  # Lost the race; brought up to date instead
+        assert [move.uci() for move in stale.board.move_stack] == ['e2e4', 'e7e5']
+    finally:
+        first_store.close()
+        second_store.close()
+
+
+def test_evicted_game_is_reloaded(tmp_path):
+    store = GameStore(str(tmp_path / 'games.db'))
+    try:
+        now = [0.0]
+        registry = GameRegistry(ttl_seconds=10, clock=lambda: now[0], store=store)
+        registry.create('g').play_move('white', 'e2', 'e4')
+        now[0] = 11
+        assert registry.evict_idle() == 1
+        session = registry.get('g')
+        assert session.ply == 1 and session.board.turn == 'black'
+        assert [move.uci() for move in session.board.move_stack] == ['e2e4']
+    finally:
+        store.close()
+
+
+def test_memory_store_forgets_evicted_games():
+    now = [0.0]
+    registry = GameRegistry(ttl_seconds=10, clock=lambda: now[0])
+    registry.create('g').play_move('white', 'e2', 'e4')
+    now[0] = 11
+    assert registry.evict_idle() == 1
+    assert registry.get('g') is None
+    assert registry.store.state('g') is None
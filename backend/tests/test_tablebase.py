@@ -0,0 +1,99 @@
+import random
+
+import pytest
+
+from board.board import Board
+from engine import tablebase
+from engine.tablebase import DRAW, LOSS, TABLES, WIN, TablebaseResult
+
+
+@pytest.fixture
+def generated(monkeypatch):
+    calls = []
+
+    def fake_generate_all(directory, names):
+        calls.append((directory, list(names)))
+        return []
+
+    monkeypatch.setattr(tablebase, 'generate_all', fake_generate_all)
+    return calls
+
+
+def test_generate_without_names_builds_every_table(generated, tmp_path):
+    tablebase.main(['generate', str(tmp_path)])
+    assert generated == [(str(tmp_path), sorted(TABLES))]
+
+
+def test_generate_named_tables(generated, tmp_path):
+    tablebase.main(['generate', str(tmp_path), 'KRK', 'KPK'])
+    assert generated == [(str(tmp_path), ['KRK', 'KPK'])]
+
+
+def test_generate_rejects_unknown_names(generated, tmp_path, capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        tablebase.main(['generate', str(tmp_path), 'KQK', 'KXK'])
+    assert exit_info.value.code == 2
+    assert 'KXK' in capsys.readouterr().err
+    assert generated == []
+
+
+@pytest.fixture(scope='module')
+def krk(tmp_path_factory):
+    directory = tmp_path_factory.mktemp('tablebases')
+    tablebase.generate_all(str(directory), ['KRK'])
+    tables = tablebase.Tablebase(str(directory))
+    yield tables
+    tables.close()
+
+
+def random_krk_positions(count, seed=7):
+    rng = random.Random(seed)
+    while count:
+        white_king, rook, black_king = rng.sample(range(64), 3)
+        placement = [['.'] * 8 for _ in range(8)]
+        for sq, letter in ((white_king, 'K'), (rook, 'R'), (black_king, 'k')):
+            placement[sq >> 3][sq & 7] = letter
+        rows = '/'.join(''.join(row) for row in reversed(placement))
+        for char in '87654321':
+            rows = rows.replace('.' * int(char), char)
+        try:
+            board = Board(f"{rows} {rng.choice('wb')} - - 0 1")
+        except ValueError:
+            continue  # The side not to move is in check
+        if board.is_king_in_check('black' if board.turn == 'white' else 'white'):
+            continue
+        count -= 1
+        yield board
+
+
+def test_krk_is_consistent(krk):
+    """Each result must follow from the results one move later."""
+    for board in random_krk_positions(300):
+        result = krk.probe(board)
+        moves = board.generate_legal_moves(board.turn)
+        if not moves:
+            expected = (LOSS, 0) if board.is_king_in_check(board.turn) else (DRAW, None)
+            assert (result.wdl, result.dtm) == expected, board.to_fen()
+            continue
+        replies = []
+        for move in moves:
+            board.make_move(move)
+            replies.append(krk.probe(board) or TablebaseResult(DRAW, None))  # Rook taken: two kings
+            board.unmake_move()
+        if result.wdl == WIN:
+            assert min(r.dtm for r in replies if r.wdl == LOSS) == result.dtm - 1, board.to_fen()
+        elif result.wdl == LOSS:
+            assert all(r.wdl == WIN for r in replies), board.to_fen()
+            assert max(r.dtm for r in replies) == result.dtm - 1, board.to_fen()
+        else:
+            assert all(r.wdl != LOSS for r in replies) and any(r.wdl == DRAW for r in replies), board.to_fen()
+
+
+def test_best_move_mates(krk):
+    board = Board('8/8/8/8/8/2k5/8/K6R b - - 0 1')
+    moves = 0
+    while krk.probe(board).wdl != LOSS or krk.probe(board).dtm:
+        board.make_move(krk.best_move(board))
+        moves += 1
+        assert moves < 60
+    assert board.turn == 'black' and board.is_king_in_check('black') and not board.generate_legal_moves('black')
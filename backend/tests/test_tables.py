@@ -0,0 +1,35 @@
+import pytest
+
+from board.bitboard import DIRECTIONS, KING_OFFSETS, KNIGHT_OFFSETS
+from board.board import Board
+from board.perft import verify_piece_moves
+from board.tables import KING_TARGETS, KNIGHT_TARGETS, PAWN_CAPTURES, RAY_SQUARES
+
+KIWIPETE = 'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1'
+
+
+def targets(x, y, offsets):
+    return {(x + dx, y + dy) for dx, dy in offsets if 0 <= x + dx < 8 and 0 <= y + dy < 8}
+
+
+def ray(x, y, dx, dy):
+    squares = []
+    while 0 <= x + dx < 8 and 0 <= y + dy < 8:
+        x, y = x + dx, y + dy
+        squares.append((x, y))
+    return tuple(squares)
+
+
+@pytest.mark.parametrize('sq', range(64))
+def test_tables_match_the_piece_offsets(sq):
+    x, y = sq & 7, sq >> 3
+    assert set(KNIGHT_TARGETS[sq]) == targets(x, y, KNIGHT_OFFSETS)
+    assert set(KING_TARGETS[sq]) == targets(x, y, KING_OFFSETS)
+    assert set(PAWN_CAPTURES[0][sq]) == targets(x, y, ((-1, 1), (1, 1)))
+    assert set(PAWN_CAPTURES[1][sq]) == targets(x, y, ((-1, -1), (1, -1)))
+    for direction, (dx, dy) in enumerate(DIRECTIONS):
+        assert RAY_SQUARES[direction][sq] == ray(x, y, dx, dy)  # Nearest square first
+
+
+def test_piece_classes_match_the_generator_a_few_plies_deep():
+    assert verify_piece_moves(Board(KIWIPETE), 2) == []
@@ -0,0 +1,70 @@
+from board.board import Board
+from board.movegen import Move
+from engine.transposition import EXACT, LOWER, TERMINAL_DEPTH, UPPER, TranspositionTable
+from player.chess_rules import ChessRules
+
+
+def test_transposition_table_round_trip():
+    table = TranspositionTable(1)
+    move = Move(12, 28, None)
+    table.store(0x1234567890ABCDEF, move, 5, -321, EXACT)
+    entry = table.probe(0x1234567890ABCDEF)
+    assert (entry.move, entry.depth, entry.score, entry.bound) == (move, 5, -321, EXACT)
+    assert table.probe(0x1234567890ABCDEE) is None
+    table.store(0x1234567890ABCDEF, None, 7, 50, LOWER)
+    entry = table.probe(0x1234567890ABCDEF)
+    assert (entry.move, entry.depth, entry.score, entry.bound) == (move, 7, 50, LOWER)  # Keeps the best move
+
+
+def test_colliding_keys_are_told_apart():
+    table = TranspositionTable(1)
+    key = 0x0123456789ABCDEF
+    other = key + table.buckets  # Same bucket, different position
+    table.store(key, Move(12, 28, None), 5, 10, EXACT)
+    assert table.probe(other) is None
+    table.store(other, Move(6, 21, None), 2, -20, UPPER)
+    assert table.probe(key).score == 10 and table.probe(other).score == -20
+
+
+def test_torn_entry_fails_verification():
+    table = TranspositionTable(1)
+    key = 0x0123456789ABCDEF
+    table.store(key, Move(12, 28, None), 5, 10, EXACT)
+    slot = key % table.buckets * 2
+    table.data[slot] ^= 1 << 40  # As a half-finished write from another worker would leave it
+    assert table.probe(key) is None
+
+
+def test_replacement_prefers_depth_then_recency():
+    table = TranspositionTable(1)
+    deep, shallow, newer = 7, 7 + table.buckets, 7 + 2 * table.buckets
+    table.store(deep, None, 6, 1, EXACT)
+    table.store(shallow, None, 2, 2, EXACT)  # Shallower: goes to the always-replace slot
+    table.store(newer, None, 1, 3, EXACT)  # Replaces the shallow entry, not the deep one
+    assert table.probe(deep).depth == 6
+    assert table.probe(shallow) is None
+    assert table.probe(newer).depth == 1
+
+    table.store(shallow, None, 8, 4, LOWER)  # Deeper: takes the depth-preferred slot
+    assert table.probe(shallow).depth == 8 and table.probe(deep) is None
+
+    table.new_search()
+    table.store(deep, None, 1, 5, UPPER)  # Entries from an older search are fair game
+    assert table.probe(deep).depth == 1 and table.probe(shallow) is None
+
+
+def test_entry_without_a_move_is_not_read_as_no_legal_moves():
+    board = Board()
+    table = TranspositionTable(1)
+    table.store(board.hash, None, 3, -50, UPPER)  # A search that failed low here
+    rules = ChessRules(board, table)
+    assert rules.has_legal_moves('white')
+    assert rules.status() == 'ongoing'
+
+
+def test_positions_without_moves_are_cached():
+    board = Board('7k/5Q2/6K1/8/8/8/8/8 b - - 0 1')  # Stalemate
+    table = TranspositionTable(1)
+    assert not ChessRules(board, table).has_legal_moves('black')
+    assert table.probe(board.hash).depth == TERMINAL_DEPTH
+    assert not ChessRules(Board(board.to_fen()), table).has_legal_moves('black')
@@ -0,0 +1,175 @@
+import asyncio
+import json
+import threading
+import time
+
+from websockets.asyncio.client import connect
+from websockets.asyncio.server import serve
+
+from board.board import Board
+from server.registry import GameRegistry
+from server.store import GameStore
+from server.ws import ChessSocketServer
+
+
+def run_with_server(server, scenario):
+    """Serve `server` on a free port, run scenario(url) against it and return its result."""
+    async def main():
+        server.loop = asyncio.get_running_loop()
+        watcher = asyncio.create_task(server.watch_store()) if server.registry.store.shared else None
+        try:
+            async with serve(server.handler, '127.0.0.1', 0) as ws_server:
+                port = ws_server.sockets[0].getsockname()[1]
+                return await asyncio.wait_for(scenario(f'ws://127.0.0.1:{port}'), 10)
+        finally:
+            if watcher is not None:
+                watcher.cancel()
+    return asyncio.run(main())
+
+
+async def receive(socket):
+    return json.loads(await socket.recv())
+
+
+def move(color, start_pos, end_pos, **extra):
+    return json.dumps({'type': 'move', 'color': color, 'start_pos': start_pos, 'end_pos': end_pos, **extra})
+
+
+def test_move_is_pushed_to_every_subscriber():
+    server = ChessSocketServer(GameRegistry())
+
+    async def scenario(url):
+        async with connect(f'{url}/games/g') as player, connect(f'{url}/games/g?role=spectator') as spectator:
+            assert (await receive(player))['type'] == 'snapshot'
+            assert (await receive(spectator))['type'] == 'snapshot'
+            await player.send(move('white', 'e2', 'e4'))
+            return await receive(player), await receive(spectator)
+
+    to_player, to_spectator = run_with_server(server, scenario)
+    assert to_player == to_spectator
+    assert (to_player['type'], to_player['move'], to_player['turn']) == ('move', 'e2e4', 'black')
+
+
+def test_spectators_cannot_move():
+    server = ChessSocketServer(GameRegistry())
+
+    async def scenario(url):
+        async with connect(f'{url}/games/g?role=spectator') as spectator:
+            await receive(spectator)
+            await spectator.send(move('white', 'e2', 'e4'))
+            return await receive(spectator)
+
+    assert run_with_server(server, scenario)['type'] == 'error'
+
+
+def test_socket_follows_a_game_replaced_after_connecting():
+    registry = GameRegistry()
+    server = ChessSocketServer(registry)
+
+    async def scenario(url):
+        async with connect(f'{url}/games/g') as player:
+            await receive(player)
+            registry.remove('g')  # Dropped from memory, as eviction would
+            await player.send(move('white', 'e2', 'e4'))
+            return await receive(player)
+
+    delta = run_with_server(server, scenario)
+    assert delta['move'] == 'e2e4'
+    assert [m.uci() for m in registry.get('g').board.move_stack] == ['e2e4']
+
+
+def test_moves_made_outside_the_socket_are_pushed():
+    registry = GameRegistry()
+    server = ChessSocketServer(registry)
+
+    async def scenario(url):
+        async with connect(f'{url}/games/g') as player:
+            await receive(player)
+            # As an HTTP request thread in the same process would
+            thread = threading.Thread(target=registry.get('g').play_move, args=('white', 'd2', 'd4'))
+            thread.start()
+            thread.join()
+            return await receive(player)
+
+    delta = run_with_server(server, scenario)
+    assert (delta['type'], delta['move']) == ('move', 'd2d4')
+
+
+def test_moves_logged_by_another_process_are_pushed(tmp_path):
+    store = GameStore(str(tmp_path / 'games.db'))
+    other = GameStore(str(tmp_path / 'games.db'))  # Another process's connection to the same file
+    server = ChessSocketServer(GameRegistry(store=store), poll_interval=0.05)
+    http_workers = GameRegistry(store=other)
+
+    async def scenario(url):
+        async with connect(f'{url}/games/g') as player:
+            await receive(player)
+            await asyncio.to_thread(lambda: http_workers.get_or_create('g').play_move('white', 'g1', 'f3'))
+            while True:
+                message = await receive(player)
+                if message['type'] == 'snapshot' and message['moves']:
+                    return message
+
+    try:
+        snapshot = run_with_server(server, scenario)
+    finally:
+        store.close()
+        other.close()
+    assert snapshot['moves'] == ['g1f3']
+    assert snapshot['turn'] == 'black'
+
+
+class SlowStore(GameStore):
+    """A store whose commits take `delay` seconds once slowed down."""
+    delay = 0
+
+    def _commit(self, db, writes):
+        time.sleep(self.delay)
+        super()._commit(db, writes)
+
+
+def test_slow_commit_does_not_block_other_sockets(tmp_path):
+    store = SlowStore(str(tmp_path / 'games.db'))
+    registry = GameRegistry(store=store)
+    registry.get_or_create('a')
+    registry.get_or_create('b')
+    server = ChessSocketServer(registry)
+
+    async def scenario(url):
+        async with connect(f'{url}/games/a') as slow, connect(f'{url}/games/b') as other:
+            await receive(slow)
+            await receive(other)
+            store.delay = 0.5
+            started = time.perf_counter()
+            await slow.send(move('white', 'e2', 'e4'))
+            await asyncio.sleep(0.05)  # The move is now waiting on the commit
+            await other.send(json.dumps({'type': 'unknown'}))
+            await receive(other)
+            answered = time.perf_counter() - started
+            return answered, await receive(slow)
+
+    try:
+        answered, delta = run_with_server(server, scenario)
+    finally:
+        store.close()
+    assert answered < 0.4  # Well before the commit finishes
+    assert delta['move'] == 'e2e4'
+
+
+def test_promotion_and_terminal_state_over_the_socket():
+    registry = GameRegistry()
+    registry.create('g', Board('8/P6k/8/8/8/8/8/K7 w - - 0 1'))
+    server = ChessSocketServer(registry)
+
+    async def scenario(url):
+        async with connect(f'{url}/games/g') as player:
+            await receive(player)
+            await player.send(move('white', 'a7', 'a8', promotion='x'))
+            error = await receive(player)
+            await player.send(move('white', 'a7', 'a8', promotion='n'))
+            return error, await receive(player)
+
+    error, delta = run_with_server(server, scenario)
+    assert error['type'] == 'error'
+    assert (delta['move'], delta['promotion']) == ('a7a8n', 'n')
+    assert (delta['status'], delta['draw_reason']) == ('draw', 'insufficient_material')
@@ -2,14 +2,15 @@
 import axios from 'axios';
 
 const BASE_URL = 'http://127.0.0.1:5000';
+const WS_URL = 'ws://127.0.0.1:8765';
 
 export const getBoard = async () => {
   const response = await axios.get(`${BASE_URL}/board`);
   return response.data;
 };
 
-export const makeMove = async (start_pos: string, end_pos: string) => {
-  const response = await axios.post(`${BASE_URL}/move`, { start_pos, end_pos });
+export const makeMove = async (start_pos: string, end_pos: string, promotion?: 'q' | 'r' | 'b' | 'n') => {
+  const response = await axios.post(`${BASE_URL}/move`, { start_pos, end_pos, ...(promotion ? { promotion } : {}) });
   return response.data;
 };
 
@@ -18,3 +19,17 @@ export const resetGame = async () => {
   const response = await axios.post(`${BASE_URL}/reset`);
   return response.data;
 };
+
+// Live game channel: receives a snapshot on connect, then one delta per move with the
+// resulting status and draw_reason, and a fresh snapshot when the game changes otherwise.
+export const subscribeToGame = (gameId: string, onMessage: (message: any) => void) => {
+  const socket = new WebSocket(`${WS_URL}/games/${gameId}`);
+  socket.onmessage = (event) => onMessage(JSON.parse(event.data));
+  return socket;
+};
+
+// promotion is 'q', 'r', 'b' or 'n'; the server promotes to a queen when it is left out.
+export const sendMove = (socket: WebSocket, color: string, start_pos: string, end_pos: string,
+                         promotion?: 'q' | 'r' | 'b' | 'n') => {
+  socket.send(JSON.stringify({ type: 'move', color, start_pos, end_pos, ...(promotion ? { promotion } : {}) }));
+};